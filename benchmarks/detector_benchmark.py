@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+"""
+Detector Benchmark Suite
+Runs an offline, reproducible sweep of LandslideDetector settings on
+synthetic captures and writes JSON results that can be diffed across
+commits. Each configuration runs in a fresh process so peak RSS and
+thread settings don't leak between runs.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+import platform
+import resource
+import itertools
+import subprocess
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, Any, List
+
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCHMARK_DIR)
+
+# Add core directory to path to import the detector
+sys.path.insert(0, os.path.join(REPO_DIR, 'core'))
+
+from inference_backends import get_cpu_model
+
+def get_git_commit() -> str:
+    """Get the current commit so results can be compared across commits"""
+    try:
+        completed = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR,
+                                   capture_output=True, text=True)
+        return completed.stdout.strip() or 'unknown'
+    except OSError:
+        return 'unknown'
+
+def create_dataset(directory: Path, count: int, width: int, height: int) -> List[str]:
+    """Generate deterministic synthetic JPEG captures"""
+    from preprocess_benchmark import create_test_image
+
+    directory.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = directory / f"landslide_{i:05d}.jpg"
+        if not path.exists():
+            create_test_image(str(path), width, height, seed=i)
+        paths.append(str(path))
+    return paths
+
+def legacy_batch_detect(detector, image_paths: List[str]) -> List[Dict[str, Any]]:
+    """Score images the original way: preprocess, set_tensor, invoke and build a result per image
+
+    A frozen copy of the detector's original batch_detect loop on a single
+    batch-1 interpreter, so later detector changes can't leak into the
+    baseline.
+    """
+    from preprocess_benchmark import baseline_preprocess_image
+
+    logger = logging.getLogger('ai_landslide_detector')
+    results = []
+    with detector.interpreter_pool.checkout() as slot:
+        slot.resize_input_batch(1)
+        interpreter = slot.interpreter
+        input_details, output_details = slot.input_details, slot.output_details
+
+        for image_path in image_paths:
+            processed_image = baseline_preprocess_image(image_path, input_details)
+            if processed_image is None:
+                results.append({
+                    'success': False,
+                    'error': 'Failed to preprocess image',
+                    'confidence': 0.0,
+                    'prediction': 'unknown'
+                })
+                continue
+
+            interpreter.set_tensor(input_details[0]['index'], processed_image)
+            interpreter.invoke()
+            predictions = interpreter.get_tensor(output_details[0]['index'])[0]
+
+            predicted_class_idx = np.argmax(predictions)
+            confidence = float(predictions[predicted_class_idx])
+            predicted_class = detector.class_names[predicted_class_idx]
+            results.append({
+                'success': True,
+                'landslide_detected': predicted_class == 'landslide' and confidence >= detector.confidence_threshold,
+                'prediction': predicted_class,
+                'confidence': confidence,
+                'all_predictions': {
+                    detector.class_names[i]: float(predictions[i]) for i in range(len(detector.class_names))
+                },
+                'timestamp': datetime.now().isoformat(),
+                'image_path': image_path
+            })
+            logger.info(f"Detection result: {predicted_class} (confidence: {confidence:.3f})")
+
+    return results
+
+def run_case(case: Dict[str, Any], image_paths: List[str], model_path: str, repeats: int) -> Dict[str, Any]:
+    """Measure one configuration inside the current (fresh) process"""
+    logging.disable(logging.INFO)
+
+    from ai_landslide_detector import LandslideDetector, TFLITE_BACKENDS
+
+    if case['variant'] == 'legacy' and case['backend'] not in TFLITE_BACKENDS + ('tflite',):
+        return {'error': 'The legacy variant needs a TFLite backend'}
+
+    detector = LandslideDetector({
+        'model_path': model_path,
+        'batch_size': case['batch_size'],
+        'num_threads': case['threads'],
+        'fast_decode': case['decode'] == 'fast',
+        'decode_threads': case['decode_threads'],
+        'inference_backend': case['backend'],
+        'warmup_invokes': 2,
+        'auto_tune_enabled': False
+    })
+    if not detector.interpreter:
+        return {'error': 'Model could not be loaded'}
+    if case['variant'] == 'legacy' and detector.input_details[0]['dtype'] != np.float32:
+        return {'error': 'The legacy variant only feeds float32 input models'}
+
+    batch_latencies = []
+    elapsed = 0.0
+    for _ in range(repeats):
+        for start in range(0, len(image_paths), case['batch_size']):
+            chunk = image_paths[start:start + case['batch_size']]
+            batch_start = time.perf_counter()
+            if case['variant'] == 'legacy':
+                legacy_batch_detect(detector, chunk)
+            else:
+                detector.batch_detect(chunk)
+            batch_elapsed = time.perf_counter() - batch_start
+            batch_latencies.append(batch_elapsed * 1000 / len(chunk))
+            elapsed += batch_elapsed
+
+    images = len(image_paths) * repeats
+    return {
+        'runtime': detector.interpreter_pool.slots[0].runtime,
+        'images': images,
+        'images_per_s': round(images / elapsed, 3),
+        'latency_ms_per_image': {
+            'p50': round(float(np.percentile(batch_latencies, 50)), 3),
+            'p95': round(float(np.percentile(batch_latencies, 95)), 3),
+            'p99': round(float(np.percentile(batch_latencies, 99)), 3)
+        },
+        'stages': detector.get_metrics()['stages'],
+        'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+    }
+
+def run_case_subprocess(case: Dict[str, Any], image_dir: str, model_path: str, repeats: int) -> Dict[str, Any]:
+    """Run one configuration in a fresh interpreter process"""
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-case', json.dumps(case),
+         '--image-dir', image_dir, '--model', model_path, '--repeats', str(repeats)],
+        capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()
+        return {'error': error[-1] if error else 'benchmark case failed'}
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+def parse_list(value: str, cast=str) -> list:
+    """Parse a comma separated command-line list, dropping duplicates"""
+    return list(dict.fromkeys(cast(item) for item in value.split(',') if item))
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description="Landslide detector benchmark suite")
+    parser.add_argument("--model", default="models/landslide_detector.tflite",
+                        help="TFLite model path (the placeholder model is created if missing)")
+    parser.add_argument("--images", type=int, default=32, help="Synthetic captures to generate")
+    parser.add_argument("--resolution", default="2592x1944", help="Synthetic capture resolution")
+    parser.add_argument("--image-dir", help="Directory for synthetic captures (temporary if omitted)")
+    parser.add_argument("--repeats", type=int, default=2, help="Passes over the images per case")
+    parser.add_argument("--batch-sizes", default="1,8", help="Comma separated batch sizes")
+    parser.add_argument("--threads", default=f"1,{os.cpu_count() or 1}", help="Comma separated interpreter threads")
+    parser.add_argument("--decode", default="fast,full", help="Decode modes: fast,full")
+    parser.add_argument("--variants", default="zero_copy,legacy",
+                        help="Scoring variants: zero_copy (current batch_detect) or legacy (original per-image loop)")
+    parser.add_argument("--backends", default="tflite",
+                        help="Inference backends: tflite,tflite_xnnpack,tflite_builtin,opencv_dnn,onnxruntime")
+    parser.add_argument("--decode-threads", type=int, default=2, help="Decoder threads for the zero-copy pipeline")
+    parser.add_argument("--output", help="Write JSON results to this file")
+    parser.add_argument("--run-case", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    model_path = os.path.abspath(args.model)
+
+    if args.run_case:
+        image_paths = sorted(str(path) for path in Path(args.image_dir).glob('*.jpg'))
+        print(json.dumps(run_case(json.loads(args.run_case), image_paths, model_path, args.repeats)))
+        return
+
+    # Create the placeholder model once, outside the timed cases
+    if not os.path.exists(model_path):
+        from ai_landslide_detector import LandslideDetector
+        LandslideDetector({'model_path': model_path, 'inference_backend': 'tflite', 'auto_tune_enabled': False})
+        if not os.path.exists(model_path):
+            print(f"Model not found and could not be created: {model_path}")
+            sys.exit(1)
+
+    width, height = (int(value) for value in args.resolution.lower().split('x'))
+    cases = [
+        {'batch_size': batch_size, 'threads': threads, 'decode': decode,
+         'variant': variant, 'backend': backend, 'decode_threads': args.decode_threads}
+        for batch_size, threads, decode, variant, backend in itertools.product(
+            parse_list(args.batch_sizes, int), parse_list(args.threads, int),
+            parse_list(args.decode), parse_list(args.variants), parse_list(args.backends))
+        # The original path always decodes at full resolution
+        if not (variant == 'legacy' and decode == 'fast')
+    ]
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_dir = Path(args.image_dir or temp_dir)
+        create_dataset(image_dir, args.images, width, height)
+
+        results = []
+        for case in cases:
+            print(f"Running {case}...", file=sys.stderr)
+            results.append(dict(case, **run_case_subprocess(case, str(image_dir), model_path, args.repeats)))
+
+    report = {
+        'timestamp': datetime.now().isoformat(),
+        'commit': get_git_commit(),
+        'platform': {
+            'machine': platform.machine(),
+            'cpu_model': get_cpu_model(),
+            'cpu_count': os.cpu_count(),
+            'python': platform.python_version(),
+            'numpy': np.__version__
+        },
+        'model': {
+            'path': model_path,
+            'size_mb': round(os.path.getsize(model_path) / (1024 * 1024), 2)
+        },
+        'dataset': {'images': args.images, 'resolution': args.resolution},
+        'results': results
+    }
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+        print(f"Results written to {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+"""
+Preprocessing Microbenchmark
+Compares per-frame latency and memory allocations of the original
+preprocess_image + set_tensor path, kept here as a frozen copy, against
+the zero-copy path that resizes into a scratch frame and normalizes into
+the interpreter buffer.
+"""
+
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+import tracemalloc
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+# Add core directory to path to import the detector
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from ai_landslide_detector import LandslideDetector
+
+def create_test_image(path: str, width: int = 2592, height: int = 1944, seed: int = 0) -> None:
+    """Write a synthetic JPEG at the camera capture resolution"""
+    rng = np.random.default_rng(seed)
+    image = rng.integers(0, 256, (height // 8, width // 8, 3), dtype=np.uint8)
+    image = cv2.resize(image, (width, height), interpolation=cv2.INTER_LINEAR)
+    cv2.imwrite(path, image, [cv2.IMWRITE_JPEG_QUALITY, 95])
+
+def baseline_preprocess_image(image_path: str, input_details: list) -> Optional[np.ndarray]:
+    """The detector's original preprocess_image, frozen so later changes can't leak into the baseline
+
+    Full-resolution decode, color conversion and resize, then a float32
+    copy, a divided copy and a new batch array per frame.
+    """
+    image = cv2.imread(image_path)
+    if image is None:
+        return None
+
+    image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+
+    input_shape = input_details[0]['shape']
+    target_height, target_width = input_shape[1], input_shape[2]
+    image = cv2.resize(image, (target_width, target_height))
+
+    image = image.astype(np.float32) / 255.0
+    return np.expand_dims(image, axis=0)
+
+def legacy_feed(detector: LandslideDetector, image_path: str) -> None:
+    """Preprocess the original way and copy the frame in with set_tensor"""
+    processed_image = baseline_preprocess_image(image_path, detector.input_details)
+    with detector.interpreter_pool.checkout() as slot:
+        slot.resize_input_batch(1)
+        slot.interpreter.set_tensor(slot.input_details[0]['index'], processed_image)
+
+def zero_copy_feed(detector: LandslideDetector, image_path: str) -> None:
+    """Resize into the scratch frame and normalize into the input buffer"""
+    frame = detector.load_frame(image_path, dst=detector._get_scratch_frame())
+    with detector.interpreter_pool.checkout() as slot:
+        slot.resize_input_batch(1)
+        detector._write_input(slot, [frame])
+
+def measure(feed, detector: LandslideDetector, image_path: str, iterations: int) -> dict:
+    """Measure latency and transient allocations per frame for one feed path"""
+    # Warm up buffers and caches
+    for _ in range(3):
+        feed(detector, image_path)
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        feed(detector, image_path)
+    latency_ms = (time.perf_counter() - start) * 1000 / iterations
+
+    # Traced separately so tracemalloc overhead doesn't skew latency
+    tracemalloc.start()
+    peaks = []
+    for _ in range(iterations):
+        baseline = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        feed(detector, image_path)
+        peaks.append(tracemalloc.get_traced_memory()[1] - baseline)
+    tracemalloc.stop()
+
+    return {
+        'latency_ms_per_frame': round(latency_ms, 3),
+        'allocated_kb_per_frame': round(float(np.mean(peaks)) / 1024, 1)
+    }
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description="Preprocessing microbenchmark")
+    parser.add_argument("--model", default="models/landslide_detector.tflite", help="TFLite model path")
+    parser.add_argument("--image", help="JPEG to use (a synthetic capture is generated if omitted)")
+    parser.add_argument("--iterations", type=int, default=50, help="Frames per measurement")
+    parser.add_argument("--full-decode", action="store_true",
+                        help="Disable reduced-resolution decode in the zero-copy path")
+    args = parser.parse_args()
+
+    # The legacy path feeds the TFLite interpreter directly
+    detector = LandslideDetector({
+        'model_path': args.model,
+        'fast_decode': not args.full_decode,
+        'inference_backend': 'tflite',
+        'auto_tune_enabled': False
+    })
+    if not detector.interpreter:
+        print("Model could not be loaded")
+        sys.exit(1)
+    if detector.input_details[0]['dtype'] != np.float32:
+        print("The baseline path only feeds float32 input models")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        image_path = args.image
+        if not image_path:
+            image_path = str(Path(temp_dir) / 'capture.jpg')
+            create_test_image(image_path)
+
+        results = {
+            'image': args.image or 'synthetic 2592x1944',
+            'fast_decode': detector.fast_decode,
+            'legacy': measure(legacy_feed, detector, image_path, args.iterations),
+            'zero_copy': measure(zero_copy_feed, detector, image_path, args.iterations)
+        }
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
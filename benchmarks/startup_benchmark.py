@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Startup Benchmark
+Compares import time, model load time and peak RSS of a fresh process
+that loads the detector model through each available TFLite runtime.
+"""
+
+import os
+import sys
+import json
+import argparse
+import subprocess
+
+CORE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core')
+
+# Each probe runs in its own interpreter so imports and RSS start from zero
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+{import_stmt}
+imported = time.perf_counter()
+{load_stmt}
+loaded = time.perf_counter()
+print(json.dumps({{
+    'import_s': round(imported - start, 3),
+    'load_s': round(loaded - imported, 3),
+    'peak_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+}}))
+"""
+
+RUNTIMES = {
+    'tensorflow': (
+        "from tensorflow import lite as tflite",
+        "interpreter = tflite.Interpreter(model_path=sys.argv[1]); interpreter.allocate_tensors()"
+    ),
+    'tflite_runtime': (
+        "import tflite_runtime.interpreter as tflite",
+        "interpreter = tflite.Interpreter(model_path=sys.argv[1]); interpreter.allocate_tensors()"
+    ),
+    'ai_edge_litert': (
+        "from ai_edge_litert import interpreter as tflite",
+        "interpreter = tflite.Interpreter(model_path=sys.argv[1]); interpreter.allocate_tensors()"
+    ),
+    'detector': (
+        f"sys.path.insert(0, {CORE_DIR!r}); from ai_landslide_detector import LandslideDetector, TFLITE_BACKEND",
+        "detector = LandslideDetector({'model_path': sys.argv[1], 'inference_backend': 'tflite', "
+        "'auto_tune_enabled': False}); assert detector.interpreter"
+    ),
+}
+
+def run_probe(name: str, model_path: str, repeats: int) -> dict:
+    """Run one runtime probe in fresh processes and keep the fastest run"""
+    import_stmt, load_stmt = RUNTIMES[name]
+    code = PROBE.format(import_stmt=import_stmt, load_stmt=load_stmt)
+
+    runs = []
+    for _ in range(repeats):
+        completed = subprocess.run(
+            [sys.executable, '-c', code, model_path],
+            capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()
+            return {'available': False, 'error': error[-1] if error else 'probe failed'}
+        runs.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+
+    best = min(runs, key=lambda run: run['import_s'] + run['load_s'])
+    return dict(best, available=True)
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description="Detector startup time and RSS comparison")
+    parser.add_argument("--model", default="models/landslide_detector.tflite", help="TFLite model path")
+    parser.add_argument("--repeats", type=int, default=3, help="Fresh processes per runtime")
+    parser.add_argument("--runtime", action="append", choices=sorted(RUNTIMES),
+                        help="Runtime to probe (default: all)")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model):
+        print(f"Model not found: {args.model}")
+        sys.exit(1)
+
+    model_path = os.path.abspath(args.model)
+    results = {name: run_probe(name, model_path, args.repeats) for name in (args.runtime or RUNTIMES)}
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -8,20 +8,76 @@ optimized for Raspberry Pi deployment.
 import os
 import cv2
 import numpy as np
-import tensorflow as tf
-from tensorflow import lite as tflite
 import logging
+import math
+import multiprocessing
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from itertools import islice
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional, Any
+from typing import Dict, List, Tuple, Optional, Any, Iterator, Iterable, Callable, Union, BinaryIO
 from datetime import datetime
 import json
 import requests
 from PIL import Image
 import io
 
+from detection_cache import DetectionCache, hash_file
+from inference_metrics import InferenceMetrics
+from frame_gate import FrameDifferenceGate
+from perceptual_hash import PerceptualHashIndex, compute_hash, is_degenerate_hash
+from displacement_detector import SlopeDisplacementDetector
+from region_of_interest import RegionOfInterest
+from results_store import DetectionResultStore
+from embedding_index import EmbeddingStore
+from inference_backends import (InterpreterSlot, InterpreterPool, TFLITE_BACKEND, TFLITE_BACKENDS,
+                                BACKEND_NAMES, select_backend, load_tuning)
+
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# libjpeg can decode directly at 1/2, 1/4 or 1/8 scale
+REDUCED_DECODE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_COLOR_8,
+    4: cv2.IMREAD_REDUCED_COLOR_4,
+    2: cv2.IMREAD_REDUCED_COLOR_2,
+}
+
+def read_process_memory_kb(field: str) -> Optional[int]:
+    """Read a memory counter such as RssAnon from /proc/self/status (Linux only)"""
+    try:
+        with open('/proc/self/status', 'r') as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+def read_file_mapping_kb(file_path: str) -> Optional[Dict[str, int]]:
+    """Sum /proc/self/smaps counters over this process's mappings of a file (Linux only)"""
+    counters = ('Rss', 'Pss', 'Shared_Clean', 'Shared_Dirty', 'Private_Clean', 'Private_Dirty')
+    totals = {name: 0 for name in counters}
+    totals['mappings'] = 0
+    in_file = False
+    
+    try:
+        with open('/proc/self/smaps', 'r') as f:
+            for line in f:
+                fields = line.split()
+                if fields and '-' in fields[0] and not fields[0].endswith(':'):
+                    # Mapping header: address perms offset dev inode [pathname]
+                    in_file = ' '.join(fields[5:]) == file_path
+                    totals['mappings'] += in_file
+                elif in_file and fields[0].rstrip(':') in totals:
+                    totals[fields[0].rstrip(':')] += int(fields[1])
+    except OSError:
+        return None
+    
+    return totals
+
 class LandslideDetector:
     """AI-based landslide detection using lightweight models"""
     
@@ -29,11 +85,106 @@ class LandslideDetector:
         self.config = config
         self.model = None
         self.interpreter = None
+        self.interpreter_pool: Optional[InterpreterPool] = None
         self.input_details = None
         self.output_details = None
         self.class_names = ['normal', 'landslide']
         self.confidence_threshold = config.get('confidence_threshold', 0.7)
         self.model_path = config.get('model_path', 'models/landslide_detector.tflite')
+        self.models_directory = config.get('models_directory', str(Path(self.model_path).parent))
+        self.batch_size = max(1, int(config.get('batch_size', 8)))
+        self.batch_resize_supported = True
+        self.pool_size = max(1, int(config.get('interpreter_pool_size', 1)))
+        self.num_threads = config.get('num_threads')
+        self.use_xnnpack = config.get('use_xnnpack', True)
+        self.inference_backend = config.get('inference_backend', 'tflite_xnnpack' if self.use_xnnpack else 'tflite_builtin')
+        self.backend_selection: Optional[Dict[str, Any]] = None
+        self.onnx_model_path = config.get('onnx_model_path')
+        self.embeddings_enabled = config.get('embeddings_enabled', False)
+        self.embedding_store: Optional[EmbeddingStore] = None
+        self.analysis_workers = max(1, int(config.get('analysis_workers', 1)))
+        self.analysis_start_method = config.get('analysis_start_method')
+        self.decode_threads = max(0, int(config.get('decode_threads', 2)))
+        self.prefetch_depth = max(1, int(config.get('prefetch_depth', 2 * self.batch_size)))
+        self.fast_decode = config.get('fast_decode', True)
+        self.max_decode_scale = int(config.get('max_decode_scale', max(REDUCED_DECODE_FLAGS)))
+        self.auto_tune_enabled = config.get('auto_tune_enabled', True)
+        self.tuning: Optional[Dict[str, Any]] = None
+        self._scratch = threading.local()
+        self.quantization = config.get('quantization', 'dynamic')
+        self.representative_image_dir = config.get('representative_image_dir', './images')
+        self.representative_samples = int(config.get('representative_samples', 100))
+        roi_config = config.get('roi')
+        self.roi = RegionOfInterest(roi_config) if roi_config and roi_config.get('enabled', True) else None
+        self.tile_size = int(config.get('tile_size', 448))
+        self.tile_overlap = float(config.get('tile_overlap', 0.25))
+        if not 0 <= self.tile_overlap < 1:
+            raise ValueError(f"tile_overlap must be in [0, 1), got {self.tile_overlap}")
+        self.tile_batch_size = max(1, int(config.get('tile_batch_size', self.batch_size)))
+        self.model_hash: Optional[str] = None
+        self.model_version: Optional[str] = None
+        self._model_lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._swap_thread: Optional[threading.Thread] = None
+        self.swap_status: Optional[Dict[str, Any]] = None
+        self.cascade_model_path = config.get('cascade_model_path')
+        self.cascade_band = tuple(sorted(float(v) for v in config.get('cascade_uncertainty_band', (0.2, 0.8))))
+        self.cascade_pool: Optional[InterpreterPool] = None
+        self.cascade_backend_selection: Optional[Dict[str, Any]] = None
+        self.cascade_counts = {'fast': 0, 'full': 0}
+        self._cascade_lock = threading.Lock()
+        self._interpreter_private_kb: Optional[int] = None
+        self.warmup_invokes = max(0, int(config.get('warmup_invokes', 0)))
+        self.metrics = InferenceMetrics(config.get('metrics_path'), config.get('metrics_publish_interval', 10.0))
+        self.incremental_analysis = config.get('incremental_analysis', False)
+        self.analysis_state_path = config.get('analysis_state_path')
+        self.analysis_max_retries = max(0, int(config.get('analysis_max_retries', 3)))
+        self._analysis_lock = threading.Lock()
+        self.result_cache: Optional[DetectionCache] = None
+        self.frame_gate: Optional[FrameDifferenceGate] = None
+        self.duplicate_index: Optional[PerceptualHashIndex] = None
+        self.duplicate_hash_method = config.get('near_duplicate_hash', 'dhash')
+        self.duplicate_max_age = float(config.get('near_duplicate_max_age_hours', 24)) * 3600
+        self.time_series_mode = config.get('time_series_mode', 'classification')
+        self.displacement_detector: Optional[SlopeDisplacementDetector] = None
+        self.results_store: Optional[DetectionResultStore] = None
+        
+        # Initialize frame difference gate
+        if config.get('frame_gate_enabled', False):
+            self.frame_gate = FrameDifferenceGate(
+                threshold=float(config.get('frame_gate_threshold', 0.02)),
+                size=int(config.get('frame_gate_size', 64)),
+                max_skips=int(config.get('frame_gate_max_skips', 24))
+            )
+        
+        # Initialize near-duplicate index over recently scored frames
+        if config.get('near_duplicate_enabled', False):
+            self.duplicate_index = PerceptualHashIndex(
+                max_distance=int(config.get('near_duplicate_max_distance', 4)),
+                max_entries=int(config.get('near_duplicate_window', 288))
+            )
+        
+        # Initialize result cache
+        if config.get('cache_enabled', False):
+            try:
+                self.result_cache = DetectionCache(
+                    config.get('cache_path', 'models/detection_cache.db'),
+                    max_entries=int(config.get('cache_max_entries', 100000))
+                )
+            except Exception as e:
+                logger.error(f"Failed to open detection result cache: {e}")
+        
+        # Initialize results store
+        if config.get('results_store_enabled', False):
+            try:
+                self.results_store = DetectionResultStore(
+                    config.get('results_store_path', 'models/detection_results.db'),
+                    camera_id=config.get('camera_id', 'default'),
+                    batch_size=int(config.get('results_store_batch_size', 50)),
+                    flush_interval=float(config.get('results_store_flush_interval', 10.0))
+                )
+            except Exception as e:
+                logger.error(f"Failed to open detection results store: {e}")
         
         # Initialize model
         self.load_model()
@@ -50,17 +201,23 @@ class LandslideDetector:
                     logger.error("Failed to download pre-trained model")
                     return False
             
-            # Load TensorFlow Lite model
-            self.interpreter = tflite.Interpreter(model_path=str(model_path))
-            self.interpreter.allocate_tensors()
+            pool, private_kb, params = self._create_pool(str(model_path), self.config.get('model_version'),
+                                                         onnx_model_path=self.onnx_model_path,
+                                                         embeddings=self.embeddings_enabled, tuned=True)
+            self._activate_pool(pool, private_kb, params)
+            
+            if self.cascade_model_path:
+                self.load_cascade_model()
             
-            # Get input and output details
-            self.input_details = self.interpreter.get_input_details()
-            self.output_details = self.interpreter.get_output_details()
+            if self.warmup_invokes:
+                self.warmup(self.warmup_invokes)
             
-            logger.info(f"Model loaded successfully: {model_path}")
+            logger.info(f"Model loaded successfully: {model_path} (version {self.model_version})")
             logger.info(f"Input shape: {self.input_details[0]['shape']}")
             logger.info(f"Output shape: {self.output_details[0]['shape']}")
+            logger.info(f"Inference backend: {pool.backend} ({pool.slots[0].runtime})")
+            logger.info(f"Interpreter pool: {self.pool_size} x "
+                        f"{self.num_threads or 'default'} threads")
             
             return True
             
@@ -68,6 +225,288 @@ class LandslideDetector:
             logger.error(f"Failed to load model: {e}")
             return False
     
+    def _create_pool(self, model_path: str, model_version: Optional[str] = None,
+                     onnx_model_path: Optional[str] = None, backend: Optional[str] = None,
+                     embeddings: bool = False,
+                     tuned: bool = False) -> Tuple[InterpreterPool, Optional[int], Optional[Dict[str, Any]]]:
+        """Load a model file into a new interpreter pool without activating it
+        
+        With tuned set, the interpreters are created with the auto-tuned
+        thread count of this model, and the tuned parameters are returned
+        for _activate_pool to apply; otherwise None is returned for them.
+        """
+        model_hash = hash_file(model_path)
+        backend = backend or self.resolve_backend(model_path, model_hash, onnx_model_path)
+        if embeddings and backend not in TFLITE_BACKENDS:
+            logger.warning(f"Embedding extraction needs a TFLite backend; {backend} scores without it")
+            embeddings = False
+        params = self._tuned_parameters(model_hash, backend) if tuned else None
+        
+        # Load the model into a pool of interpreters. Loading TFLite by
+        # path lets the runtime mmap the file read-only, so every interpreter
+        # and every worker process shares the same page-cache pages for the
+        # weights; only delegate-packed copies are private to a process.
+        anon_before_kb = read_process_memory_kb('RssAnon')
+        pool = InterpreterPool(
+            model_path,
+            size=self.pool_size,
+            num_threads=params['num_threads'] if params else self.num_threads,
+            backend=backend,
+            onnx_model_path=onnx_model_path,
+            model_hash=model_hash,
+            model_version=model_version or model_hash[:12],
+            embeddings=embeddings,
+            embedding_tensor=self.config.get('embedding_tensor')
+        )
+        
+        private_kb = None
+        anon_after_kb = read_process_memory_kb('RssAnon')
+        if anon_before_kb is not None and anon_after_kb is not None:
+            private_kb = max(0, anon_after_kb - anon_before_kb)
+        
+        output_classes = int(pool.slots[0].output_details[0]['shape'][-1])
+        if output_classes != len(self.class_names):
+            raise ValueError(f"Model outputs {output_classes} classes, expected {len(self.class_names)}")
+        
+        return pool, private_kb, params
+    
+    def _tuned_parameters(self, model_hash: str, backend: str) -> Dict[str, Any]:
+        """Get the parameters auto_tune saved for this model on this machine
+        
+        Without a saved tuning the configured values are returned, so swapping
+        to an untuned model does not keep the previous model's parameters.
+        """
+        tuning = None
+        if self.auto_tune_enabled:
+            tuning = load_tuning(self.config.get('auto_tune_path', 'models/auto_tune.json'), model_hash, backend)
+        
+        values = tuning or {}
+        batch_size = max(1, int(values.get('batch_size', self.config.get('batch_size', 8))))
+        params = {
+            'batch_size': batch_size,
+            'num_threads': values.get('num_threads', self.config.get('num_threads')),
+            'max_decode_scale': int(values.get('max_decode_scale',
+                                               self.config.get('max_decode_scale', max(REDUCED_DECODE_FLAGS)))),
+            'prefetch_depth': max(1, int(self.config.get('prefetch_depth', 2 * batch_size))),
+            'tuning': tuning
+        }
+        
+        if tuning:
+            logger.info(f"Using tuned parameters: batch size {params['batch_size']}, "
+                        f"{params['num_threads']} threads, decode scale up to 1/{params['max_decode_scale']}")
+        return params
+    
+    def load_cascade_model(self) -> bool:
+        """Load the fast first-stage model of the cascade
+        
+        A cascade that fails to load is left disabled, so every frame goes
+        to the main model as before.
+        """
+        try:
+            # Keep reporting the main model's backend selection
+            main_selection = self.backend_selection
+            self.cascade_pool, _, _ = self._create_pool(
+                self.cascade_model_path,
+                self.config.get('cascade_model_version'),
+                onnx_model_path=self.config.get('cascade_onnx_model_path'),
+                backend=self.config.get('cascade_inference_backend')
+            )
+            self.cascade_backend_selection, self.backend_selection = self.backend_selection, main_selection
+            
+            if self.warmup_invokes:
+                self.warmup(self.warmup_invokes, pool=self.cascade_pool)
+            
+            logger.info(f"Cascade first stage loaded: {self.cascade_model_path} "
+                        f"(escalating landslide probability in {list(self.cascade_band)} "
+                        f"or >= {self.confidence_threshold})")
+            return True
+            
+        except Exception as e:
+            logger.error(f"Failed to load cascade model, scoring every frame with the main model: {e}")
+            self.cascade_pool = None
+            return False
+    
+    def _activate_pool(self, pool: InterpreterPool, private_kb: Optional[int] = None,
+                       params: Optional[Dict[str, Any]] = None) -> None:
+        """Make a loaded pool the one new requests use
+        
+        Requests that already checked out a slot finish on it and return it
+        to the old pool, which is freed once the last of them is done.
+        params are the pool's tuned parameters from _create_pool, switched
+        together with the pool.
+        """
+        with self._model_lock:
+            if params is not None:
+                self.batch_size = params['batch_size']
+                self.num_threads = params['num_threads']
+                self.max_decode_scale = params['max_decode_scale']
+                self.prefetch_depth = params['prefetch_depth']
+                self.tuning = params['tuning']
+            self.interpreter_pool = pool
+            self.interpreter = pool.slots[0].interpreter
+            self.input_details = pool.slots[0].input_details
+            self.output_details = pool.slots[0].output_details
+            self.model_path = pool.model_path
+            self.model_hash = pool.model_hash
+            self.model_version = pool.model_version
+            self.batch_resize_supported = True
+            self._interpreter_private_kb = private_kb
+        
+        # Results from the previous model must not be reused for skipped frames
+        if self.frame_gate:
+            self.frame_gate.reset()
+        if self.duplicate_index:
+            self.duplicate_index.clear()
+        
+        self._open_embedding_store(pool)
+    
+    def _open_embedding_store(self, pool: InterpreterPool) -> None:
+        """Open the embedding store of the active model
+        
+        Embeddings from different models are not comparable, so every model
+        hash gets its own store under embedding_dir.
+        """
+        if not pool.embeddings:
+            self.embedding_store = None
+            return
+        
+        store_dir = Path(self.config.get('embedding_dir', 'models/embeddings')) / pool.model_hash[:12]
+        if self.embedding_store and self.embedding_store.directory == store_dir:
+            return
+        
+        try:
+            self.embedding_store = EmbeddingStore(
+                str(store_dir),
+                min_index_rows=int(self.config.get('embedding_index_min_rows', 50000)),
+                probe_fraction=float(self.config.get('embedding_probe_fraction', 0.05))
+            )
+        except Exception as e:
+            logger.error(f"Failed to open embedding store: {e}")
+            self.embedding_store = None
+    
+    def swap_model(self, model_path: str, model_version: Optional[str] = None,
+                   wait: bool = False) -> Dict[str, Any]:
+        """Load and warm a new model in the background, then switch to it atomically
+        
+        The current model keeps serving until the new one is ready, and stays
+        active if the new one fails to load. Progress is in swap_status.
+        """
+        if not Path(model_path).exists():
+            return {'success': False, 'error': f'Model file not found: {model_path}'}
+        
+        with self._swap_lock:
+            if self._swap_thread and self._swap_thread.is_alive():
+                return {'success': False, 'error': 'A model swap is already in progress'}
+            
+            self.swap_status = {
+                'state': 'loading',
+                'model_path': str(model_path),
+                'started_at': datetime.now().isoformat()
+            }
+            self._swap_thread = threading.Thread(
+                target=self._swap_model, args=(str(model_path), model_version),
+                name='model-swap', daemon=True
+            )
+            self._swap_thread.start()
+        
+        if wait:
+            self._swap_thread.join()
+        
+        status = dict(self.swap_status)
+        return dict(status, success=status['state'] != 'failed')
+    
+    def _swap_model(self, model_path: str, model_version: Optional[str]) -> None:
+        """Background half of swap_model"""
+        try:
+            pool, private_kb, params = self._create_pool(model_path, model_version,
+                                                         embeddings=self.embeddings_enabled, tuned=True)
+            
+            # Warm the new interpreters before any request can reach them
+            self.warmup(max(1, self.warmup_invokes), pool=pool)
+            
+            previous_version = self.model_version
+            self._activate_pool(pool, private_kb, params)
+            
+            self.swap_status = dict(
+                self.swap_status,
+                state='active',
+                model_hash=pool.model_hash,
+                model_version=pool.model_version,
+                previous_version=previous_version,
+                completed_at=datetime.now().isoformat()
+            )
+            logger.info(f"Swapped model to {model_path} (version {previous_version} -> {pool.model_version})")
+            
+        except Exception as e:
+            logger.error(f"Model swap to {model_path} failed, keeping the current model: {e}")
+            self.swap_status = dict(
+                self.swap_status,
+                state='failed',
+                error=str(e),
+                completed_at=datetime.now().isoformat()
+            )
+    
+    def resolve_backend(self, model_path: str, model_hash: Optional[str] = None,
+                        onnx_model_path: Optional[str] = None) -> str:
+        """Get the configured inference backend; 'auto' opts in to benchmarking the candidates"""
+        backend = self.inference_backend
+        if backend == 'tflite':
+            return 'tflite_xnnpack' if self.use_xnnpack else 'tflite_builtin'
+        if backend != 'auto':
+            return backend
+        
+        candidates = list(self.config.get('backend_candidates', BACKEND_NAMES))
+        if not self.use_xnnpack and 'tflite_xnnpack' in candidates:
+            candidates.remove('tflite_xnnpack')
+        if self.embeddings_enabled:
+            # Only TFLite exposes the penultimate layer
+            candidates = [candidate for candidate in candidates if candidate in TFLITE_BACKENDS]
+        
+        # A relative cache path lives next to the model, not in the working directory
+        cache_path = Path(model_path).parent / self.config.get('backend_cache_path', 'backend_selection.json')
+        
+        try:
+            # Benchmark with the configured settings rather than the auto-tuned
+            # ones, so a swap after tuning finds the same cached selection
+            self.backend_selection = select_backend(
+                model_path, model_hash or hash_file(model_path),
+                str(cache_path),
+                candidates,
+                num_threads=self.config.get('num_threads'),
+                batch_size=max(1, int(self.config.get('batch_size', 8))),
+                iterations=int(self.config.get('backend_benchmark_iterations', 10)),
+                tolerance=float(self.config.get('backend_tolerance', 0.02)),
+                onnx_model_path=onnx_model_path
+            )
+        except Exception as e:
+            logger.warning(f"Backend auto-selection failed, using TFLite: {e}")
+            return 'tflite_xnnpack' if self.use_xnnpack else 'tflite_builtin'
+        
+        backend = self.backend_selection['backend']
+        source = 'cached' if self.backend_selection['cached'] else 'measured'
+        logger.info(f"Selected inference backend {backend} ({source})")
+        return backend
+    
+    def warmup(self, invokes: int, pool: Optional[InterpreterPool] = None) -> None:
+        """Run throwaway invokes on every pooled interpreter
+        
+        The first invokes allocate and pack delegate buffers, so their latency
+        would otherwise show up as a spike in production timings. Warming the
+        active pool also resets the metrics; a pool being swapped in is
+        warmed without touching them.
+        """
+        target = pool or self.interpreter_pool
+        for slot in target.all_slots:
+            input_view = slot.input_buffer()
+            input_view.fill(0)
+            del input_view
+            for _ in range(invokes):
+                slot.invoke()
+        
+        if pool is None:
+            self.metrics.reset()
+        logger.info(f"Warmed up {len(target.all_slots)} interpreter(s) with {invokes} invokes each")
+    
     def download_pretrained_model(self) -> bool:
         """Download a pre-trained model (placeholder for actual implementation)"""
         try:
@@ -89,6 +528,9 @@ class LandslideDetector:
     def create_placeholder_model(self):
         """Create a placeholder TensorFlow Lite model for demonstration"""
         try:
+            # Full TensorFlow is only needed to build and convert models
+            import tensorflow as tf
+            
             # Create a simple CNN model
             model = tf.keras.Sequential([
                 tf.keras.layers.Conv2D(32, 3, activation='relu', input_shape=(224, 224, 3)),
@@ -111,6 +553,14 @@ class LandslideDetector:
             # Convert to TensorFlow Lite
             converter = tf.lite.TFLiteConverter.from_keras_model(model)
             converter.optimizations = [tf.lite.Optimize.DEFAULT]
+            
+            if self.quantization == 'int8':
+                # Full integer quantization with raw uint8 pixels in and out
+                converter.representative_dataset = lambda: self._representative_dataset(224, 224)
+                converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+                converter.inference_input_type = tf.uint8
+                converter.inference_output_type = tf.uint8
+            
             tflite_model = converter.convert()
             
             # Save the model
@@ -126,67 +576,276 @@ class LandslideDetector:
             logger.error(f"Failed to create placeholder model: {e}")
             raise
     
-    def preprocess_image(self, image_path: str) -> Optional[np.ndarray]:
-        """Preprocess image for model input"""
-        try:
-            # Load image
-            image = cv2.imread(image_path)
+    def _representative_dataset(self, target_width: int, target_height: int) -> Iterator[List[np.ndarray]]:
+        """Yield calibration inputs for full integer quantization from local sample images"""
+        image_dir = Path(self.representative_image_dir)
+        image_files = sorted(image_dir.glob('*.jpg'))[:self.representative_samples] if image_dir.exists() else []
+        
+        if not image_files:
+            logger.warning(f"No sample images in {image_dir}, calibrating quantization on random data")
+            rng = np.random.default_rng(0)
+            for _ in range(self.representative_samples):
+                yield [rng.random((1, target_height, target_width, 3), dtype=np.float32)]
+            return
+        
+        logger.info(f"Calibrating quantization on {len(image_files)} images from {image_dir}")
+        for image_file in image_files:
+            image = self.read_image(str(image_file), target_width, target_height)
             if image is None:
-                logger.error(f"Failed to load image: {image_path}")
-                return None
+                continue
             
-            # Convert BGR to RGB
-            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            if self.roi:
+                image = self.roi.crop(image)
             
+            frame = cv2.cvtColor(cv2.resize(image, (target_width, target_height)), cv2.COLOR_BGR2RGB)
+            if self.roi:
+                self.roi.apply_mask(frame)
+            yield [np.expand_dims(frame.astype(np.float32) / 255.0, axis=0)]
+    
+    def get_decode_scale(self, image_path: Union[str, BinaryIO], target_width: int, target_height: int) -> int:
+        """Pick the largest decode scale-down factor, up to max_decode_scale, that still covers the model input"""
+        try:
+            # Only the header is parsed here, no pixels are decoded
+            with Image.open(image_path) as header:
+                width, height = header.size
+        except Exception:
+            return 1
+        
+        # Only the ROI crop has to cover the model input
+        if self.roi:
+            width, height = self.roi.crop_size(width, height)
+        
+        # Compare against the short side so EXIF rotation can't undershoot the target
+        short_side = min(width, height)
+        for scale in sorted(REDUCED_DECODE_FLAGS, reverse=True):
+            if scale > self.max_decode_scale:
+                continue
+            if short_side // scale >= max(target_width, target_height):
+                return scale
+        
+        return 1
+    
+    def read_image(self, image_path: str, target_width: int, target_height: int,
+                   image_data: Optional[bytes] = None) -> Optional[np.ndarray]:
+        """Read an image as BGR, decoding at reduced resolution when fast_decode is on
+        
+        When image_data holds the encoded bytes they are decoded in memory and
+        image_path is only used as a label.
+        """
+        scale = 1
+        if self.fast_decode:
+            source = io.BytesIO(image_data) if image_data is not None else image_path
+            scale = self.get_decode_scale(source, target_width, target_height)
+        
+        flags = REDUCED_DECODE_FLAGS[scale] if scale > 1 else cv2.IMREAD_COLOR
+        
+        if image_data is not None:
+            return cv2.imdecode(np.frombuffer(image_data, dtype=np.uint8), flags)
+        
+        return cv2.imread(image_path, flags)
+    
+    def _get_scratch_frame(self) -> np.ndarray:
+        """Get this thread's reusable uint8 frame buffer at the model input size"""
+        input_shape = self.input_details[0]['shape']
+        frame_shape = (int(input_shape[1]), int(input_shape[2]), 3)
+        
+        frame = getattr(self._scratch, 'frame', None)
+        if frame is None or frame.shape != frame_shape:
+            frame = self._scratch.frame = np.empty(frame_shape, dtype=np.uint8)
+        
+        return frame
+    
+    def load_frame(self, image_path: str, dst: Optional[np.ndarray] = None,
+                   image_data: Optional[bytes] = None) -> Optional[np.ndarray]:
+        """Load an image as an RGB uint8 frame at the model input size
+        
+        When dst is given the frame is resized and converted in place into it,
+        so the hot path does not allocate a new array per image. image_data
+        holds already read encoded bytes, e.g. an archive member.
+        """
+        try:
             # Get input shape from model
             input_shape = self.input_details[0]['shape']
-            target_height, target_width = input_shape[1], input_shape[2]
-            
-            # Resize image
-            image = cv2.resize(image, (target_width, target_height))
+            target_height, target_width = int(input_shape[1]), int(input_shape[2])
             
-            # Normalize pixel values
-            image = image.astype(np.float32) / 255.0
+            # Load image
+            with self.metrics.timer('decode'):
+                image = self.read_image(image_path, target_width, target_height, image_data)
+            if image is None:
+                logger.error(f"Failed to load image: {image_path}")
+                return None
             
-            # Add batch dimension
-            image = np.expand_dims(image, axis=0)
+            # Crop to the ROI, resize, then convert BGR to RGB on the smaller frame
+            with self.metrics.timer('resize'):
+                if self.roi:
+                    image = self.roi.crop(image)
+                frame = cv2.resize(image, (target_width, target_height), dst=dst)
+                cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=frame)
+                if self.roi:
+                    self.roi.apply_mask(frame)
             
-            return image
+            return frame
             
         except Exception as e:
             logger.error(f"Failed to preprocess image: {e}")
             return None
     
-    def detect_landslide(self, image_path: str) -> Dict[str, Any]:
-        """Detect landslide in the given image"""
-        try:
-            if not self.interpreter:
-                logger.error("Model not loaded")
-                return {
-                    'success': False,
-                    'error': 'Model not loaded',
-                    'confidence': 0.0,
-                    'prediction': 'unknown'
-                }
+    def _fill_input(self, dst: np.ndarray, frame: np.ndarray,
+                    input_detail: Optional[Dict[str, Any]] = None) -> None:
+        """Convert an RGB uint8 frame into the model input dtype, writing into dst"""
+        input_detail = input_detail or self.input_details[0]
+        input_dtype = input_detail['dtype']
+        
+        if input_dtype == np.float32:
+            # Normalize pixel values
+            np.divide(frame, np.float32(255.0), out=dst)
+            return
+        
+        # Quantized input: real_value = (quantized - zero_point) * scale
+        scale, zero_point = input_detail['quantization']
+        
+        if abs(scale * 255.0 - 1.0) < 1e-3:
+            # Calibrated on [0, 1] pixels, so raw pixels only need a zero-point shift
+            if zero_point == 0:
+                np.copyto(dst, frame, casting='unsafe')
+            else:
+                np.add(frame, zero_point, out=dst, dtype=np.int16, casting='unsafe')
+            return
+        
+        limits = np.iinfo(input_dtype)
+        quantized = np.rint(frame * np.float32(1.0 / (255.0 * scale))) + zero_point
+        np.copyto(dst, np.clip(quantized, limits.min, limits.max), casting='unsafe')
+    
+    def preprocess_image(self, image_path: str) -> Optional[np.ndarray]:
+        """Preprocess image for model input"""
+        frame = self.load_frame(image_path)
+        if frame is None:
+            return None
+        
+        # Convert to the model input dtype and add batch dimension
+        image = np.empty((1,) + frame.shape, dtype=self.input_details[0]['dtype'])
+        self._fill_input(image[0], frame)
+        
+        return image
+    
+    def _write_input(self, slot: InterpreterSlot, frames: List[np.ndarray]) -> None:
+        """Write frames straight into a checked-out interpreter's input buffer"""
+        with self.metrics.timer('normalize'):
+            input_view = slot.input_buffer()
             
-            # Preprocess image
-            processed_image = self.preprocess_image(image_path)
-            if processed_image is None:
-                return {
-                    'success': False,
-                    'error': 'Failed to preprocess image',
-                    'confidence': 0.0,
-                    'prediction': 'unknown'
-                }
+            for row, frame in enumerate(frames):
+                if frame.shape != input_view.shape[1:]:
+                    # Loaded for a model that was swapped out in the meantime
+                    frame = cv2.resize(frame, (input_view.shape[2], input_view.shape[1]))
+                self._fill_input(input_view[row], frame, slot.input_details[0])
             
-            # Run inference
-            self.interpreter.set_tensor(self.input_details[0]['index'], processed_image)
-            self.interpreter.invoke()
+            # invoke() refuses to run while views on the interpreter's buffers exist
+            del input_view
+    
+    def _invoke(self, slot: InterpreterSlot) -> None:
+        """Run a checked-out interpreter, recording the invoke latency"""
+        with self.metrics.timer('invoke'):
+            slot.invoke()
+        self.metrics.add_invocation()
+    
+    def _read_output(self, slot: InterpreterSlot) -> np.ndarray:
+        """Read a checked-out interpreter's output, dequantized to float scores"""
+        output_data = slot.get_output()
+        
+        if output_data.dtype != np.float32:
+            scale, zero_point = slot.output_details[0]['quantization']
+            output_data = (output_data.astype(np.float32) - zero_point) * scale
+        
+        return output_data
+    
+    def _read_embeddings(self, slot: InterpreterSlot) -> Optional[np.ndarray]:
+        """Read a checked-out interpreter's penultimate-layer activations when they are stored"""
+        if self.embedding_store is None or getattr(slot, 'embedding_detail', None) is None:
+            return None
+        return slot.get_embedding()
+    
+    def _record_embeddings(self, slot: InterpreterSlot, embeddings: Optional[np.ndarray],
+                           results: List[Dict[str, Any]]) -> None:
+        """Append the embeddings of successfully scored frames to the active model's store"""
+        store = self.embedding_store
+        # A slot of a swapped-out model must not write into the new model's store
+        if embeddings is None or store is None or store.directory.name != slot.model_hash[:12]:
+            return
+        
+        rows = [row for row, result in enumerate(results) if result.get('success', False)]
+        if not rows:
+            return
+        
+        try:
+            store.add(embeddings[rows], [results[row] for row in rows])
+        except Exception as e:
+            logger.error(f"Failed to store embeddings: {e}")
+    
+    def extract_embedding(self, image_path: str) -> Optional[np.ndarray]:
+        """Compute the penultimate-layer embedding of one image"""
+        frame = self.load_frame(image_path)
+        if frame is None:
+            return None
+        
+        with self.interpreter_pool.checkout(embeddings=True) as slot:
+            if getattr(slot, 'embedding_detail', None) is None:
+                raise ValueError("Embeddings are not enabled for the active model")
+            self._resize_input_batch(slot, 1)
+            self._write_input(slot, [frame])
+            self._invoke(slot)
+            return slot.get_embedding()[0]
+    
+    def find_similar(self, image_path: str, k: int = 10) -> Dict[str, Any]:
+        """Find the stored frames most similar to an image
+        
+        The image's stored embedding is used when it was scored before;
+        otherwise it is computed now.
+        """
+        store = self.embedding_store
+        if store is None:
+            return {'success': False, 'error': 'Embeddings not enabled'}
+        
+        try:
+            vector = store.get_vector(image_path)
+            if vector is None:
+                vector = self.extract_embedding(image_path)
+                if vector is None:
+                    return {'success': False, 'error': 'Failed to load image'}
             
-            # Get prediction
-            output_data = self.interpreter.get_tensor(self.output_details[0]['index'])
-            predictions = output_data[0]
+            return {
+                'success': True,
+                'image_path': image_path,
+                'results': store.search(vector, k, exclude=image_path)
+            }
+        except Exception as e:
+            logger.error(f"Similarity search failed for {image_path}: {e}")
+            return {'success': False, 'error': str(e)}
+    
+    def _resize_input_batch(self, slot: InterpreterSlot, batch_size: int) -> bool:
+        """Resize a checked-out interpreter's input to the given batch size"""
+        try:
+            slot.resize_input_batch(batch_size)
+            return True
+        except Exception as e:
+            logger.warning(f"Model does not support batch size {batch_size}, "
+                           f"falling back to single-image inference: {e}")
+            self.batch_resize_supported = False
             
+            # Restore a single-image input so detect_landslide keeps working
+            slot.resize_input_batch(1, force=True)
+            return False
+    
+    def _build_result(self, predictions: np.ndarray, image_path: str,
+                      slot: Optional[InterpreterSlot] = None) -> Dict[str, Any]:
+        """Build a detection result from the model output for one image
+        
+        slot is the interpreter that produced the output; its model hash and
+        version are recorded so results from different models can be told apart.
+        """
+        model_hash = slot.model_hash if slot else self.model_hash
+        model_version = slot.model_version if slot else self.model_version
+        
+        with self.metrics.timer('postprocess'):
             # Get class with highest confidence
             predicted_class_idx = np.argmax(predictions)
             confidence = float(predictions[predicted_class_idx])
@@ -206,77 +865,856 @@ class LandslideDetector:
                     for i in range(len(self.class_names))
                 },
                 'timestamp': datetime.now().isoformat(),
-                'image_path': image_path
+                'image_path': image_path,
+                'model_hash': model_hash,
+                'model_version': model_version
+            }
+        
+        self.metrics.add_images()
+        logger.info(f"Detection result: {predicted_class} (confidence: {confidence:.3f})")
+        
+        return result
+    
+    def detect_landslide(self, image_path: str, record: bool = True) -> Dict[str, Any]:
+        """Detect landslide in the given image
+        
+        The result is appended to the results store when one is configured,
+        unless record is False.
+        """
+        result = self._detect_gated(image_path)
+        if record and self.results_store:
+            self.results_store.add(result)
+        return result
+    
+    def _detect_gated(self, image_path: str) -> Dict[str, Any]:
+        """Detect landslide in one image, skipping inference for unchanged or near-duplicate scenes"""
+        if not self.interpreter:
+            logger.error("Model not loaded")
+            return {
+                'success': False,
+                'error': 'Model not loaded',
+                'confidence': 0.0,
+                'prediction': 'unknown'
             }
+        
+        # Decode and resize into this thread's scratch frame
+        frame = self.load_frame(image_path, dst=self._get_scratch_frame())
+        
+        if (self.frame_gate is None and self.duplicate_index is None) or frame is None:
+            return self._detect_frame(image_path, frame)
+        
+        thumbnail, difference, reason = None, None, None
+        if self.frame_gate is not None:
+            # Skip inference when the scene hasn't changed since the last scored frame
+            thumbnail = self.frame_gate.thumbnail(frame)
+            reference, difference, reason = self.frame_gate.check(thumbnail)
+            if reference is not None:
+                logger.debug(f"Skipping inference for {image_path}: {reason}")
+                return dict(
+                    reference,
+                    image_path=image_path,
+                    timestamp=datetime.now().isoformat(),
+                    skipped=True,
+                    skip_reason=reason,
+                    frame_difference=difference,
+                    reference_image=reference['image_path']
+                )
+        
+        hash_value = None
+        if self.duplicate_index is not None:
+            hash_value = compute_hash(frame, self.duplicate_hash_method, color_order='rgb')
+            # Flat and noisy frames all share a degenerate hash, which says
+            # nothing about whether two frames show the same scene
+            if is_degenerate_hash(hash_value):
+                hash_value = None
+        if hash_value is not None:
+            # The gate forcing a rescore of an unchanged scene overrides the index
+            forced = difference is not None and difference < self.frame_gate.threshold
+            match = None if forced else self._find_near_duplicate(hash_value)
+            if match is not None:
+                reference_image, distance, reference = match
+                reason = f'near duplicate of {reference_image} (hash distance {distance})'
+                logger.debug(f"Skipping inference for {image_path}: {reason}")
+                return dict(
+                    reference,
+                    image_path=image_path,
+                    timestamp=datetime.now().isoformat(),
+                    skipped=True,
+                    skip_reason=reason,
+                    frame_difference=difference,
+                    hash_distance=distance,
+                    reference_image=reference_image
+                )
+        
+        result = self._detect_frame(image_path, frame)
+        if result.get('success'):
+            if self.frame_gate is not None:
+                self.frame_gate.update(thumbnail, result)
+            if hash_value is not None:
+                self.duplicate_index.add(image_path, hash_value, result)
+            result['skipped'] = False
+            result['skip_reason'] = reason
+            result['frame_difference'] = difference
+        return result
+    
+    def _find_near_duplicate(self, hash_value: int) -> Optional[Tuple[str, int, Dict[str, Any]]]:
+        """Find the closest recently scored frame within the Hamming distance
+        
+        References scored more than near_duplicate_max_age_hours ago are not
+        reused, so a run of near-identical frames is still rescored regularly.
+        """
+        now = datetime.now()
+        for reference_image, distance, reference in self.duplicate_index.query(hash_value):
+            age = (now - datetime.fromisoformat(reference['timestamp'])).total_seconds()
+            if age <= self.duplicate_max_age:
+                return reference_image, distance, reference
+        return None
+    
+    def _run_cascade(self, image_paths: List[str],
+                     frames: List[np.ndarray]) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, float]]:
+        """Score frames with the fast first-stage model
+        
+        Returns the results the first stage decides on its own, and the
+        first-stage landslide probability of each frame to escalate, both
+        keyed by position in frames. Frames are escalated when that
+        probability is inside the uncertainty band or reaches the threshold.
+        """
+        landslide_index = self.class_names.index('landslide')
+        low, high = self.cascade_band
+        
+        with self.cascade_pool.checkout() as slot:
+            try:
+                slot.resize_input_batch(len(frames))
+                batches = [frames]
+            except Exception:
+                slot.resize_input_batch(1, force=True)
+                batches = [[frame] for frame in frames]
             
-            logger.info(f"Detection result: {predicted_class} (confidence: {confidence:.3f})")
+            outputs = []
+            for batch in batches:
+                self._write_input(slot, batch)
+                self._invoke(slot)
+                outputs.extend(self._read_output(slot)[:len(batch)])
+        
+        decided: Dict[int, Dict[str, Any]] = {}
+        escalated: Dict[int, float] = {}
+        for row, output in enumerate(outputs):
+            probability = float(output[landslide_index])
+            if low <= probability <= high or probability >= self.confidence_threshold:
+                escalated[row] = probability
+            else:
+                decided[row] = dict(self._build_result(output, image_paths[row], slot), decision_stage='fast')
+        
+        with self._cascade_lock:
+            self.cascade_counts['fast'] += len(decided)
+            self.cascade_counts['full'] += len(escalated)
+        
+        return decided, escalated
+    
+    def _detect_frame(self, image_path: str, frame: Optional[np.ndarray],
+                      cascade: bool = True) -> Dict[str, Any]:
+        """Run single-image inference on an already loaded frame
+        
+        With a cascade configured the fast model scores the frame first, and
+        the main model only runs when the frame is escalated.
+        """
+        try:
+            if frame is None:
+                return {
+                    'success': False,
+                    'image_path': image_path,
+                    'error': 'Failed to preprocess image',
+                    'confidence': 0.0,
+                    'prediction': 'unknown'
+                }
+            
+            cascade = cascade and self.cascade_pool is not None
+            if cascade:
+                decided, escalated = self._run_cascade([image_path], [frame])
+                if decided:
+                    return decided[0]
+            
+            # Run inference on a single-image input
+            with self.interpreter_pool.checkout(embeddings=self.embedding_store is not None) as slot:
+                self._resize_input_batch(slot, 1)
+                self._write_input(slot, [frame])
+                self._invoke(slot)
+                
+                # Get prediction
+                output_data = self._read_output(slot)
+                embeddings = self._read_embeddings(slot)
             
+            result = self._build_result(output_data[0], image_path, slot)
+            if cascade:
+                result.update(decision_stage='full', stage_one_probability=escalated[0])
+            self._record_embeddings(slot, embeddings, [result])
             return result
             
         except Exception as e:
             logger.error(f"Failed to detect landslide: {e}")
             return {
                 'success': False,
+                'image_path': image_path,
                 'error': str(e),
                 'confidence': 0.0,
                 'prediction': 'unknown'
             }
     
-    def batch_detect(self, image_paths: List[str]) -> List[Dict[str, Any]]:
-        """Detect landslides in multiple images"""
-        results = []
+    @staticmethod
+    def _tile_starts(length: int, tile: int, stride: int) -> np.ndarray:
+        """Tile start offsets along one axis, with a last tile flush to the edge"""
+        starts = np.arange(0, length - tile + 1, stride)
+        if starts[-1] + tile < length:
+            starts = np.append(starts, length - tile)
+        return starts
+    
+    def _score_tiles(self, tiles: np.ndarray, ys: np.ndarray, xs: np.ndarray,
+                     batch_size: int) -> np.ndarray:
+        """Score tiles at the given offsets of a window view, returning landslide probabilities"""
+        landslide_index = self.class_names.index('landslide')
+        probabilities = np.empty(len(ys), dtype=np.float32)
+        
+        start = 0
+        while start < len(ys):
+            # Fancy indexing copies just this batch out of the window view
+            batch = tiles[ys[start:start + batch_size], xs[start:start + batch_size]]
+            frames = list(batch.transpose(0, 2, 3, 1))
+            
+            with self.interpreter_pool.checkout() as slot:
+                if not self._resize_input_batch(slot, len(frames)):
+                    if len(frames) == 1:
+                        raise RuntimeError('Model input could not be resized to a single tile')
+                    # Model can't be resized, score the remaining tiles one by one
+                    batch_size = 1
+                    continue
+                self._write_input(slot, frames)
+                self._invoke(slot)
+                output_data = self._read_output(slot)
+            
+            probabilities[start:start + len(frames)] = output_data[:len(frames), landslide_index]
+            start += len(frames)
+        
+        return probabilities
+    
+    def detect_landslide_tiled(self, image_path: str,
+                               tile_size: Optional[int] = None,
+                               overlap: Optional[float] = None,
+                               batch_size: Optional[int] = None,
+                               return_heatmap: bool = False) -> Dict[str, Any]:
+        """Detect landslides on overlapping tiles of the full-resolution frame
+        
+        Returns the usual whole-frame result with a 'tiles' entry holding the
+        per-tile landslide probability grid. tile_size is in source pixels and
+        overlap is the fraction shared by neighbouring tiles. When
+        return_heatmap is set, 'heatmap' holds nested lists of the mean tile
+        probability per pixel, scaled from the source by 'heatmap_scale'
+        (x, y).
+        """
+        if not self.interpreter:
+            logger.error("Model not loaded")
+            return {
+                'success': False,
+                'error': 'Model not loaded',
+                'confidence': 0.0,
+                'prediction': 'unknown'
+            }
+        
+        tile_size = int(tile_size or self.tile_size)
+        overlap = self.tile_overlap if overlap is None else float(overlap)
+        if not 0 <= overlap < 1:
+            return {
+                'success': False,
+                'error': f'Tile overlap must be in [0, 1), got {overlap}',
+                'confidence': 0.0,
+                'prediction': 'unknown'
+            }
+        batch_size = max(1, int(batch_size or self.tile_batch_size))
+        if not self.batch_resize_supported:
+            batch_size = 1
+        
+        try:
+            # Tiles need the full-resolution decode
+            image = cv2.imread(image_path)
+            if image is None:
+                logger.error(f"Failed to load image: {image_path}")
+                return {
+                    'success': False,
+                    'error': 'Failed to preprocess image',
+                    'confidence': 0.0,
+                    'prediction': 'unknown'
+                }
+            image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            height, width = image.shape[:2]
+            
+            input_shape = self.input_details[0]['shape']
+            target_height, target_width = int(input_shape[1]), int(input_shape[2])
+            
+            # Whole-frame result from the same decode
+            result = self._detect_frame(image_path, cv2.resize(image, (target_width, target_height)))
+            if not result.get('success', False):
+                return result
+            
+            # Scale the frame once so every tile lands exactly on the model input size
+            tile_size = min(tile_size, height, width)
+            scale_x = target_width / tile_size
+            scale_y = target_height / tile_size
+            scaled = cv2.resize(image, (max(target_width, round(width * scale_x)),
+                                        max(target_height, round(height * scale_y))))
+            stride = tile_size * (1.0 - overlap)
+            
+            row_starts = self._tile_starts(scaled.shape[0], target_height, max(1, round(stride * scale_y)))
+            col_starts = self._tile_starts(scaled.shape[1], target_width, max(1, round(stride * scale_x)))
+            grid_ys, grid_xs = np.meshgrid(row_starts, col_starts, indexing='ij')
+            
+            # Window view over every tile position, no pixels are copied here
+            tiles = np.lib.stride_tricks.sliding_window_view(
+                scaled, (target_height, target_width), axis=(0, 1)
+            )
+            probabilities = self._score_tiles(tiles, grid_ys.ravel(), grid_xs.ravel(), batch_size)
+            grid = probabilities.reshape(grid_ys.shape)
+            
+            hotspot_row, hotspot_col = np.unravel_index(np.argmax(grid), grid.shape)
+            result['tiles'] = {
+                'tile_size': tile_size,
+                'overlap': overlap,
+                'grid_shape': list(grid.shape),
+                'probabilities': grid.round(4).tolist(),
+                'max_probability': float(grid.max()),
+                'landslide_tiles': int((grid >= self.confidence_threshold).sum()),
+                'landslide_detected': bool(grid.max() >= self.confidence_threshold),
+                'hotspot': {
+                    'x': int(round(col_starts[hotspot_col] / scale_x)),
+                    'y': int(round(row_starts[hotspot_row] / scale_y)),
+                    'size': tile_size
+                }
+            }
+            
+            if return_heatmap:
+                # Tile coverage is separable: per-axis membership matrices turn
+                # the sum of overlapping tile probabilities into two matmuls
+                rows = np.arange(scaled.shape[0])[:, np.newaxis]
+                cols = np.arange(scaled.shape[1])[:, np.newaxis]
+                row_cover = ((rows >= row_starts) & (rows < row_starts + target_height)).astype(np.float32)
+                col_cover = ((cols >= col_starts) & (cols < col_starts + target_width)).astype(np.float32)
+                heat_sum = row_cover @ grid @ col_cover.T
+                heat_count = np.outer(row_cover.sum(axis=1), col_cover.sum(axis=1))
+                heatmap = heat_sum / np.maximum(heat_count, 1)
+                result['heatmap'] = heatmap.round(4).tolist()
+                result['heatmap_scale'] = [scale_x, scale_y]
+            
+            return result
+            
+        except Exception as e:
+            logger.error(f"Failed to run tiled detection: {e}")
+            return {
+                'success': False,
+                'error': str(e),
+                'confidence': 0.0,
+                'prediction': 'unknown'
+            }
+    
+    def _iter_frames(self, image_paths: Iterable[Any],
+                     loader: Optional[Callable[[Any], Any]] = None) -> Iterator[Any]:
+        """Yield loaded frames in input order, decoding ahead on worker threads
+        
+        At most prefetch_depth images are decoded or waiting to be consumed at
+        any time, so memory stays bounded while decode overlaps inference.
+        image_paths may be a lazy iterator; loader replaces load_frame for
+        other kinds of input.
+        """
+        loader = loader or self.load_frame
+        
+        if self.decode_threads <= 0:
+            for image_path in image_paths:
+                yield loader(image_path)
+            return
+        
+        paths = iter(image_paths)
+        pending: deque = deque()
+        
+        with ThreadPoolExecutor(max_workers=self.decode_threads,
+                                thread_name_prefix='landslide-decode') as executor:
+            for image_path in islice(paths, self.prefetch_depth):
+                pending.append(executor.submit(loader, image_path))
+            
+            while pending:
+                frame = pending.popleft().result()
+                
+                # Refill the queue before handing the frame to the consumer
+                image_path = next(paths, None)
+                if image_path is not None:
+                    pending.append(executor.submit(loader, image_path))
+                
+                yield frame
+    
+    def _cache_settings(self) -> Dict[str, Any]:
+        """Settings besides the model file that change detection results"""
+        settings = {
+            'confidence_threshold': self.confidence_threshold,
+            'class_names': self.class_names,
+            'fast_decode': self.fast_decode
+        }
+        if self.fast_decode and self.max_decode_scale < max(REDUCED_DECODE_FLAGS):
+            settings['max_decode_scale'] = self.max_decode_scale
+        if self.roi:
+            settings['roi'] = self.roi.to_config()
+        if self.interpreter_pool and self.interpreter_pool.backend not in TFLITE_BACKENDS:
+            settings['inference_backend'] = self.interpreter_pool.backend
+        if self.cascade_pool:
+            settings['cascade'] = {
+                'model_hash': self.cascade_pool.model_hash,
+                'uncertainty_band': list(self.cascade_band)
+            }
+        return settings
+    
+    def _score_cached(self, image_paths: List[str],
+                      score_fn: Callable[[List[str]], List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+        """Score images through the result cache, running score_fn only on misses
+        
+        Cache hits never reach the model, so no embeddings are extracted for
+        them: an image has an embedding only if the embedding store was
+        enabled when it was first scored.
+        """
+        model_hash = self.model_hash
+        if not self.result_cache or not model_hash:
+            return score_fn(image_paths)
+        
+        model_key = DetectionCache.make_model_key(model_hash, self._cache_settings())
+        # Frames the cascade's fast stage decided carry its model hash,
+        # which the key already covers through the cascade settings
+        key_hashes = {model_hash}
+        if self.cascade_pool:
+            key_hashes.add(self.cascade_pool.model_hash)
         
+        image_hashes: List[Optional[str]] = []
         for image_path in image_paths:
-            result = self.detect_landslide(image_path)
-            results.append(result)
+            try:
+                image_hashes.append(hash_file(image_path))
+            except OSError:
+                image_hashes.append(None)
+        
+        cached = self.result_cache.get_many([h for h in image_hashes if h], model_key)
+        
+        # Only new or changed images reach the model
+        miss_positions = [i for i, image_hash in enumerate(image_hashes) if image_hash not in cached]
+        miss_results = score_fn([image_paths[i] for i in miss_positions]) if miss_positions else []
+        
+        results: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+        new_entries = {}
+        
+        for i, result in zip(miss_positions, miss_results):
+            results[i] = result
+            # A model swap mid-call leaves some results from the new model
+            if result.get('success', False) and image_hashes[i] and result.get('model_hash') in key_hashes:
+                new_entries[image_hashes[i]] = result
+        
+        for i, image_hash in enumerate(image_hashes):
+            if results[i] is None:
+                results[i] = dict(cached[image_hash], image_path=image_paths[i], cached=True)
+        
+        self.result_cache.put_many(new_entries, model_key)
         
         return results
     
-    def analyze_time_series(self, image_directory: str) -> Dict[str, Any]:
-        """Analyze a time series of images for landslide progression"""
+    def batch_detect(self, image_paths: List[str],
+                     batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Detect landslides in multiple images using batched inference"""
+        return self._score_cached(image_paths, lambda paths: self._batch_detect(paths, batch_size))
+    
+    def detect_stream(self, images: Iterable[Tuple[str, bytes]],
+                      batch_size: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """Score encoded images from (name, bytes) pairs, yielding results in order
+        
+        The pairs are pulled lazily and only prefetch_depth of them are held
+        at a time, so memory stays constant however long the stream is.
+        Results are labelled with the names instead of file paths.
+        """
+        if not self.interpreter:
+            logger.error("Model not loaded")
+            return
+        
+        batch_size = max(1, int(batch_size or self.batch_size))
+        loaded = self._iter_frames(images, lambda image: (image[0], self.load_frame(image[0], image_data=image[1])))
+        
+        chunk_names: List[str] = []
+        chunk_frames: List[Optional[np.ndarray]] = []
+        
+        for name, frame in loaded:
+            chunk_names.append(name)
+            chunk_frames.append(frame)
+            
+            if len(chunk_names) == batch_size:
+                yield from self._detect_chunk(chunk_names, chunk_frames)
+                chunk_names, chunk_frames = [], []
+        
+        if chunk_names:
+            yield from self._detect_chunk(chunk_names, chunk_frames)
+    
+    def _batch_detect(self, image_paths: List[str],
+                      batch_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Run batched inference over images without consulting the result cache"""
+        if not self.interpreter:
+            return [self.detect_landslide(image_path, record=False) for image_path in image_paths]
+        
+        batch_size = max(1, int(batch_size or self.batch_size))
+        frames = self._iter_frames(image_paths)
+        
+        # Fall back to one invoke per image when batching is not possible
+        if batch_size == 1 or not self.batch_resize_supported:
+            return [self._detect_frame(image_path, frame)
+                    for image_path, frame in zip(image_paths, frames)]
+        
+        results = []
+        chunk_paths: List[str] = []
+        chunk_frames: List[Optional[np.ndarray]] = []
+        
+        for image_path, frame in zip(image_paths, frames):
+            chunk_paths.append(image_path)
+            chunk_frames.append(frame)
+            
+            if len(chunk_paths) == batch_size:
+                results.extend(self._detect_chunk(chunk_paths, chunk_frames))
+                chunk_paths, chunk_frames = [], []
+        
+        if chunk_paths:
+            results.extend(self._detect_chunk(chunk_paths, chunk_frames))
+        
+        return results
+    
+    def _detect_chunk(self, image_paths: List[str],
+                      frames: List[Optional[np.ndarray]]) -> List[Dict[str, Any]]:
+        """Run a single batched invoke over a chunk of loaded frames"""
+        results: List[Optional[Dict[str, Any]]] = [None] * len(image_paths)
+        valid_frames = []
+        positions = []
+        
+        for i, frame in enumerate(frames):
+            if frame is None:
+                results[i] = {
+                    'success': False,
+                    'image_path': image_paths[i],
+                    'error': 'Failed to preprocess image',
+                    'confidence': 0.0,
+                    'prediction': 'unknown'
+                }
+            else:
+                valid_frames.append(frame)
+                positions.append(i)
+        
+        if not valid_frames:
+            return results
+        
         try:
-            image_dir = Path(image_directory)
-            if not image_dir.exists():
-                return {'error': 'Image directory not found'}
+            escalated: Dict[int, float] = {}
+            if self.cascade_pool:
+                # The fast model settles the obvious frames; only the rest reach the main model
+                decided, stage_one = self._run_cascade([image_paths[i] for i in positions], valid_frames)
+                for row, result in decided.items():
+                    results[positions[row]] = result
+                
+                escalated = {positions[row]: probability for row, probability in stage_one.items()}
+                positions = list(escalated)
+                valid_frames = [frames[i] for i in positions]
+                if not valid_frames:
+                    return results
             
-            # Get all image files sorted by name (assuming timestamp in filename)
-            image_files = sorted([
-                f for f in image_dir.glob('*.jpg') 
-                if f.is_file()
-            ])
+            with self.interpreter_pool.checkout(embeddings=self.embedding_store is not None) as slot:
+                resized = self._resize_input_batch(slot, len(valid_frames))
+                if resized:
+                    # Fill the batch in place and run one inference over it
+                    self._write_input(slot, valid_frames)
+                    self._invoke(slot)
+                    output_data = self._read_output(slot)
+                    embeddings = self._read_embeddings(slot)
             
-            if not image_files:
-                return {'error': 'No image files found'}
+            for row, i in enumerate(positions):
+                if resized:
+                    results[i] = self._build_result(output_data[row], image_paths[i], slot)
+                else:
+                    # Model can't be resized, score the remaining images one by one
+                    results[i] = self._detect_frame(image_paths[i], frames[i], cascade=False)
+                
+                if i in escalated and results[i].get('success', False):
+                    results[i].update(decision_stage='full', stage_one_probability=escalated[i])
+            
+            if resized:
+                self._record_embeddings(slot, embeddings, [results[i] for i in positions])
             
-            # Analyze each image
+        except Exception as e:
+            logger.error(f"Failed to run batched detection: {e}")
+            for i in positions:
+                results[i] = {
+                    'success': False,
+                    'image_path': image_paths[i],
+                    'error': str(e),
+                    'confidence': 0.0,
+                    'prediction': 'unknown'
+                }
+        
+        return results
+    
+    def _score_files_parallel(self, image_paths: List[str], workers: int) -> List[Dict[str, Any]]:
+        """Score images across worker processes, returning results in input order"""
+        workers = min(workers, len(image_paths))
+        
+        # Each worker holds a single interpreter; split the cores between workers.
+        # Cache lookups already happened in this process, and the embedding
+        # store has a single writer, so workers don't extract embeddings.
+        # Workers only see their own shard, so the frame gate and near-duplicate
+        # index would compare against the wrong history, and anything worth
+        # recording is recorded here once the shards are merged. Workers don't
+        # publish metrics over this process's snapshot either.
+        worker_config = dict(self.config, interpreter_pool_size=1, analysis_workers=1,
+                             cache_enabled=False, inference_backend=self.interpreter_pool.backend,
+                             model_path=self.model_path, model_version=self.model_version,
+                             embeddings_enabled=False, auto_tune_enabled=False,
+                             results_store_enabled=False, frame_gate_enabled=False,
+                             near_duplicate_enabled=False, metrics_path=None,
+                             batch_size=self.batch_size, max_decode_scale=self.max_decode_scale)
+        if self.cascade_pool:
+            worker_config['cascade_inference_backend'] = self.cascade_pool.backend
+        else:
+            worker_config.pop('cascade_model_path', None)
+        if not worker_config.get('num_threads'):
+            worker_config['num_threads'] = max(1, (os.cpu_count() or 1) // workers)
+        
+        # Contiguous shards keep each worker's batches in timestamp order, and
+        # several shards per worker even out slow or failing files
+        shard_size = max(self.batch_size, math.ceil(len(image_paths) / (workers * 4)))
+        shards = [image_paths[i:i + shard_size] for i in range(0, len(image_paths), shard_size)]
+        
+        context = multiprocessing.get_context(self.analysis_start_method)
+        with context.Pool(processes=workers, initializer=_init_analysis_worker,
+                          initargs=(worker_config,)) as pool:
+            # imap yields shard results in submission order
             results = []
-            landslide_detections = []
+            for shard_results in pool.imap(_score_analysis_shard, shards):
+                results.extend(shard_results)
+        
+        return results
+    
+    def _score_time_series(self, image_paths: List[str], workers: Optional[int]) -> List[Dict[str, Any]]:
+        """Score time series images, in worker processes when configured"""
+        workers = min(max(1, int(workers or self.analysis_workers)), len(image_paths))
+        
+        if workers > 1:
+            return self._score_cached(
+                image_paths, lambda paths: self._score_files_parallel(paths, workers)
+            )
+        
+        return self.batch_detect(image_paths)
+    
+    def _analysis_state_path(self, image_dir: Path) -> Path:
+        """Get the file holding the incremental analysis watermark for a directory"""
+        if self.analysis_state_path:
+            return Path(self.analysis_state_path)
+        return image_dir / '.landslide_analysis_state.json'
+    
+    def _new_analysis_state(self, mode: str = 'classification') -> Dict[str, Any]:
+        """Create empty running aggregates for a time series analysis"""
+        model_key = None
+        if self.model_hash:
+            model_key = DetectionCache.make_model_key(
+                self.model_hash, dict(self._cache_settings(), time_series_mode=mode)
+            )
+        
+        return {
+            'model_key': model_key,
+            'watermark': None,
+            'retry': {},
+            'total_images': 0,
+            'successful_analyses': 0,
+            'detections': [],
+            'frames_compared': 0,
+            'max_displacement_px': 0.0,
+            'displacement_events': [],
+            'displacement_reference': None
+        }
+    
+    def _load_analysis_state(self, image_dir: Path, mode: str = 'classification') -> Dict[str, Any]:
+        """Load the persisted watermark and aggregates, resetting them if the model changed"""
+        state = self._new_analysis_state(mode)
+        state_path = self._analysis_state_path(image_dir)
+        
+        if not state_path.exists():
+            return state
+        
+        try:
+            with open(state_path, 'r') as f:
+                saved_state = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable analysis state {state_path}: {e}")
+            return state
+        
+        if saved_state.get('model_key') != state['model_key']:
+            logger.info("Model or detection settings changed, restarting incremental analysis")
+            return state
+        
+        state.update(saved_state)
+        return state
+    
+    def _save_analysis_state(self, image_dir: Path, state: Dict[str, Any]) -> None:
+        """Persist the watermark and aggregates atomically"""
+        state_path = self._analysis_state_path(image_dir)
+        temp_path = state_path.with_name(state_path.name + '.tmp')
+        
+        with open(temp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(temp_path, state_path)
+    
+    def _get_displacement_detector(self) -> SlopeDisplacementDetector:
+        """Get the optical flow engine, creating it on first use"""
+        if self.displacement_detector is None:
+            self.displacement_detector = SlopeDisplacementDetector(self.config)
+        return self.displacement_detector
+    
+    def _track_displacement(self, image_dir: Path, image_paths: List[str],
+                            watermark: Optional[str], state: Dict[str, Any]) -> None:
+        """Measure displacement across new frames and fold it into the aggregates"""
+        engine = self._get_displacement_detector()
+        
+        # Continue from the last analyzed frame, re-reading it after a restart.
+        # If it can't be read, fall back to the last frame that was a reference.
+        previous = str(image_dir / watermark) if watermark else None
+        fallback = state.get('displacement_reference')
+        fallback = str(image_dir / fallback) if fallback else None
+        if previous is None:
+            engine.reset()
+        elif engine.reference_image != previous and not engine.prime(previous):
+            if fallback and fallback != previous and (engine.reference_image == fallback or engine.prime(fallback)):
+                logger.warning(f"Could not read {previous}, measuring displacement against {fallback}")
+            else:
+                logger.warning(f"Could not read {previous}, {Path(image_paths[0]).name} will not be compared")
+                engine.reset()
+        
+        for result in engine.analyze_sequence(image_paths):
+            if not result.get('success'):
+                logger.warning(f"Displacement not measured for {result['image_path']}: {result.get('error')}")
+                continue
+            if result.get('reference_image') is None:
+                continue
+            
+            state['frames_compared'] += 1
+            state['max_displacement_px'] = max(state['max_displacement_px'], result['max_displacement_px'])
+            if result['displacement_detected']:
+                state['displacement_events'].append({
+                    'timestamp': result['timestamp'],
+                    'image_path': result['image_path'],
+                    'reference_image': result['reference_image'],
+                    'max_displacement_px': result['max_displacement_px'],
+                    'moving_regions': [
+                        {key: region[key] for key in ('row', 'col', 'p95_px', 'dx_px', 'dy_px')}
+                        for region in result['regions'] if region['moving']
+                    ]
+                })
+        
+        if engine.reference_image:
+            state['displacement_reference'] = Path(engine.reference_image).name
+    
+    def analyze_time_series(self, image_directory: str,
+                            workers: Optional[int] = None,
+                            incremental: Optional[bool] = None,
+                            mode: Optional[str] = None) -> Dict[str, Any]:
+        """Analyze a time series of images for landslide progression
+        
+        In incremental mode only files named after the persisted watermark are
+        scored, and their results are folded into the saved running aggregates.
+        Files that fail to score (e.g. a capture still being written) are kept
+        in the state and rescored on the next analysis_max_retries runs.
+        mode selects the signals: 'classification' (per-image CNN), 'displacement'
+        (optical flow between consecutive frames) or 'combined'.
+        """
+        if incremental is None:
+            incremental = self.incremental_analysis
+        mode = mode or self.time_series_mode
+        if mode not in ('classification', 'displacement', 'combined'):
+            return {'error': f'Unknown time series mode: {mode}'}
+        
+        try:
+            image_dir = Path(image_directory)
+            if not image_dir.exists():
+                return {'error': 'Image directory not found'}
             
-            for image_file in image_files:
-                result = self.detect_landslide(str(image_file))
-                results.append(result)
+            with self._analysis_lock if incremental else nullcontext():
+                state = self._load_analysis_state(image_dir, mode) if incremental else self._new_analysis_state(mode)
+                watermark = state['watermark']
                 
-                if result.get('landslide_detected', False):
-                    landslide_detections.append({
-                        'timestamp': result['timestamp'],
-                        'confidence': result['confidence'],
-                        'image_path': str(image_file)
-                    })
+                # Get image files sorted by name (assuming timestamp in filename)
+                image_files = sorted([
+                    f for f in image_dir.glob('*.jpg') 
+                    if f.is_file() and (watermark is None or f.name > watermark)
+                ])
+                
+                if not image_files and state['total_images'] == 0:
+                    return {'error': 'No image files found'}
+                
+                # Earlier files that failed to score, still behind the watermark
+                retry = {name: attempts for name, attempts in state['retry'].items() if (image_dir / name).is_file()}
+                
+                if image_files or (retry and mode != 'displacement'):
+                    image_paths = [str(f) for f in image_files]
+                    
+                    if mode != 'displacement':
+                        # Analyze each new image, plus the ones to retry
+                        retry_paths = [str(image_dir / name) for name in sorted(retry)]
+                        results = self._score_time_series(retry_paths + image_paths, workers)
+                        
+                        for image_path, result in zip(retry_paths + image_paths, results):
+                            name = Path(image_path).name
+                            if not result.get('success', False):
+                                retry[name] = retry.get(name, 0) + 1
+                                if retry[name] > self.analysis_max_retries:
+                                    logger.warning(f"Giving up on {image_path} after {retry.pop(name)} failed attempts")
+                                continue
+                            
+                            retry.pop(name, None)
+                            state['successful_analyses'] += 1
+                            if result.get('landslide_detected', False):
+                                state['detections'].append({
+                                    'timestamp': result['timestamp'],
+                                    'confidence': result['confidence'],
+                                    'image_path': image_path
+                                })
+                    
+                    if mode != 'classification' and image_paths:
+                        self._track_displacement(image_dir, image_paths, watermark, state)
+                    
+                    state['total_images'] += len(image_paths)
+                    if image_files:
+                        state['watermark'] = image_files[-1].name
+                    state['retry'] = retry
+                    
+                    if incremental:
+                        self._save_analysis_state(image_dir, state)
             
             # Calculate statistics
-            total_images = len(results)
-            successful_analyses = sum(1 for r in results if r.get('success', False))
+            total_images = state['total_images']
+            landslide_detections = state['detections']
             landslide_count = len(landslide_detections)
             
             analysis = {
                 'total_images': total_images,
-                'successful_analyses': successful_analyses,
+                'successful_analyses': state['successful_analyses'],
                 'landslide_detections': landslide_count,
                 'detection_rate': landslide_count / total_images if total_images > 0 else 0,
                 'detections': landslide_detections,
                 'analysis_timestamp': datetime.now().isoformat()
             }
             
+            if incremental:
+                analysis['new_images'] = len(image_files)
+                analysis['watermark'] = state['watermark']
+                analysis['pending_retries'] = len(state['retry'])
+            
+            if mode != 'classification':
+                analysis['displacement'] = {
+                    'frames_compared': state['frames_compared'],
+                    'max_displacement_px': state['max_displacement_px'],
+                    'events': len(state['displacement_events']),
+                    'displacement_events': state['displacement_events']
+                }
+                analysis['displacement_detected'] = bool(state['displacement_events'])
+            
             # Check for landslide progression
             if landslide_count > 0:
                 analysis['first_detection'] = landslide_detections[0]
@@ -289,6 +1727,54 @@ class LandslideDetector:
             logger.error(f"Failed to analyze time series: {e}")
             return {'error': str(e)}
     
+    def get_model_memory(self) -> Optional[Dict[str, Any]]:
+        """Report how much of this process's memory the model accounts for
+        
+        file_* figures cover the memory-mapped model file; shared pages are
+        page cache reused by other processes mapping the same file, and pss
+        is this process's proportional share. interpreter_private_mb is the
+        anonymous memory the interpreter pool added when it was created.
+        """
+        mapping = read_file_mapping_kb(str(Path(self.model_path).resolve()))
+        if mapping is None:
+            return None
+        
+        to_mb = lambda kb: round(kb / 1024, 2)
+        return {
+            'file_mappings': mapping['mappings'],
+            'file_rss_mb': to_mb(mapping['Rss']),
+            'file_pss_mb': to_mb(mapping['Pss']),
+            'file_shared_mb': to_mb(mapping['Shared_Clean'] + mapping['Shared_Dirty']),
+            'file_private_mb': to_mb(mapping['Private_Clean'] + mapping['Private_Dirty']),
+            'interpreter_private_mb': (to_mb(self._interpreter_private_kb)
+                                       if self._interpreter_private_kb is not None else None)
+        }
+    
+    def get_metrics(self) -> Dict[str, Any]:
+        """Get inference throughput and per-stage latency percentiles since start"""
+        return self.metrics.summary()
+    
+    def get_cascade_info(self) -> Optional[Dict[str, Any]]:
+        """Get the cascade first stage and how many frames each stage decided"""
+        if not self.cascade_pool:
+            return None
+        
+        with self._cascade_lock:
+            decided_fast, escalated = self.cascade_counts['fast'], self.cascade_counts['full']
+        total = decided_fast + escalated
+        
+        return {
+            'model_path': self.cascade_pool.model_path,
+            'model_hash': self.cascade_pool.model_hash,
+            'model_version': self.cascade_pool.model_version,
+            'inference_backend': self.cascade_pool.backend,
+            'backend_selection': self.cascade_backend_selection,
+            'uncertainty_band': list(self.cascade_band),
+            'decided_fast': decided_fast,
+            'escalated': escalated,
+            'escalation_rate': escalated / total if total else 0
+        }
+    
     def get_model_info(self) -> Dict[str, Any]:
         """Get information about the loaded model"""
         if not self.interpreter:
@@ -296,13 +1782,49 @@ class LandslideDetector:
         
         return {
             'model_path': self.model_path,
+            'runtime': self.interpreter_pool.slots[0].runtime,
+            'inference_backend': self.interpreter_pool.backend,
+            'backend_selection': self.backend_selection,
+            'tuning': self.tuning,
             'input_shape': self.input_details[0]['shape'].tolist(),
             'output_shape': self.output_details[0]['shape'].tolist(),
+            'input_dtype': np.dtype(self.input_details[0]['dtype']).name,
+            'input_quantization': list(self.input_details[0]['quantization']),
             'class_names': self.class_names,
             'confidence_threshold': self.confidence_threshold,
+            'batch_size': self.batch_size,
+            'fast_decode': self.fast_decode,
+            'max_decode_scale': self.max_decode_scale,
+            'interpreter_pool_size': self.pool_size,
+            'num_threads': self.num_threads,
+            'use_xnnpack': self.use_xnnpack,
+            'model_hash': self.model_hash,
+            'model_version': self.model_version,
+            'swap_status': self.swap_status,
+            'cascade': self.get_cascade_info(),
+            'result_cache': self.result_cache.get_stats() if self.result_cache else None,
+            'results_store': self.results_store.get_stats() if self.results_store else None,
+            'frame_gate': self.frame_gate.get_stats() if self.frame_gate else None,
+            'near_duplicates': self.duplicate_index.get_stats() if self.duplicate_index else None,
+            'embeddings': self.embedding_store.get_stats() if self.embedding_store else None,
+            'roi': self.roi.to_config() if self.roi else None,
+            'model_memory': self.get_model_memory(),
+            'performance': self.get_metrics(),
             'model_size_mb': Path(self.model_path).stat().st_size / (1024 * 1024)
         }
 
+# Detector owned by each analyze_time_series worker process
+_analysis_worker_detector: Optional[LandslideDetector] = None
+
+def _init_analysis_worker(config: Dict[str, Any]) -> None:
+    """Load the model once per worker process"""
+    global _analysis_worker_detector
+    _analysis_worker_detector = LandslideDetector(config)
+
+def _score_analysis_shard(image_paths: List[str]) -> List[Dict[str, Any]]:
+    """Score one shard of a time series inside a worker process"""
+    return _analysis_worker_detector._batch_detect(image_paths)
+
 class LandslideAlertSystem:
     """Alert system for landslide detection"""
     
@@ -313,8 +1835,8 @@ class LandslideAlertSystem:
         self.notification_config = config.get('notifications', {})
     
     def check_image(self, image_path: str) -> Dict[str, Any]:
-        """Check a single image and trigger alerts if needed"""
-        result = self.detector.detect_landslide(image_path)
+        """Check a single image, trigger alerts if needed and record the outcome"""
+        result = self.detector.detect_landslide(image_path, record=False)
         
         if (result.get('landslide_detected', False) and 
             result.get('confidence', 0) >= self.alert_threshold):
@@ -326,6 +1848,9 @@ class LandslideAlertSystem:
         else:
             result['alert_triggered'] = False
         
+        if self.detector.results_store:
+            self.detector.results_store.add(result)
+        
         return result
     
     def trigger_alert(self, detection_result: Dict[str, Any]) -> Dict[str, Any]:
@@ -402,7 +1927,53 @@ if __name__ == "__main__":
     config = {
         'detector': {
             'model_path': 'models/landslide_detector.tflite',
-            'confidence_threshold': 0.7
+            'models_directory': 'models',
+            'model_version': 'v1',
+            'cascade_model_path': None,
+            'cascade_uncertainty_band': [0.2, 0.8],
+            'confidence_threshold': 0.7,
+            'batch_size': 8,
+            'interpreter_pool_size': 2,
+            'num_threads': 2,
+            'use_xnnpack': True,
+            'inference_backend': 'tflite_xnnpack',  # 'auto' benchmarks the backends on first start
+            'backend_cache_path': 'backend_selection.json',
+            'analysis_workers': 2,
+            'decode_threads': 2,
+            'prefetch_depth': 16,
+            'fast_decode': True,
+            'max_decode_scale': 8,
+            'auto_tune_enabled': True,
+            'auto_tune_path': 'models/auto_tune.json',
+            'quantization': 'dynamic',
+            'cache_enabled': True,
+            'cache_path': 'models/detection_cache.db',
+            'cache_max_entries': 100000,
+            'results_store_enabled': True,
+            'results_store_path': 'models/detection_results.db',
+            'camera_id': 'slope-cam-1',
+            'embeddings_enabled': True,
+            'embedding_dir': 'models/embeddings',
+            'incremental_analysis': True,
+            'tile_size': 448,
+            'tile_overlap': 0.25,
+            'tile_batch_size': 16,
+            'warmup_invokes': 3,
+            'frame_gate_enabled': True,
+            'frame_gate_threshold': 0.02,
+            'frame_gate_size': 64,
+            'frame_gate_max_skips': 24,
+            'near_duplicate_enabled': True,
+            'near_duplicate_hash': 'dhash',
+            'near_duplicate_max_distance': 4,
+            'near_duplicate_window': 288,
+            'near_duplicate_max_age_hours': 24,
+            'roi': {'polygon': [[0.1, 0.3], [0.9, 0.2], [0.95, 0.95], [0.05, 0.95]]},
+            'time_series_mode': 'combined',
+            'flow_width': 640,
+            'flow_pyramid_levels': 3,
+            'flow_grid': [4, 4],
+            'displacement_threshold': 4.0
         },
         'alert_threshold': 0.8,
         'location': 'Test Site',
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Archive Scoring Module
+Offline command-line scorer that streams images straight out of backup
+tarballs (landslide_backup_*.tar.gz) and zip exports, decodes them in
+memory and writes detection results incrementally to CSV or Parquet.
+"""
+
+import os
+import sys
+import csv
+import json
+import logging
+import tarfile
+import zipfile
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterator, Tuple
+
+try:
+    import pyarrow
+    import pyarrow.parquet as parquet
+except ImportError:
+    pyarrow = None
+
+from ai_landslide_detector import LandslideDetector
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+COLUMNS = ['archive', 'member', 'success', 'prediction', 'confidence', 'landslide_probability',
+           'landslide_detected', 'decision_stage', 'model_version', 'model_hash', 'timestamp', 'error']
+
+def iter_archive_images(archive_path: str) -> Iterator[Tuple[str, bytes]]:
+    """Yield (member name, bytes) for each image in a tar or zip archive
+
+    Tarballs are read as a forward-only stream and zip members are opened
+    one at a time, so only the current member is ever held in memory.
+    """
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            for info in archive.infolist():
+                if not info.is_dir() and info.filename.lower().endswith(IMAGE_EXTENSIONS):
+                    yield info.filename, archive.read(info)
+        return
+
+    with tarfile.open(archive_path, 'r|*') as archive:
+        for member in archive:
+            if member.isfile() and member.name.lower().endswith(IMAGE_EXTENSIONS):
+                member_file = archive.extractfile(member)
+                if member_file is not None:
+                    yield member.name, member_file.read()
+
+class ResultWriter:
+    """Append detection results to a CSV or Parquet file as they arrive"""
+
+    def __init__(self, output_path: str, output_format: Optional[str] = None, row_group_size: int = 1024):
+        self.output_path = output_path
+        self.format = output_format or ('parquet' if output_path.endswith('.parquet') else 'csv')
+        self.row_group_size = row_group_size
+        self.rows_written = 0
+        self._pending: List[Dict[str, Any]] = []
+        self._file = None
+        self._csv_writer = None
+        self._parquet_writer = None
+
+        if self.format == 'parquet':
+            if pyarrow is None:
+                raise ImportError("Parquet output needs pyarrow; install it or write CSV")
+            self._schema = pyarrow.schema([
+                ('archive', pyarrow.string()), ('member', pyarrow.string()),
+                ('success', pyarrow.bool_()), ('prediction', pyarrow.string()),
+                ('confidence', pyarrow.float32()), ('landslide_probability', pyarrow.float32()),
+                ('landslide_detected', pyarrow.bool_()), ('decision_stage', pyarrow.string()),
+                ('model_version', pyarrow.string()), ('model_hash', pyarrow.string()),
+                ('timestamp', pyarrow.string()), ('error', pyarrow.string())
+            ])
+            self._parquet_writer = parquet.ParquetWriter(output_path, self._schema, compression='zstd')
+        else:
+            self._file = open(output_path, 'w', newline='')
+            self._csv_writer = csv.DictWriter(self._file, fieldnames=COLUMNS)
+            self._csv_writer.writeheader()
+
+    @staticmethod
+    def to_row(archive_path: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Flatten a detection result into one output row"""
+        return {
+            'archive': os.path.basename(archive_path),
+            'member': result.get('image_path'),
+            'success': result.get('success', False),
+            'prediction': result.get('prediction'),
+            'confidence': result.get('confidence'),
+            'landslide_probability': result.get('all_predictions', {}).get('landslide'),
+            'landslide_detected': result.get('landslide_detected', False),
+            'decision_stage': result.get('decision_stage'),
+            'model_version': result.get('model_version'),
+            'model_hash': result.get('model_hash'),
+            'timestamp': result.get('timestamp'),
+            'error': result.get('error')
+        }
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """Buffer one row, flushing a full row group to disk"""
+        self._pending.append(row)
+        if len(self._pending) >= self.row_group_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered rows out"""
+        if not self._pending:
+            return
+
+        if self._parquet_writer is not None:
+            table = pyarrow.Table.from_pylist(self._pending, schema=self._schema)
+            self._parquet_writer.write_table(table)
+        else:
+            self._csv_writer.writerows(self._pending)
+            self._file.flush()
+
+        self.rows_written += len(self._pending)
+        self._pending = []
+
+    def close(self) -> None:
+        """Flush remaining rows and close the output file"""
+        self.flush()
+        if self._parquet_writer is not None:
+            self._parquet_writer.close()
+        if self._file is not None:
+            self._file.close()
+
+def score_archive(detector: LandslideDetector, archive_path: str, writer: ResultWriter,
+                  batch_size: Optional[int] = None) -> Dict[str, Any]:
+    """Stream one archive through the detector into the writer"""
+    summary = {'archive': archive_path, 'images': 0, 'failed': 0, 'landslide_detections': 0}
+
+    for result in detector.detect_stream(iter_archive_images(archive_path), batch_size):
+        writer.write(ResultWriter.to_row(archive_path, result))
+        summary['images'] += 1
+        summary['failed'] += not result.get('success', False)
+        summary['landslide_detections'] += bool(result.get('landslide_detected', False))
+
+    # Make each finished archive durable before starting the next one
+    writer.flush()
+    return summary
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description="Score images inside backup archives without extracting them")
+    parser.add_argument("archives", nargs='+', help="tar(.gz) or zip archives to score")
+    parser.add_argument("--output", required=True, help="Results file (.csv or .parquet)")
+    parser.add_argument("--format", choices=['csv', 'parquet'], help="Output format (default: from extension)")
+    parser.add_argument("--config", help="JSON config file; its 'detector' section configures the detector")
+    parser.add_argument("--model", help="TFLite model path (overrides the config)")
+    parser.add_argument("--batch-size", type=int, help="Images per inference batch")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    detector_config: Dict[str, Any] = {}
+    if args.config:
+        with open(args.config, 'r') as f:
+            detector_config = json.load(f).get('detector', {})
+    if args.model:
+        detector_config['model_path'] = args.model
+
+    detector = LandslideDetector(detector_config)
+    if not detector.interpreter:
+        print("Model could not be loaded")
+        sys.exit(1)
+
+    writer = ResultWriter(args.output, args.format)
+    summaries = []
+    try:
+        for archive_path in args.archives:
+            if not Path(archive_path).exists():
+                summaries.append({'archive': archive_path, 'error': 'Archive not found'})
+                continue
+            summaries.append(score_archive(detector, archive_path, writer, args.batch_size))
+    finally:
+        writer.close()
+
+    print(json.dumps({'output': args.output, 'rows': writer.rows_written, 'archives': summaries}, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+#!/usr/bin/env python3
+"""
+Auto-Tune Module
+This module runs a short sweep of batch size, interpreter threads and decode
+scale with the configured model on the current machine, picks the highest
+throughput that fits a latency budget and saves it keyed by CPU model and
+model hash. LandslideDetector loads the saved parameters on later starts.
+"""
+
+import os
+import sys
+import json
+import time
+import logging
+import argparse
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any
+
+import numpy as np
+
+from ai_landslide_detector import LandslideDetector, REDUCED_DECODE_FLAGS
+from inference_backends import get_cpu_model, save_tuning
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+
+DEFAULT_BATCH_SIZES = [1, 2, 4, 8, 16]
+
+def default_thread_counts() -> List[int]:
+    """Get powers of two below the core count, plus the core count itself"""
+    cpu_count = os.cpu_count() or 1
+    counts = {cpu_count}
+    threads = 1
+    while threads < cpu_count:
+        counts.add(threads)
+        threads *= 2
+    return sorted(counts)
+
+def find_images(image_dir: str, limit: int) -> List[str]:
+    """Get up to limit of the newest captures in a directory tree"""
+    paths = sorted(str(path) for path in Path(image_dir).rglob('*')
+                   if path.suffix.lower() in IMAGE_EXTENSIONS)
+    # Capture names start with their timestamp, so the newest sort last
+    return paths[-limit:]
+
+def create_sweep_detector(config: Dict[str, Any], num_threads: Optional[int],
+                          backend: Optional[str] = None) -> LandslideDetector:
+    """Load the model for timing, with caching, recording and frame skipping switched off"""
+    sweep_config = dict(
+        config,
+        num_threads=num_threads,
+        interpreter_pool_size=1,
+        analysis_workers=1,
+        fast_decode=True,
+        auto_tune_enabled=False,
+        cache_enabled=False,
+        results_store_enabled=False,
+        embeddings_enabled=False,
+        frame_gate_enabled=False,
+        near_duplicate_enabled=False,
+        warmup_invokes=max(2, int(config.get('warmup_invokes', 0)))
+    )
+    if backend:
+        sweep_config['inference_backend'] = backend
+
+    detector = LandslideDetector(sweep_config)
+    if not detector.interpreter:
+        raise RuntimeError(f"Model could not be loaded: {detector.model_path}")
+    return detector
+
+def landslide_probabilities(detector: LandslideDetector, image_paths: List[str]) -> List[Optional[float]]:
+    """Score images and get each landslide probability, None for failures"""
+    return [result.get('all_predictions', {}).get('landslide') if result.get('success', False) else None
+            for result in detector.batch_detect(image_paths)]
+
+def compare_decode_scales(detector: LandslideDetector, image_paths: List[str], scales: List[int],
+                          tolerance: float = 0.02) -> Dict[int, Dict[str, Any]]:
+    """Check how far each decode scale cap moves predictions from a full-resolution decode
+
+    A reduced decode is resized down to the model input either way, but
+    libjpeg's DCT scaling filters differently from INTER_AREA, so a scale
+    is only accepted when no probability moves by more than tolerance.
+    """
+    configured_scale = detector.max_decode_scale
+    try:
+        detector.max_decode_scale = 1
+        reference = landslide_probabilities(detector, image_paths)
+
+        checks = {}
+        for scale in sorted(set(scales) | {1}):
+            detector.max_decode_scale = scale
+            start = time.perf_counter()
+            probabilities = landslide_probabilities(detector, image_paths)
+            elapsed = time.perf_counter() - start
+
+            differences = [abs(a - b) for a, b in zip(probabilities, reference) if a is not None and b is not None]
+            max_difference = max(differences) if differences else None
+            checks[scale] = {
+                'max_difference': round(max_difference, 4) if max_difference is not None else None,
+                'agrees': max_difference is not None and max_difference <= tolerance,
+                'ms_per_image': round(elapsed * 1000 / len(image_paths), 3)
+            }
+    finally:
+        detector.max_decode_scale = configured_scale
+
+    return checks
+
+def measure_case(detector: LandslideDetector, image_paths: List[str], batch_size: int,
+                 repeats: int = 2) -> Dict[str, Any]:
+    """Time scoring the images one batch at a time, as captures arrive in production"""
+    detector.batch_size = batch_size
+    detector.prefetch_depth = max(1, int(detector.config.get('prefetch_depth', 2 * batch_size)))
+
+    # Let the interpreter reallocate for this batch size before timing
+    detector.batch_detect(image_paths[:batch_size])
+
+    batch_latencies = []
+    elapsed = 0.0
+    failed = 0
+    for _ in range(repeats):
+        for start in range(0, len(image_paths), batch_size):
+            chunk = image_paths[start:start + batch_size]
+            batch_start = time.perf_counter()
+            results = detector.batch_detect(chunk)
+            batch_elapsed = time.perf_counter() - batch_start
+            batch_latencies.append(batch_elapsed * 1000)
+            elapsed += batch_elapsed
+            failed += sum(not result.get('success', False) for result in results)
+
+    images = len(image_paths) * repeats
+    return {
+        'batch_size': batch_size,
+        'num_threads': detector.num_threads,
+        'images_per_s': round(images / elapsed, 3),
+        'batch_latency_ms': {
+            'p50': round(float(np.percentile(batch_latencies, 50)), 3),
+            'p95': round(float(np.percentile(batch_latencies, 95)), 3)
+        },
+        'failed': failed
+    }
+
+def auto_tune(config: Dict[str, Any], image_paths: List[str], latency_budget_ms: float,
+              batch_sizes: Optional[List[int]] = None, thread_counts: Optional[List[int]] = None,
+              decode_scales: Optional[List[int]] = None, tolerance: float = 0.02,
+              repeats: int = 2, save: bool = True) -> Dict[str, Any]:
+    """Find the fastest parameters whose p95 batch latency fits the budget
+
+    The largest decode scale that keeps predictions within tolerance is
+    picked first, since it only ever saves time; batch size and thread
+    count are then swept with it. When no combination fits the budget
+    the one with the lowest p95 latency is kept.
+    """
+    if not image_paths:
+        raise ValueError("Auto-tuning needs at least one image")
+
+    batch_sizes = [size for size in (batch_sizes or DEFAULT_BATCH_SIZES) if size <= len(image_paths)] or [1]
+    thread_counts = thread_counts or default_thread_counts()
+    decode_scales = [scale for scale in (decode_scales or sorted(REDUCED_DECODE_FLAGS))
+                     if scale == 1 or scale in REDUCED_DECODE_FLAGS]
+
+    # Resolve the backend with the configured threads, as a normal start would,
+    # so the saved tuning is found under the same backend later
+    detector = create_sweep_detector(config, config.get('num_threads'))
+    backend = detector.interpreter_pool.backend
+    model_hash = detector.model_hash
+    model_path = detector.model_path
+
+    logger.info(f"Comparing decode scales {decode_scales} on {len(image_paths)} images")
+    decode_checks = compare_decode_scales(detector, image_paths, decode_scales, tolerance)
+    decode_scale = max(scale for scale, check in decode_checks.items() if check['agrees'] or scale == 1)
+    detector = None
+
+    cases = []
+    for num_threads in thread_counts:
+        detector = create_sweep_detector(config, num_threads, backend)
+        detector.max_decode_scale = decode_scale
+        for batch_size in batch_sizes:
+            case = measure_case(detector, image_paths, batch_size, repeats)
+            logger.info(f"{num_threads} threads, batch {batch_size}: {case['images_per_s']} images/s, "
+                        f"p95 {case['batch_latency_ms']['p95']} ms per batch")
+            cases.append(case)
+        detector = None
+
+    within_budget = [case for case in cases if case['batch_latency_ms']['p95'] <= latency_budget_ms]
+    if within_budget:
+        best = max(within_budget, key=lambda case: case['images_per_s'])
+    else:
+        best = min(cases, key=lambda case: case['batch_latency_ms']['p95'])
+        logger.warning(f"No configuration fits the {latency_budget_ms} ms budget; "
+                       f"using the lowest latency one ({best['batch_latency_ms']['p95']} ms)")
+
+    tuning = {
+        'batch_size': best['batch_size'],
+        'num_threads': best['num_threads'],
+        'max_decode_scale': decode_scale,
+        'images_per_s': best['images_per_s'],
+        'batch_latency_ms': best['batch_latency_ms'],
+        'latency_budget_ms': latency_budget_ms,
+        'within_budget': bool(within_budget),
+        'cpu_model': get_cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'backend': backend,
+        'model_path': model_path,
+        'model_hash': model_hash,
+        'images': len(image_paths),
+        'decode_scales': {str(scale): check for scale, check in decode_checks.items()},
+        'cases': cases,
+        'measured_at': datetime.now().isoformat()
+    }
+
+    if save:
+        tuning_path = config.get('auto_tune_path', 'models/auto_tune.json')
+        save_tuning(tuning_path, model_hash, backend, tuning)
+        logger.info(f"Saved tuned parameters to {tuning_path}")
+
+    return tuning
+
+def parse_list(value: Optional[str]) -> Optional[List[int]]:
+    """Parse a comma separated list of integers"""
+    if not value:
+        return None
+    return [int(item) for item in value.split(',') if item.strip()]
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description="Tune detector batch size, threads and decode scale for this machine")
+    parser.add_argument("--config", help="JSON config file; its 'detector' section configures the detector")
+    parser.add_argument("--model", help="TFLite model path (overrides the config)")
+    parser.add_argument("--image-dir", help="Captures to time (default: the detector's representative_image_dir)")
+    parser.add_argument("--images", type=int, default=32, help="Number of captures to use")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="p95 latency budget per batch in ms")
+    parser.add_argument("--batch-sizes", help="Comma separated batch sizes (default: 1,2,4,8,16)")
+    parser.add_argument("--threads", help="Comma separated thread counts (default: powers of two up to the core count)")
+    parser.add_argument("--decode-scales", help="Comma separated decode scale caps (default: 1,2,4,8)")
+    parser.add_argument("--tolerance", type=float, default=0.02,
+                        help="Largest landslide probability change a reduced decode may cause")
+    parser.add_argument("--repeats", type=int, default=2, help="Passes over the captures per configuration")
+    parser.add_argument("--dry-run", action="store_true", help="Report the result without saving it")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING, format='%(asctime)s - %(levelname)s - %(message)s')
+    # Report sweep progress without the detector's per-image logging
+    logger.setLevel(logging.INFO)
+
+    detector_config: Dict[str, Any] = {}
+    if args.config:
+        with open(args.config, 'r') as f:
+            detector_config = json.load(f).get('detector', {})
+    if args.model:
+        detector_config['model_path'] = args.model
+
+    image_dir = args.image_dir or detector_config.get('representative_image_dir', './images')
+    image_paths = find_images(image_dir, args.images)
+    if not image_paths:
+        print(f"No images found in {image_dir}")
+        sys.exit(1)
+
+    try:
+        tuning = auto_tune(detector_config, image_paths, args.budget_ms,
+                           batch_sizes=parse_list(args.batch_sizes),
+                           thread_counts=parse_list(args.threads),
+                           decode_scales=parse_list(args.decode_scales),
+                           tolerance=args.tolerance, repeats=args.repeats,
+                           save=not args.dry_run)
+    except RuntimeError as e:
+        print(str(e))
+        sys.exit(1)
+
+    print(json.dumps(tuning, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+"""
+Detection Result Cache Module
+This module provides a persistent, content-addressed cache of detection
+results so unchanged images are not rescored by an unchanged model.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, Any, List
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+def hash_file(file_path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Compute a content hash of a file"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+class DetectionCache:
+    """SQLite-backed cache of detection results
+
+    Entries are keyed by image content hash, model file hash and a fingerprint
+    of the settings that affect the result. Least recently used entries are
+    evicted once the cache grows past max_entries.
+    """
+
+    def __init__(self, db_path: str, max_entries: int = 100000):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS detection_cache (
+                image_hash TEXT NOT NULL,
+                model_key TEXT NOT NULL,
+                result TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (image_hash, model_key)
+            )
+        ''')
+        self._conn.execute(
+            'CREATE INDEX IF NOT EXISTS idx_detection_cache_access ON detection_cache (last_access)'
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_model_key(model_hash: str, settings: Dict[str, Any]) -> str:
+        """Combine the model hash with the settings that affect its results"""
+        settings_json = json.dumps(settings, sort_keys=True)
+        return hashlib.blake2b(f"{model_hash}:{settings_json}".encode(), digest_size=16).hexdigest()
+
+    def get_many(self, image_hashes: List[str], model_key: str) -> Dict[str, Dict[str, Any]]:
+        """Look up cached results, returning a mapping of image hash to result"""
+        found: Dict[str, Dict[str, Any]] = {}
+        unique_hashes = list(dict.fromkeys(image_hashes))
+
+        with self._lock:
+            # Stay well below SQLite's bound parameter limit
+            for start in range(0, len(unique_hashes), 500):
+                chunk = unique_hashes[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                rows = self._conn.execute(
+                    f'SELECT image_hash, result FROM detection_cache '
+                    f'WHERE model_key = ? AND image_hash IN ({placeholders})',
+                    [model_key] + chunk
+                ).fetchall()
+                for image_hash, result in rows:
+                    found[image_hash] = json.loads(result)
+
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    'UPDATE detection_cache SET last_access = ? WHERE image_hash = ? AND model_key = ?',
+                    [(now, image_hash, model_key) for image_hash in found]
+                )
+                self._conn.commit()
+
+            hits = sum(1 for image_hash in image_hashes if image_hash in found)
+            self.hits += hits
+            self.misses += len(image_hashes) - hits
+
+        return found
+
+    def put_many(self, entries: Dict[str, Dict[str, Any]], model_key: str) -> None:
+        """Store results keyed by image hash and evict old entries if needed"""
+        if not entries:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO detection_cache '
+                '(image_hash, model_key, result, created_at, last_access) VALUES (?, ?, ?, ?, ?)',
+                [(image_hash, model_key, json.dumps(result), now, now)
+                 for image_hash, result in entries.items()]
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries above max_entries (lock held)"""
+        if not self.max_entries or self.max_entries <= 0:
+            return
+
+        count = self._conn.execute('SELECT COUNT(*) FROM detection_cache').fetchone()[0]
+        excess = count - self.max_entries
+        if excess <= 0:
+            return
+
+        self._conn.execute(
+            'DELETE FROM detection_cache WHERE rowid IN ('
+            'SELECT rowid FROM detection_cache ORDER BY last_access LIMIT ?)',
+            (excess,)
+        )
+        self.evictions += excess
+        logger.info(f"Evicted {excess} cached detection results")
+
+    def clear(self) -> None:
+        """Remove all cached results"""
+        with self._lock:
+            self._conn.execute('DELETE FROM detection_cache')
+            self._conn.commit()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache hit/miss counters and size"""
+        with self._lock:
+            entries = self._conn.execute('SELECT COUNT(*) FROM detection_cache').fetchone()[0]
+
+        lookups = self.hits + self.misses
+        return {
+            'db_path': self.db_path,
+            'entries': entries,
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': self.hits / lookups if lookups > 0 else 0
+        }
+
+    def close(self) -> None:
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
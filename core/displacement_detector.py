@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Slope Displacement Detection Module
+This module measures slow slope movement as dense optical flow between
+successive captures of a fixed camera, complementing the per-image
+landslide classifier.
+"""
+
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+logger = logging.getLogger(__name__)
+
+# libjpeg can decode grayscale directly at 1/2, 1/4 or 1/8 scale
+REDUCED_GRAYSCALE_FLAGS = {
+    8: cv2.IMREAD_REDUCED_GRAYSCALE_8,
+    4: cv2.IMREAD_REDUCED_GRAYSCALE_4,
+    2: cv2.IMREAD_REDUCED_GRAYSCALE_2,
+}
+
+class SlopeDisplacementDetector:
+    """Dense optical flow change detection between consecutive frames
+
+    Frames are converted to grayscale at a fixed analysis width and turned
+    into Gaussian pyramids. Flow is refined coarse-to-fine with Farneback's
+    algorithm, one pyramid level at a time, and the previous frame's pyramid
+    is kept in memory so every new frame costs one pyramid and one flow
+    computation.
+    """
+
+    def __init__(self, config: Dict[str, Any]):
+        self.config = config
+        self.flow_width = int(config.get('flow_width', 640))
+        self.pyramid_levels = max(1, int(config.get('flow_pyramid_levels', 3)))
+        self.window_size = int(config.get('flow_window_size', 15))
+        self.iterations = int(config.get('flow_iterations', 3))
+        self.grid = tuple(config.get('flow_grid', (4, 4)))
+        self.displacement_threshold = float(config.get('displacement_threshold', 4.0))
+        self.compensate_global_motion = config.get('flow_compensate_global_motion', True)
+        self.reference_image: Optional[str] = None
+        self._reference_pyramid: Optional[List[np.ndarray]] = None
+        self._reference_size: Optional[tuple] = None
+        self._lock = threading.Lock()
+
+    def get_decode_scale(self, image_path: str) -> int:
+        """Pick the largest decode scale-down factor that still covers the flow analysis width"""
+        try:
+            # Only the header is parsed here, no pixels are decoded
+            with Image.open(image_path) as header:
+                width = header.size[0]
+        except Exception:
+            return 1
+
+        for scale in sorted(REDUCED_GRAYSCALE_FLAGS, reverse=True):
+            if width // scale >= self.flow_width:
+                return scale
+        return 1
+
+    def load_frame(self, image_path: str) -> Tuple[Optional[np.ndarray], float]:
+        """Load an image as grayscale at the flow analysis width
+
+        Returns the frame and the factor from its pixels to pixels of the
+        original capture, which is decoded at reduced resolution when that
+        still covers the analysis width.
+        """
+        decode_scale = self.get_decode_scale(image_path)
+        image = cv2.imread(image_path, REDUCED_GRAYSCALE_FLAGS.get(decode_scale, cv2.IMREAD_GRAYSCALE))
+        if image is not None and decode_scale > 1 and image.shape[1] < self.flow_width:
+            # EXIF rotation swapped the sides the scale was picked from
+            decode_scale = 1
+            image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            logger.error(f"Failed to load image: {image_path}")
+            return None, 1.0
+
+        height, width = image.shape
+        scale = float(decode_scale)
+        if width > self.flow_width:
+            flow_height = max(1, round(height * self.flow_width / width))
+            image = cv2.resize(image, (self.flow_width, flow_height), interpolation=cv2.INTER_AREA)
+            scale *= width / self.flow_width
+
+        return image, scale
+
+    def build_pyramid(self, frame: np.ndarray) -> List[np.ndarray]:
+        """Build a Gaussian pyramid, finest level first"""
+        pyramid = [frame]
+        for _ in range(self.pyramid_levels - 1):
+            if min(pyramid[-1].shape) < 2 * self.window_size:
+                break
+            pyramid.append(cv2.pyrDown(pyramid[-1]))
+        return pyramid
+
+    def compute_flow(self, previous: List[np.ndarray], current: List[np.ndarray]) -> np.ndarray:
+        """Compute dense flow coarse-to-fine over two cached pyramids"""
+        levels = min(len(previous), len(current))
+        flow = None
+
+        for level in range(levels - 1, -1, -1):
+            prev_level, next_level = previous[level], current[level]
+            height, width = prev_level.shape
+            flags = 0
+
+            if flow is not None:
+                # Upsample the coarser estimate as the initial guess for this level
+                flow = cv2.resize(flow, (width, height), interpolation=cv2.INTER_LINEAR) * 2.0
+                flags = cv2.OPTFLOW_USE_INITIAL_FLOW
+
+            flow = cv2.calcOpticalFlowFarneback(
+                prev_level, next_level, flow,
+                pyr_scale=0.5, levels=1, winsize=self.window_size,
+                iterations=self.iterations, poly_n=5, poly_sigma=1.1, flags=flags
+            )
+
+        return flow
+
+    def region_statistics(self, flow: np.ndarray, scale: float) -> List[Dict[str, Any]]:
+        """Summarize displacement magnitudes per grid region in original pixels"""
+        rows, cols = self.grid
+        height, width = flow.shape[:2]
+        region_h, region_w = height // rows, width // cols
+
+        # View the flow field as (rows, cols, pixels, 2) without copying per region
+        cropped = flow[:region_h * rows, :region_w * cols] * scale
+        regions = cropped.reshape(rows, region_h, cols, region_w, 2).swapaxes(1, 2).reshape(rows, cols, -1, 2)
+        magnitude = np.hypot(regions[..., 0], regions[..., 1])
+
+        mean = magnitude.mean(axis=-1)
+        p95 = np.percentile(magnitude, 95, axis=-1)
+        peak = magnitude.max(axis=-1)
+        direction = regions.mean(axis=-2)
+
+        return [
+            {
+                'row': row,
+                'col': col,
+                'mean_px': round(float(mean[row, col]), 3),
+                'p95_px': round(float(p95[row, col]), 3),
+                'max_px': round(float(peak[row, col]), 3),
+                'dx_px': round(float(direction[row, col, 0]), 3),
+                'dy_px': round(float(direction[row, col, 1]), 3),
+                'moving': bool(p95[row, col] >= self.displacement_threshold)
+            }
+            for row in range(rows) for col in range(cols)
+        ]
+
+    def process_frame(self, image_path: str) -> Dict[str, Any]:
+        """Measure displacement against the previous frame and make this frame the reference"""
+        try:
+            frame, scale = self.load_frame(image_path)
+            if frame is None:
+                return {'success': False, 'error': 'Failed to load image', 'image_path': image_path}
+
+            pyramid = self.build_pyramid(frame)
+
+            with self._lock:
+                reference_image = self.reference_image
+                reference_pyramid = self._reference_pyramid
+                if self._reference_size != frame.shape:
+                    # Resolution changed, so the previous frame can't be compared
+                    reference_image = reference_pyramid = None
+
+                self.reference_image = image_path
+                self._reference_pyramid = pyramid
+                self._reference_size = frame.shape
+
+            result = {
+                'success': True,
+                'image_path': image_path,
+                'reference_image': reference_image,
+                'timestamp': datetime.now().isoformat(),
+                'displacement_detected': False
+            }
+
+            if reference_pyramid is None:
+                return result
+
+            flow = self.compute_flow(reference_pyramid, pyramid)
+
+            # A fixed camera still sways; remove the shift shared by the whole frame
+            global_shift = np.median(flow.reshape(-1, 2), axis=0)
+            if self.compensate_global_motion:
+                flow = flow - global_shift
+
+            # Report displacements in pixels of the original capture
+            regions = self.region_statistics(flow, scale)
+            moving_regions = [region for region in regions if region['moving']]
+
+            result.update({
+                'displacement_detected': bool(moving_regions),
+                'max_displacement_px': max(region['p95_px'] for region in regions),
+                'mean_displacement_px': round(float(np.mean([region['mean_px'] for region in regions])), 3),
+                'moving_regions': len(moving_regions),
+                'global_shift_px': [round(float(value * scale), 3) for value in global_shift],
+                'regions': regions
+            })
+            return result
+
+        except Exception as e:
+            logger.error(f"Displacement analysis failed for {image_path}: {e}")
+            return {'success': False, 'error': str(e), 'image_path': image_path}
+
+    def analyze_sequence(self, image_paths: List[str]) -> List[Dict[str, Any]]:
+        """Process frames in order, each compared against the one before it"""
+        return [self.process_frame(image_path) for image_path in image_paths]
+
+    def prime(self, image_path: str) -> bool:
+        """Use an already analyzed frame as the reference without reporting on it"""
+        frame, _ = self.load_frame(image_path)
+        if frame is None:
+            return False
+
+        with self._lock:
+            self.reference_image = image_path
+            self._reference_pyramid = self.build_pyramid(frame)
+            self._reference_size = frame.shape
+        return True
+
+    def reset(self) -> None:
+        """Drop the cached reference frame"""
+        with self._lock:
+            self.reference_image = None
+            self._reference_pyramid = None
+            self._reference_size = None
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Embedding Index Module
+This module stores penultimate-layer embeddings of scored frames in a
+float16 memory-mapped matrix and answers top-k visual similarity queries,
+by vectorised brute force or through an IVF (inverted file) index.
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+import threading
+from pathlib import Path
+from typing import Dict, List, Tuple, Optional, Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Rows converted to float32 and scored per step of a scan
+SCAN_CHUNK_ROWS = 65536
+
+def normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    """L2-normalize rows so a dot product is the cosine similarity"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-12)
+
+def normalize_path(image_path: Optional[str]) -> Optional[str]:
+    """Make an image path absolute so differently spelled paths to one file match"""
+    return os.path.abspath(image_path) if image_path else image_path
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Keep the k highest scores and their row ids"""
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[keep], ids[keep]
+    return scores, ids
+
+class EmbeddingStore:
+    """Append-only float16 embedding matrix with metadata and an IVF index
+
+    Files in the store directory:
+
+        embeddings.f16  row-major float16 matrix, grown in place
+        embeddings.db   SQLite metadata; row id = matrix row
+        ivf.npz         centroids and per-list row ids of the IVF index
+
+    Rows are L2-normalized, so similarity is cosine similarity. Rows added
+    after the last index build are scanned by brute force, and the index
+    is rebuilt in the background once they grow past rebuild_fraction of
+    the indexed rows.
+    """
+
+    def __init__(self, directory: str, min_index_rows: int = 50000,
+                 rebuild_fraction: float = 0.25, probe_fraction: float = 0.05):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.matrix_path = self.directory / 'embeddings.f16'
+        self.index_path = self.directory / 'ivf.npz'
+        self.min_index_rows = min_index_rows
+        self.rebuild_fraction = rebuild_fraction
+        self.probe_fraction = probe_fraction
+        self._lock = threading.RLock()
+        self._index_thread: Optional[threading.Thread] = None
+
+        self._conn = sqlite3.connect(str(self.directory / 'embeddings.db'), timeout=30,
+                                     check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS embeddings (
+                id INTEGER PRIMARY KEY,
+                image_path TEXT NOT NULL UNIQUE,
+                timestamp TEXT,
+                prediction TEXT,
+                confidence REAL
+            );
+            CREATE TABLE IF NOT EXISTS store_info (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+        self._conn.commit()
+
+        row = self._conn.execute("SELECT value FROM store_info WHERE key = 'dim'").fetchone()
+        self.dim: Optional[int] = int(row[0]) if row else None
+        self.count = self._conn.execute('SELECT COALESCE(MAX(id) + 1, 0) FROM embeddings').fetchone()[0]
+        self._matrix: Optional[np.memmap] = None
+        self._capacity = 0
+        if self.dim:
+            self._open_matrix(max(self.count, 1))
+
+        self._index = self._load_index()
+
+    def _open_matrix(self, rows: int) -> None:
+        """Map the matrix file with room for at least rows rows, growing the file if needed"""
+        capacity = max(self._capacity, 4096)
+        while capacity < rows:
+            capacity *= 2
+
+        size = capacity * self.dim * 2
+        if not self.matrix_path.exists() or self.matrix_path.stat().st_size < size:
+            with open(self.matrix_path, 'ab') as f:
+                f.truncate(size)
+
+        self._matrix = np.memmap(self.matrix_path, dtype=np.float16, mode='r+', shape=(capacity, self.dim))
+        self._capacity = capacity
+
+    def _load_index(self) -> Optional[Dict[str, np.ndarray]]:
+        """Load the IVF index file if one was built"""
+        if not self.index_path.exists():
+            return None
+        try:
+            with np.load(self.index_path) as data:
+                return {name: data[name] for name in data.files}
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable embedding index {self.index_path}: {e}")
+            return None
+
+    def add(self, vectors: np.ndarray, records: List[Dict[str, Any]]) -> int:
+        """Append embeddings with their detection results; already stored images are skipped"""
+        vectors = normalize_rows(np.asarray(vectors).reshape(len(records), -1))
+
+        with self._lock:
+            if self.dim is None:
+                self.dim = int(vectors.shape[1])
+                with self._conn:
+                    self._conn.execute("INSERT INTO store_info VALUES ('dim', ?)", (str(self.dim),))
+                self._open_matrix(len(records))
+            elif vectors.shape[1] != self.dim:
+                raise ValueError(f"Embedding has {vectors.shape[1]} dimensions, store has {self.dim}")
+
+            paths = [normalize_path(record.get('image_path')) for record in records]
+            placeholders = ', '.join('?' * len(paths))
+            stored = {row[0] for row in self._conn.execute(
+                f'SELECT image_path FROM embeddings WHERE image_path IN ({placeholders})', paths)}
+
+            rows, metadata = [], []
+            for i, (path, record) in enumerate(zip(paths, records)):
+                if path is None or path in stored:
+                    continue
+                stored.add(path)
+                rows.append(i)
+                metadata.append((self.count + len(metadata), path, record.get('timestamp'),
+                                 record.get('prediction'), record.get('confidence')))
+
+            if not rows:
+                return 0
+
+            # Vectors first, then the metadata that makes them visible
+            if self.count + len(rows) > self._capacity:
+                self._open_matrix(self.count + len(rows))
+            self._matrix[self.count:self.count + len(rows)] = vectors[rows]
+            self._matrix.flush()
+
+            with self._conn:
+                self._conn.executemany('INSERT INTO embeddings VALUES (?, ?, ?, ?, ?)', metadata)
+            self.count += len(rows)
+
+        self._maybe_rebuild_index()
+        return len(rows)
+
+    def get_vector(self, image_path: str) -> Optional[np.ndarray]:
+        """Get the stored embedding of an image"""
+        with self._lock:
+            # Rows stored before paths were normalized keep their original spelling
+            row = self._conn.execute('SELECT id FROM embeddings WHERE image_path IN (?, ?)',
+                                     (normalize_path(image_path), image_path)).fetchone()
+            if row is None:
+                return None
+            return self._matrix[row[0]].astype(np.float32)
+
+    def _scan(self, query: np.ndarray, ids: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Score the given sorted row ids against the query, keeping the top k"""
+        best_scores, best_ids = np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int64)
+        for start in range(0, len(ids), SCAN_CHUNK_ROWS):
+            chunk_ids = ids[start:start + SCAN_CHUNK_ROWS]
+            if chunk_ids[-1] - chunk_ids[0] + 1 == len(chunk_ids):
+                # Contiguous rows are a plain slice of the map
+                vectors = self._matrix[chunk_ids[0]:chunk_ids[-1] + 1]
+            else:
+                vectors = self._matrix[chunk_ids]
+            scores = vectors.astype(np.float32) @ query
+            best_scores, best_ids = _top_k(np.concatenate([best_scores, scores]),
+                                           np.concatenate([best_ids, chunk_ids]), k)
+        return best_scores, best_ids
+
+    def search(self, vector: np.ndarray, k: int = 10, nprobe: Optional[int] = None,
+               exclude: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get the k most similar stored frames, most similar first"""
+        query = normalize_rows(np.asarray(vector).reshape(1, -1))[0]
+        exclude = normalize_path(exclude)
+
+        with self._lock:
+            count, index = self.count, self._index
+            if count == 0:
+                return []
+            if query.shape[0] != self.dim:
+                raise ValueError(f"Query has {query.shape[0]} dimensions, store has {self.dim}")
+
+            # Fetch one extra in case the query image itself is among the results
+            fetch = k + 1 if exclude else k
+            if index is None:
+                scores, ids = self._scan(query, np.arange(count), fetch)
+            else:
+                centroids, offsets, order = index['centroids'], index['offsets'], index['order']
+                indexed = int(index['indexed'])
+                nprobe = nprobe or max(1, int(np.ceil(len(centroids) * self.probe_fraction)))
+                probe = np.argsort(-(centroids @ query))[:nprobe]
+                ids = np.sort(np.concatenate([order[offsets[l]:offsets[l + 1]] for l in probe]))
+                # Rows added since the index was built are scanned directly
+                ids = np.concatenate([ids, np.arange(indexed, count)])
+                scores, ids = self._scan(query, ids, fetch)
+
+            ranking = np.argsort(-scores)
+            scores, ids = scores[ranking], ids[ranking]
+            placeholders = ', '.join('?' * len(ids))
+            metadata = {row[0]: row for row in self._conn.execute(
+                f'SELECT * FROM embeddings WHERE id IN ({placeholders})', [int(i) for i in ids])}
+
+        results = []
+        for score, row_id in zip(scores, ids):
+            _, image_path, timestamp, prediction, confidence = metadata[int(row_id)]
+            if exclude and normalize_path(image_path) == exclude:
+                continue
+            results.append({
+                'image_path': image_path,
+                'similarity': round(float(score), 4),
+                'timestamp': timestamp,
+                'prediction': prediction,
+                'confidence': confidence
+            })
+        return results[:k]
+
+    def build_index(self, n_lists: Optional[int] = None, sample_size: int = 20000,
+                    iterations: int = 10, seed: int = 0) -> Dict[str, Any]:
+        """Cluster the stored rows with spherical k-means and write the IVF index"""
+        with self._lock:
+            count = self.count
+        if count == 0:
+            raise ValueError("No embeddings to index")
+
+        n_lists = int(n_lists or max(1, min(4096, round(np.sqrt(count)))))
+        rng = np.random.default_rng(seed)
+
+        # Read-only map of the rows present now, independent of concurrent appends
+        matrix = np.memmap(self.matrix_path, dtype=np.float16, mode='r', shape=(count, self.dim))
+        sample = matrix[np.sort(rng.choice(count, min(count, max(sample_size, n_lists)), replace=False))]
+        sample = sample.astype(np.float32)
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+
+        for _ in range(iterations):
+            assignment = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, sample)
+            counts = np.bincount(assignment, minlength=n_lists)
+            # Restart empty lists from random sample rows
+            empty = counts == 0
+            sums[empty] = sample[rng.choice(len(sample), int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        assignment = np.concatenate([
+            np.argmax(matrix[start:start + SCAN_CHUNK_ROWS].astype(np.float32) @ centroids.T, axis=1)
+            for start in range(0, count, SCAN_CHUNK_ROWS)
+        ])
+        order = np.argsort(assignment, kind='stable').astype(np.int64)
+        offsets = np.concatenate([[0], np.cumsum(np.bincount(assignment, minlength=n_lists))]).astype(np.int64)
+        index = {'centroids': centroids.astype(np.float32), 'offsets': offsets, 'order': order,
+                 'indexed': np.int64(count)}
+
+        # Write to a temporary file and rename so readers never see a partial index
+        tmp_path = self.index_path.with_name('ivf.tmp.npz')
+        np.savez(tmp_path, **index)
+        os.replace(tmp_path, self.index_path)
+
+        with self._lock:
+            self._index = index
+
+        logger.info(f"Built embedding index over {count} rows in {n_lists} lists")
+        return {'rows': count, 'lists': n_lists}
+
+    def _maybe_rebuild_index(self) -> None:
+        """Rebuild the index in the background once enough rows are unindexed"""
+        indexed = int(self._index['indexed']) if self._index is not None else 0
+        if self.count < self.min_index_rows or self.count - indexed <= indexed * self.rebuild_fraction:
+            return
+        if self._index_thread and self._index_thread.is_alive():
+            return
+
+        self._index_thread = threading.Thread(target=self._rebuild_index, name='embedding-index', daemon=True)
+        self._index_thread.start()
+
+    def _rebuild_index(self) -> None:
+        """Background half of _maybe_rebuild_index"""
+        try:
+            self.build_index()
+        except Exception as e:
+            logger.error(f"Failed to build embedding index: {e}")
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the store size and index coverage"""
+        index = self._index
+        return {
+            'directory': str(self.directory),
+            'embeddings': self.count,
+            'dim': self.dim,
+            'matrix_mb': round(self.count * (self.dim or 0) * 2 / (1024 * 1024), 2),
+            'index_lists': len(index['centroids']) if index is not None else 0,
+            'indexed': int(index['indexed']) if index is not None else 0
+        }
+
+    def close(self) -> None:
+        """Flush the matrix and close the metadata database"""
+        with self._lock:
+            if self._matrix is not None:
+                self._matrix.flush()
+            self._conn.close()
+
+def main():
+    """Main function for command-line usage"""
+    parser = argparse.ArgumentParser(description="Manage a store of frame embeddings")
+    parser.add_argument("store", help="Embedding store directory (embedding_dir/<model hash>)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    build_parser = subparsers.add_parser("build", help="Build the IVF index")
+    build_parser.add_argument("--lists", type=int, help="Number of IVF lists (default: sqrt of rows)")
+
+    search_parser = subparsers.add_parser("search", help="Find frames similar to a stored frame")
+    search_parser.add_argument("image_path", help="Path of an image that was scored")
+    search_parser.add_argument("-k", type=int, default=10, help="Number of results")
+
+    subparsers.add_parser("stats", help="Show store statistics")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    store = EmbeddingStore(args.store)
+    try:
+        if args.command == "build":
+            output = store.build_index(args.lists)
+        elif args.command == "search":
+            vector = store.get_vector(args.image_path)
+            if vector is None:
+                print(f"No embedding stored for {args.image_path}")
+                sys.exit(1)
+            output = store.search(vector, args.k, exclude=args.image_path)
+        else:
+            output = store.get_stats()
+        print(json.dumps(output, indent=2))
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
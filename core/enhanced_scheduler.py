@@ -11,11 +11,12 @@ import signal
 import sys
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, List
 import logging
 
 from camera_controller import create_camera_controller, CameraController
 from cloud_storage import CloudStorageManager
+from perceptual_hash import PerceptualHashIndex, hash_image_file
 
 # Configure logging
 logging.basicConfig(
@@ -42,6 +43,8 @@ class EnhancedLandslideScheduler:
         self.last_capture_time: Optional[datetime] = None
         self.upload_queue = []
         self.upload_queue_lock = threading.Lock()
+        self.duplicate_index: Optional[PerceptualHashIndex] = None
+        self.last_capture_duplicate_of: Optional[str] = None
         
         # Setup signal handlers for graceful shutdown
         signal.signal(signal.SIGINT, self.signal_handler)
@@ -50,6 +53,7 @@ class EnhancedLandslideScheduler:
         # Initialize components
         self.initialize_camera()
         self.initialize_cloud_storage()
+        self.initialize_duplicate_index()
     
     def load_config(self) -> Dict[str, Any]:
         """Load configuration from JSON file"""
@@ -66,6 +70,13 @@ class EnhancedLandslideScheduler:
             "max_images": 1000,
             "image_prefix": "landslide",
             "timezone": "UTC",
+            "near_duplicates": {
+                "enabled": False,
+                "hash_method": "dhash",
+                "max_distance": 4,
+                "window": 288,
+                "upload_policy": "defer"
+            },
             "cloud_upload": {
                 "enabled": False,
                 "provider": "aws_s3",
@@ -164,6 +175,49 @@ class EnhancedLandslideScheduler:
             logger.error(f"Failed to initialize cloud storage: {e}")
             self.cloud_manager = None
     
+    def initialize_duplicate_index(self) -> None:
+        """Initialize the perceptual hash index of recent distinct captures"""
+        duplicate_config = self.config.get('near_duplicates', {})
+        if not duplicate_config.get('enabled', False):
+            return
+        
+        try:
+            self.duplicate_index = PerceptualHashIndex(
+                max_distance=int(duplicate_config.get('max_distance', 4)),
+                max_entries=int(duplicate_config.get('window', 288))
+            )
+            logger.info("Near-duplicate detection enabled")
+        except Exception as e:
+            logger.error(f"Failed to initialize near-duplicate index: {e}")
+            self.duplicate_index = None
+    
+    def check_near_duplicate(self, image_path: str) -> Optional[str]:
+        """Get the recent capture this image nearly duplicates, if any
+        
+        Only distinct captures are added to the index, so a slow drift is
+        measured against the last distinct frame and eventually breaks the run.
+        """
+        if not self.duplicate_index:
+            return None
+        
+        try:
+            method = self.config.get('near_duplicates', {}).get('hash_method', 'dhash')
+            hash_value = hash_image_file(image_path, method)
+            if hash_value is None:
+                return None
+            
+            match = self.duplicate_index.nearest(hash_value)
+            if match:
+                logger.info(f"Near-duplicate capture: {image_path} matches {match[0]} (distance {match[1]})")
+                return match[0]
+            
+            self.duplicate_index.add(image_path, hash_value)
+            return None
+            
+        except Exception as e:
+            logger.error(f"Failed to check for near-duplicate: {e}")
+            return None
+    
     def capture_image(self) -> Optional[str]:
         """Capture a single image"""
         if not self.camera:
@@ -183,9 +237,12 @@ class EnhancedLandslideScheduler:
             # Log capture info
             logger.info(f"Image captured: {image_path}")
             
+            # Flag near-duplicates of recent distinct captures
+            self.last_capture_duplicate_of = self.check_near_duplicate(image_path)
+            
             # Queue for cloud upload if enabled
             if self.cloud_manager and self.config.get('cloud_upload', {}).get('upload_immediately', True):
-                self.queue_for_upload(image_path)
+                self.queue_for_upload(image_path, self.last_capture_duplicate_of)
             
             # Check if we need to clean up old images
             self.cleanup_old_images()
@@ -196,16 +253,34 @@ class EnhancedLandslideScheduler:
             logger.error(f"Failed to capture image: {e}")
             return None
     
-    def queue_for_upload(self, image_path: str) -> None:
-        """Queue an image for cloud upload"""
+    def queue_for_upload(self, image_path: str, duplicate_of: Optional[str] = None) -> None:
+        """Queue an image for cloud upload
+        
+        Near-duplicates are dropped with the 'skip' upload policy and sent
+        after all distinct images with 'defer'.
+        """
+        upload_policy = self.config.get('near_duplicates', {}).get('upload_policy', 'defer')
+        if duplicate_of and upload_policy == 'skip':
+            logger.info(f"Not uploading near-duplicate: {image_path}")
+            return
+        
         with self.upload_queue_lock:
             self.upload_queue.append({
                 'path': image_path,
                 'timestamp': datetime.now(),
-                'retries': 0
+                'retries': 0,
+                'deferred': bool(duplicate_of) and upload_policy == 'defer'
             })
         logger.info(f"Queued for upload: {image_path}")
     
+    def next_upload_item(self) -> Optional[Dict[str, Any]]:
+        """Pop the oldest queued image, preferring images that are not deferred"""
+        with self.upload_queue_lock:
+            for i, upload_item in enumerate(self.upload_queue):
+                if not upload_item.get('deferred'):
+                    return self.upload_queue.pop(i)
+            return self.upload_queue.pop(0) if self.upload_queue else None
+    
     def upload_worker(self) -> None:
         """Background worker for cloud uploads"""
         logger.info("Upload worker started")
@@ -213,10 +288,7 @@ class EnhancedLandslideScheduler:
         while self.running:
             try:
                 # Get next item from queue
-                upload_item = None
-                with self.upload_queue_lock:
-                    if self.upload_queue:
-                        upload_item = self.upload_queue.pop(0)
+                upload_item = self.next_upload_item()
                 
                 if upload_item:
                     success = self.upload_image(upload_item)
@@ -384,6 +456,12 @@ class EnhancedLandslideScheduler:
         # Get upload queue status
         with self.upload_queue_lock:
             queue_size = len(self.upload_queue)
+            deferred_size = sum(1 for upload_item in self.upload_queue if upload_item.get('deferred'))
+        
+        near_duplicate_status = {"enabled": False}
+        if self.duplicate_index:
+            near_duplicate_status = dict(self.duplicate_index.get_stats(), enabled=True,
+                                         last_capture_duplicate_of=self.last_capture_duplicate_of)
         
         return {
             "scheduler_running": self.running,
@@ -392,6 +470,8 @@ class EnhancedLandslideScheduler:
             "camera": camera_status,
             "cloud_storage": cloud_status,
             "upload_queue_size": queue_size,
+            "upload_queue_deferred": deferred_size,
+            "near_duplicates": near_duplicate_status,
             "image_directory": self.config.get('image_directory', './images'),
             "max_images": self.config.get('max_images', 1000)
         }
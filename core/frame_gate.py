@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Frame Difference Gate Module
+This module provides a cheap pre-filter that lets the detector skip CNN
+inference on frames that barely differ from the last scored frame.
+"""
+
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+class FrameDifferenceGate:
+    """Compare downsampled grayscale frames against the last scored frame
+
+    The difference is the mean absolute pixel difference as a fraction of
+    the full 0-255 range. Frames are always compared against the last frame
+    that was actually scored, so slow drift accumulates until it crosses the
+    threshold instead of slipping through frame by frame.
+    """
+
+    def __init__(self, threshold: float = 0.02, size: int = 64, max_skips: int = 24):
+        self.threshold = threshold
+        self.size = size
+        self.max_skips = max_skips
+        self.reference_thumbnail: Optional[np.ndarray] = None
+        self.reference_result: Optional[Dict[str, Any]] = None
+        self.consecutive_skips = 0
+        self.total_checked = 0
+        self.total_skipped = 0
+        self._lock = threading.Lock()
+
+    def thumbnail(self, frame: np.ndarray) -> np.ndarray:
+        """Downsample an RGB frame to a small grayscale thumbnail"""
+        gray = cv2.cvtColor(frame, cv2.COLOR_RGB2GRAY)
+        return cv2.resize(gray, (self.size, self.size), interpolation=cv2.INTER_AREA)
+
+    def check(self, thumbnail: np.ndarray) -> Tuple[Optional[Dict[str, Any]], Optional[float], str]:
+        """Decide whether a frame can reuse the last result
+
+        Returns the reference result to reuse (None when the frame must be
+        scored), the measured difference and the reason for the decision.
+        """
+        with self._lock:
+            self.total_checked += 1
+
+            if self.reference_thumbnail is None:
+                return None, None, 'no previous scored frame'
+
+            difference = float(np.abs(thumbnail.astype(np.int16) - self.reference_thumbnail).mean()) / 255.0
+
+            if difference >= self.threshold:
+                return None, difference, f'frame difference {difference:.4f} >= threshold {self.threshold}'
+
+            if self.max_skips and self.consecutive_skips >= self.max_skips:
+                return None, difference, f'rescoring after {self.consecutive_skips} consecutive skips'
+
+            self.consecutive_skips += 1
+            self.total_skipped += 1
+            return self.reference_result, difference, \
+                f'frame difference {difference:.4f} below threshold {self.threshold}'
+
+    def update(self, thumbnail: np.ndarray, result: Dict[str, Any]) -> None:
+        """Make a freshly scored frame the new reference"""
+        with self._lock:
+            self.reference_thumbnail = thumbnail.astype(np.int16)
+            self.reference_result = result
+            self.consecutive_skips = 0
+
+    def reset(self) -> None:
+        """Forget the reference frame, e.g. after a model change"""
+        with self._lock:
+            self.reference_thumbnail = None
+            self.reference_result = None
+            self.consecutive_skips = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get gate settings and skip counters"""
+        return {
+            'threshold': self.threshold,
+            'size': self.size,
+            'max_skips': self.max_skips,
+            'checked': self.total_checked,
+            'skipped': self.total_skipped,
+            'skip_rate': self.total_skipped / self.total_checked if self.total_checked else 0
+        }
@@ -0,0 +1,542 @@
+#!/usr/bin/env python3
+"""
+Inference Backends Module
+This module runs the landslide model through interchangeable runtimes
+(TFLite with or without XNNPACK, OpenCV DNN, ONNX Runtime) behind a common
+slot interface, and picks the fastest one for the local hardware with a
+short micro-benchmark whose outcome is cached on disk.
+"""
+
+import os
+import json
+import time
+import queue
+import logging
+import platform
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Any, Iterator, Callable
+
+import cv2
+import numpy as np
+
+# Prefer a standalone TFLite runtime; full TensorFlow is heavy to import on a Pi
+try:
+    import tflite_runtime.interpreter as tflite
+    TFLITE_BACKEND = 'tflite_runtime'
+except ImportError:
+    try:
+        from ai_edge_litert import interpreter as tflite
+        TFLITE_BACKEND = 'ai_edge_litert'
+    except ImportError:
+        from tensorflow import lite as tflite
+        TFLITE_BACKEND = 'tensorflow'
+
+try:
+    import onnxruntime
+except ImportError:
+    onnxruntime = None
+
+logger = logging.getLogger(__name__)
+
+# Backends in the order they are tried; the first one that loads is the
+# numerical reference the others are checked against
+BACKEND_NAMES = ('tflite_xnnpack', 'tflite_builtin', 'opencv_dnn', 'onnxruntime')
+TFLITE_BACKENDS = ('tflite_xnnpack', 'tflite_builtin')
+
+# Ops between the classifier's last fully connected layer and the model output
+EMBEDDING_PASSTHROUGH_OPS = ('SOFTMAX', 'LOGISTIC', 'RESHAPE', 'QUANTIZE', 'DEQUANTIZE')
+
+def get_cpu_model() -> str:
+    """Get a human readable CPU model name"""
+    try:
+        with open('/proc/cpuinfo', 'r') as f:
+            for line in f:
+                # x86 reports 'model name', Raspberry Pi kernels report 'Model'
+                if line.startswith(('model name', 'Model')):
+                    return line.split(':', 1)[1].strip()
+    except OSError:
+        pass
+    return platform.processor() or platform.machine()
+
+def create_tflite_interpreter(model_path: str, num_threads: Optional[int] = None,
+                              use_xnnpack: bool = True, preserve_all_tensors: bool = False):
+    """Create and allocate one TFLite interpreter
+
+    preserve_all_tensors keeps intermediate tensors readable after invoke,
+    at the cost of the memory the runtime would otherwise reuse.
+    """
+    kwargs: Dict[str, Any] = {'model_path': model_path}
+    if num_threads:
+        kwargs['num_threads'] = int(num_threads)
+    if preserve_all_tensors:
+        kwargs['experimental_preserve_all_tensors'] = True
+    if not use_xnnpack:
+        # The XNNPACK delegate is applied by default; opt out of it
+        op_resolver_type = getattr(tflite, 'OpResolverType', None) or tflite.experimental.OpResolverType
+        kwargs['experimental_op_resolver_type'] = op_resolver_type.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+
+    interpreter = tflite.Interpreter(**kwargs)
+    interpreter.allocate_tensors()
+    return interpreter
+
+def find_embedding_tensor(interpreter, tensor_name: Optional[str] = None) -> Dict[str, Any]:
+    """Find the penultimate-layer tensor of a classifier
+
+    Without a tensor_name this walks back from the model output through
+    softmax/reshape/quantize ops to the last fully connected layer and
+    returns its input.
+    """
+    details = {int(detail['index']): detail for detail in interpreter.get_tensor_details()}
+    if tensor_name:
+        for detail in details.values():
+            if detail['name'] == tensor_name:
+                return detail
+        raise ValueError(f"Embedding tensor not found: {tensor_name}")
+
+    # Delegate nodes also list the model output; follow the original ops
+    producers = {int(tensor): op for op in interpreter._get_ops_details()
+                 if op['op_name'] != 'DELEGATE' for tensor in op['outputs']}
+    index = int(interpreter.get_output_details()[0]['index'])
+    while index in producers:
+        op = producers[index]
+        if op['op_name'] == 'FULLY_CONNECTED':
+            return details[int(op['inputs'][0])]
+        if op['op_name'] not in EMBEDDING_PASSTHROUGH_OPS:
+            break
+        index = int(op['inputs'][0])
+
+    raise ValueError("Could not find the penultimate layer; set embedding_tensor to its name")
+
+def _resize_interpreter(interpreter, batch_size: int) -> None:
+    """Resize an interpreter's input to the given batch size and reallocate"""
+    detail = interpreter.get_input_details()[0]
+    input_shape = list(detail['shape'])
+    input_shape[0] = batch_size
+    interpreter.resize_tensor_input(detail['index'], input_shape)
+    interpreter.allocate_tensors()
+
+class InterpreterSlot:
+    """A pooled TensorFlow Lite interpreter together with its tensor details
+
+    With a factory, single images and batches run on separate interpreters
+    (the second one created on first use), so alternating between them
+    doesn't reallocate tensors on every call. The batched interpreter only
+    grows; smaller batches are padded and callers read just their rows.
+    """
+
+    def __init__(self, interpreter, backend: str = 'tflite_xnnpack',
+                 factory: Optional[Callable[[], Any]] = None):
+        self.interpreter = interpreter
+        self.backend = backend
+        self.factory = factory
+        self._single = interpreter
+        self._batched = None
+        self.runtime = TFLITE_BACKEND
+        self.input_details = None
+        self.output_details = None
+        self.embedding_detail: Optional[Dict[str, Any]] = None
+        self.batch_size = 1
+        self.refresh_details()
+
+    def refresh_details(self) -> None:
+        """Re-read tensor details after the interpreter was (re)allocated"""
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+        self.batch_size = int(self.input_details[0]['shape'][0])
+
+    def resize_input_batch(self, batch_size: int, force: bool = False) -> None:
+        """Make the input hold batch_size images, or at least that many when batches are padded"""
+        if self.factory is None:
+            if batch_size == self.batch_size and not force:
+                return
+            _resize_interpreter(self.interpreter, batch_size)
+            self.refresh_details()
+            return
+
+        if batch_size == 1:
+            if self.interpreter is self._single and self.batch_size == 1 and not force:
+                return
+            if force or int(self._single.get_input_details()[0]['shape'][0]) != 1:
+                _resize_interpreter(self._single, 1)
+            self.interpreter = self._single
+        else:
+            if self.interpreter is self._batched and self.batch_size >= batch_size and not force:
+                return
+            batched, self._batched = self._batched, None
+            if batched is None:
+                batched = self.factory()
+            if force or int(batched.get_input_details()[0]['shape'][0]) < batch_size:
+                # If this fails the interpreter is dropped; callers fall back to single images
+                _resize_interpreter(batched, batch_size)
+            self._batched = self.interpreter = batched
+        self.refresh_details()
+
+    def input_buffer(self) -> np.ndarray:
+        """Get a writable view of the input tensor
+
+        invoke() refuses to run while views on the interpreter's buffers
+        exist, so callers must drop the view before invoking.
+        """
+        return self.interpreter.tensor(self.input_details[0]['index'])()
+
+    def invoke(self) -> None:
+        """Run the model on the current input"""
+        self.interpreter.invoke()
+
+    def get_output(self) -> np.ndarray:
+        """Get a copy of the raw output tensor"""
+        return self.interpreter.get_tensor(self.output_details[0]['index'])
+
+    def get_embedding(self) -> np.ndarray:
+        """Get the penultimate-layer activations of the last invoke as float32 rows"""
+        embedding = self.interpreter.get_tensor(self.embedding_detail['index'])
+        embedding = embedding.reshape(embedding.shape[0], -1)
+
+        if embedding.dtype != np.float32:
+            scale, zero_point = self.embedding_detail['quantization']
+            embedding = (embedding.astype(np.float32) - zero_point) * (scale or 1.0)
+
+        return embedding
+
+class ArraySlot:
+    """Base for backends fed from a NumPy input array owned by the slot
+
+    Tensor details mirror the TFLite model's, so the detector can fill and
+    read every backend the same way.
+    """
+
+    runtime = 'unknown'
+
+    def __init__(self, backend: str, input_details: List[Dict[str, Any]],
+                 output_details: List[Dict[str, Any]]):
+        self.backend = backend
+        self.interpreter = None
+        self.input_details = [dict(detail, shape=np.array(detail['shape'])) for detail in input_details]
+        self.output_details = [dict(detail, shape=np.array(detail['shape'])) for detail in output_details]
+        self.batch_size = int(self.input_details[0]['shape'][0])
+        self._input = np.zeros(self.input_details[0]['shape'], dtype=self.input_details[0]['dtype'])
+        self._output: Optional[np.ndarray] = None
+
+    def resize_input_batch(self, batch_size: int, force: bool = False) -> None:
+        """Reallocate the input array for the given batch size"""
+        if batch_size == self.batch_size and not force:
+            return
+
+        resized = lambda detail: dict(detail, shape=np.array([batch_size] + list(detail['shape'][1:])))
+        self.input_details = [resized(self.input_details[0])] + self.input_details[1:]
+        self.output_details = [resized(self.output_details[0])] + self.output_details[1:]
+        self._input = np.zeros(self.input_details[0]['shape'], dtype=self.input_details[0]['dtype'])
+        self.batch_size = batch_size
+
+    def input_buffer(self) -> np.ndarray:
+        """Get the writable input array"""
+        return self._input
+
+    def get_output(self) -> np.ndarray:
+        """Get the output of the last invoke"""
+        return self._output
+
+class OpenCVDNNSlot(ArraySlot):
+    """The TFLite model executed by OpenCV's DNN module"""
+
+    runtime = f"opencv {cv2.__version__}"
+
+    def __init__(self, model_path: str, input_details: List[Dict[str, Any]],
+                 output_details: List[Dict[str, Any]]):
+        super().__init__('opencv_dnn', input_details, output_details)
+        if self._input.dtype != np.float32:
+            raise ValueError("OpenCV DNN backend needs a float32 input model")
+
+        self.interpreter = cv2.dnn.readNetFromTFLite(model_path)
+        self.interpreter.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.interpreter.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+
+    def invoke(self) -> None:
+        """Run the model on the current input"""
+        # OpenCV's TFLite importer converts the graph to NCHW, so the input must follow
+        self.interpreter.setInput(np.ascontiguousarray(self._input.transpose(0, 3, 1, 2)))
+        self._output = self.interpreter.forward().reshape(self.output_details[0]['shape'])
+
+class ONNXRuntimeSlot(ArraySlot):
+    """An ONNX export of the model (e.g. from tf2onnx) executed by ONNX Runtime"""
+
+    runtime = f"onnxruntime {onnxruntime.__version__}" if onnxruntime else 'onnxruntime'
+
+    def __init__(self, onnx_model_path: str, input_details: List[Dict[str, Any]],
+                 output_details: List[Dict[str, Any]], num_threads: Optional[int] = None):
+        if onnxruntime is None:
+            raise ImportError("onnxruntime is not installed")
+        if not Path(onnx_model_path).exists():
+            raise FileNotFoundError(f"ONNX model not found: {onnx_model_path}")
+
+        super().__init__('onnxruntime', input_details, output_details)
+
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = int(num_threads)
+        self.interpreter = onnxruntime.InferenceSession(
+            onnx_model_path, sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self._input_name = self.interpreter.get_inputs()[0].name
+        self._output_name = self.interpreter.get_outputs()[0].name
+
+    def invoke(self) -> None:
+        """Run the model on the current input"""
+        self._output = self.interpreter.run([self._output_name], {self._input_name: self._input})[0]
+
+def create_slot(backend: str, model_path: str, num_threads: Optional[int] = None,
+                onnx_model_path: Optional[str] = None, embeddings: bool = False,
+                embedding_tensor: Optional[str] = None):
+    """Create one inference slot for the named backend
+
+    With embeddings the slot also exposes penultimate-layer activations
+    through get_embedding(); only the TFLite backends support that.
+    """
+    if backend in TFLITE_BACKENDS:
+        factory = lambda: create_tflite_interpreter(model_path, num_threads,
+                                                    use_xnnpack=backend == 'tflite_xnnpack',
+                                                    preserve_all_tensors=embeddings)
+        slot = InterpreterSlot(factory(), backend, factory)
+        if embeddings:
+            slot.embedding_detail = find_embedding_tensor(interpreter, embedding_tensor)
+        return slot
+
+    if backend not in BACKEND_NAMES:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    if embeddings:
+        raise ValueError(f"Embedding extraction needs a TFLite backend, not {backend}")
+
+    # Other runtimes reuse the TFLite model's tensor shapes and quantization
+    reference = InterpreterSlot(create_tflite_interpreter(model_path, 1))
+    input_details, output_details = reference.input_details, reference.output_details
+    del reference
+
+    if backend == 'opencv_dnn':
+        return OpenCVDNNSlot(model_path, input_details, output_details)
+
+    onnx_model_path = onnx_model_path or str(Path(model_path).with_suffix('.onnx'))
+    return ONNXRuntimeSlot(onnx_model_path, input_details, output_details, num_threads)
+
+class InterpreterPool:
+    """Pool of inference slots shared by concurrent callers
+
+    Each slot owns its tensors, so a caller must check one out for the
+    whole fill/invoke/read sequence and return it afterwards. With
+    embeddings, one extra TFLite interpreter keeps its intermediate tensors
+    for get_embedding(); that disables tensor memory reuse, so the pooled
+    slots don't pay for it and callers that need embeddings share that one.
+    """
+
+    def __init__(self, model_path: str, size: int = 1,
+                 num_threads: Optional[int] = None, use_xnnpack: bool = True,
+                 backend: Optional[str] = None, onnx_model_path: Optional[str] = None,
+                 model_hash: Optional[str] = None, model_version: Optional[str] = None,
+                 embeddings: bool = False, embedding_tensor: Optional[str] = None):
+        self.model_path = model_path
+        self.model_hash = model_hash
+        self.model_version = model_version
+        self.size = max(1, int(size))
+        self.num_threads = num_threads
+        self.backend = backend or ('tflite_xnnpack' if use_xnnpack else 'tflite_builtin')
+        self.use_xnnpack = self.backend == 'tflite_xnnpack'
+        self.onnx_model_path = onnx_model_path
+        self.embeddings = embeddings
+        self.slots: List[Any] = []
+        self.embedding_slot = None
+        self._available: queue.Queue = queue.Queue()
+        self._embedding_available: queue.Queue = queue.Queue()
+
+        for _ in range(self.size):
+            slot = self._label(create_slot(self.backend, model_path, num_threads, onnx_model_path))
+            self.slots.append(slot)
+            self._available.put(slot)
+
+        if embeddings:
+            self.embedding_slot = self._label(create_slot(self.backend, model_path, num_threads, onnx_model_path,
+                                                          embeddings=True, embedding_tensor=embedding_tensor))
+            self._embedding_available.put(self.embedding_slot)
+
+    def _label(self, slot: Any) -> Any:
+        """Label a slot with the pool's model; results carry the model of the slot that produced them"""
+        slot.model_hash = self.model_hash
+        slot.model_version = self.model_version
+        return slot
+
+    @property
+    def all_slots(self) -> List[Any]:
+        """The pooled slots plus the embedding slot, if any"""
+        return self.slots + ([self.embedding_slot] if self.embedding_slot is not None else [])
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None, embeddings: bool = False) -> Iterator[Any]:
+        """Check out a slot for exclusive use, returning it on exit
+
+        With embeddings the embedding slot is checked out when the pool has
+        one, otherwise a regular slot.
+        """
+        available = self._embedding_available if embeddings and self.embedding_slot is not None else self._available
+        slot = available.get(timeout=timeout)
+        try:
+            yield slot
+        finally:
+            available.put(slot)
+
+def _random_input(detail: Dict[str, Any], rng: np.random.Generator) -> np.ndarray:
+    """Make a deterministic benchmark input for a tensor"""
+    dtype = np.dtype(detail['dtype'])
+    if dtype.kind == 'f':
+        return rng.random(detail['shape'], dtype=np.float32).astype(dtype)
+    info = np.iinfo(dtype)
+    return rng.integers(info.min, info.max, detail['shape'], endpoint=True, dtype=dtype)
+
+def _dequantize(output: np.ndarray, detail: Dict[str, Any]) -> np.ndarray:
+    """Convert a raw output to float scores"""
+    if output.dtype == np.float32:
+        return output
+    scale, zero_point = detail['quantization']
+    return (output.astype(np.float32) - zero_point) * scale
+
+def benchmark_backends(model_path: str, candidates: List[str], num_threads: Optional[int] = None,
+                       batch_size: int = 1, iterations: int = 10, tolerance: float = 0.02,
+                       onnx_model_path: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+    """Time each candidate backend on the model and check it agrees with the first one
+
+    Every backend gets the same random input; a backend whose scores differ
+    from the reference by more than tolerance is reported but not eligible.
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    reference_output = None
+    benchmark_input = None
+
+    for backend in candidates:
+        try:
+            slot = create_slot(backend, model_path, num_threads, onnx_model_path)
+            try:
+                slot.resize_input_batch(batch_size)
+            except Exception:
+                slot.resize_input_batch(1, force=True)
+
+            if benchmark_input is None:
+                benchmark_input = _random_input(slot.input_details[0], np.random.default_rng(0))
+
+            buffer = slot.input_buffer()
+            buffer[...] = benchmark_input[:slot.batch_size]
+            del buffer
+
+            # The first invokes allocate and pack buffers, so keep them out of the timing
+            for _ in range(2):
+                slot.invoke()
+
+            latencies = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                slot.invoke()
+                latencies.append(time.perf_counter() - start)
+
+            output = _dequantize(slot.get_output(), slot.output_details[0])
+            if reference_output is None:
+                reference_output = output
+            rows = min(len(output), len(reference_output))
+            difference = float(np.abs(output[:rows] - reference_output[:rows]).max())
+
+            results[backend] = {
+                'available': True,
+                'runtime': slot.runtime,
+                'batch_size': slot.batch_size,
+                'latency_ms_per_image': round(float(np.median(latencies)) * 1000 / slot.batch_size, 3),
+                'max_abs_difference': round(difference, 6),
+                'eligible': difference <= tolerance
+            }
+
+        except Exception as e:
+            results[backend] = {'available': False, 'error': str(e)}
+
+    return results
+
+def _read_json_cache(cache_path: str) -> Dict[str, Any]:
+    """Read a JSON cache file, treating a missing or unreadable file as empty"""
+    cache_file = Path(cache_path)
+    if not cache_file.exists():
+        return {}
+    try:
+        with open(cache_file, 'r') as f:
+            return json.load(f)
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable cache {cache_file}: {e}")
+        return {}
+
+def _write_json_cache(cache_path: str, key: str, value: Dict[str, Any]) -> None:
+    """Store one entry in a JSON cache file"""
+    cache_file = Path(cache_path)
+    # Write atomically so concurrent detectors never read a partial file
+    try:
+        cached = _read_json_cache(cache_path)
+        cached[key] = value
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_path = cache_file.with_name(cache_file.name + '.tmp')
+        with open(temp_path, 'w') as f:
+            json.dump(cached, f, indent=2)
+        os.replace(temp_path, cache_file)
+    except OSError as e:
+        logger.warning(f"Could not write cache {cache_file}: {e}")
+
+def _selection_key(model_hash: str, candidates: List[str], num_threads: Optional[int]) -> str:
+    """Key a cached selection by model, hardware and the settings that affect timing
+
+    Batch size is left out: latency is compared per image, and auto-tuning
+    changes the batch size after the backend is picked.
+    """
+    return json.dumps({
+        'model_hash': model_hash,
+        'cpu_model': get_cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'tflite_runtime': TFLITE_BACKEND,
+        'candidates': candidates,
+        'num_threads': num_threads
+    }, sort_keys=True)
+
+def select_backend(model_path: str, model_hash: str, cache_path: str, candidates: List[str],
+                   num_threads: Optional[int] = None, batch_size: int = 1,
+                   iterations: int = 10, tolerance: float = 0.02,
+                   onnx_model_path: Optional[str] = None) -> Dict[str, Any]:
+    """Pick the fastest eligible backend, reusing a cached benchmark when possible"""
+    key = _selection_key(model_hash, candidates, num_threads)
+    cached = _read_json_cache(cache_path)
+    if key in cached:
+        return dict(cached[key], cached=True)
+
+    logger.info(f"Benchmarking inference backends: {', '.join(candidates)}")
+    results = benchmark_backends(model_path, candidates, num_threads, batch_size,
+                                 iterations, tolerance, onnx_model_path)
+    eligible = {name: result for name, result in results.items() if result.get('eligible')}
+    if not eligible:
+        raise RuntimeError(f"No inference backend could run the model: {results}")
+
+    selection = {
+        'backend': min(eligible, key=lambda name: eligible[name]['latency_ms_per_image']),
+        'results': results,
+        'measured_at': datetime.now().isoformat()
+    }
+
+    _write_json_cache(cache_path, key, selection)
+    return dict(selection, cached=False)
+
+def _tuning_key(model_hash: str, backend: str) -> str:
+    """Key tuned parameters by model, hardware and inference backend"""
+    return json.dumps({
+        'model_hash': model_hash,
+        'cpu_model': get_cpu_model(),
+        'cpu_count': os.cpu_count(),
+        'tflite_runtime': TFLITE_BACKEND,
+        'backend': backend
+    }, sort_keys=True)
+
+def load_tuning(cache_path: str, model_hash: str, backend: str) -> Optional[Dict[str, Any]]:
+    """Get the tuned parameters saved for this model on this machine, if any"""
+    return _read_json_cache(cache_path).get(_tuning_key(model_hash, backend))
+
+def save_tuning(cache_path: str, model_hash: str, backend: str, tuning: Dict[str, Any]) -> None:
+    """Save tuned parameters for this model on this machine"""
+    _write_json_cache(cache_path, _tuning_key(model_hash, backend), tuning)
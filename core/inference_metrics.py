@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Inference Metrics Module
+This module records per-stage inference latencies in fixed-size histograms
+so percentiles and throughput can be reported without keeping every sample.
+"""
+
+import os
+import json
+import math
+import time
+import bisect
+import logging
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, List, Optional
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+class LatencyHistogram:
+    """Log-bucketed latency histogram with constant memory
+
+    Bucket bounds grow geometrically, so percentiles are accurate to within
+    the growth factor (10% by default) across microseconds to minutes.
+    """
+
+    def __init__(self, min_seconds: float = 1e-6, max_seconds: float = 100.0, growth: float = 1.1):
+        bucket_count = int(math.ceil(math.log(max_seconds / min_seconds) / math.log(growth))) + 1
+        self.bounds: List[float] = [min_seconds * growth ** i for i in range(bucket_count)]
+        self.counts: List[int] = [0] * (bucket_count + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        """Record one latency sample"""
+        index = bisect.bisect_left(self.bounds, seconds)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.total += seconds
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Approximate the q-th percentile (0-100) in seconds"""
+        with self._lock:
+            if self.count == 0:
+                return 0.0
+
+            rank = q / 100.0 * self.count
+            cumulative = 0
+            for index, bucket_count in enumerate(self.counts):
+                cumulative += bucket_count
+                if cumulative >= rank and bucket_count:
+                    # Report the bucket's upper bound, never above the observed max
+                    upper = self.bounds[index] if index < len(self.bounds) else self.max
+                    return min(upper, self.max)
+
+            return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        """Get count, mean and percentile latencies in milliseconds"""
+        to_ms = lambda seconds: round(seconds * 1000, 3)
+        return {
+            'count': self.count,
+            'mean_ms': to_ms(self.total / self.count) if self.count else 0.0,
+            'p50_ms': to_ms(self.percentile(50)),
+            'p95_ms': to_ms(self.percentile(95)),
+            'p99_ms': to_ms(self.percentile(99)),
+            'max_ms': to_ms(self.max)
+        }
+
+def load_published_metrics(path: str) -> Optional[Dict[str, Any]]:
+    """Read a snapshot written by InferenceMetrics.publish, or None if there is none"""
+    try:
+        with open(path) as f:
+            snapshot = json.load(f)
+    except (OSError, ValueError):
+        return None
+    snapshot['age_s'] = round(time.time() - snapshot.get('published_at', 0), 1)
+    return snapshot
+
+class InferenceMetrics:
+    """Per-stage latency histograms and throughput counters for a detector
+
+    With a publish_path, the summary is written there at most every
+    publish_interval seconds while images are scored, so other processes
+    can report the metrics of the process that actually scores.
+    """
+
+    STAGES = ('decode', 'resize', 'normalize', 'invoke', 'postprocess')
+
+    def __init__(self, publish_path: Optional[str] = None, publish_interval: float = 10.0):
+        self.publish_path = publish_path
+        self.publish_interval = publish_interval
+        self._last_publish = 0.0
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        """Start a fresh measurement window"""
+        with self._lock:
+            self.started_at = time.time()
+            self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+            self.images = 0
+            self.invocations = 0
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """Time the enclosed block into a stage histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.histograms[stage].record(time.perf_counter() - start)
+
+    def add_images(self, count: int = 1) -> None:
+        """Count images that produced a detection result"""
+        with self._lock:
+            self.images += count
+            due = (self.publish_path is not None and
+                   time.monotonic() - self._last_publish >= self.publish_interval)
+            if due:
+                self._last_publish = time.monotonic()
+        if due:
+            self.publish()
+
+    def add_invocation(self) -> None:
+        """Count one interpreter invoke"""
+        with self._lock:
+            self.invocations += 1
+
+    def summary(self) -> Dict[str, Any]:
+        """Get throughput since start and per-stage latency percentiles"""
+        uptime = time.time() - self.started_at
+        return {
+            'since': self.started_at,
+            'uptime_s': round(uptime, 1),
+            'images_scored': self.images,
+            'invocations': self.invocations,
+            'throughput_images_per_s': round(self.images / uptime, 3) if uptime > 0 else 0.0,
+            'stages': {stage: histogram.summary() for stage, histogram in self.histograms.items()}
+        }
+
+    def publish(self) -> bool:
+        """Atomically write the summary to publish_path"""
+        if not self.publish_path:
+            return False
+
+        snapshot = dict(self.summary(), pid=os.getpid(), published_at=time.time())
+        temp_path = f"{self.publish_path}.{os.getpid()}.tmp"
+        try:
+            Path(self.publish_path).parent.mkdir(parents=True, exist_ok=True)
+            with open(temp_path, 'w') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, self.publish_path)
+            return True
+        except OSError as e:
+            logger.warning(f"Failed to publish inference metrics to {self.publish_path}: {e}")
+            return False
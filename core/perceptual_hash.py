@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Perceptual Hash Module
+This module computes 64-bit perceptual hashes of frames and keeps them in a
+multi-index hash table, so near-duplicate captures (fog, night, a covered
+lens) can be found by Hamming distance without comparing every pair.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Tuple, Optional, Any, Hashable
+
+import cv2
+import numpy as np
+
+HASH_METHODS = ('dhash', 'phash')
+
+# Hashes shared by every flat, structureless or pure-gradient frame
+DEGENERATE_HASHES = (0, (1 << 64) - 1)
+
+# Set-bit count of every byte value, for NumPy versions without bitwise_count
+_POPCOUNT8 = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1).astype(np.uint8)
+
+def _to_gray(image: np.ndarray, color_order: str = 'bgr') -> np.ndarray:
+    """Get a single-channel view of a grayscale, BGR or RGB image"""
+    if image.ndim == 3:
+        if color_order == 'rgb':
+            return cv2.cvtColor(image, cv2.COLOR_RGB2GRAY)
+        if color_order == 'bgr':
+            return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        raise ValueError(f"Unknown color order: {color_order}")
+    return image
+
+def pack_bits(bits: np.ndarray) -> np.ndarray:
+    """Pack boolean arrays of shape (..., 8, 8) into uint64 hashes, first bit most significant"""
+    packed = np.packbits(bits.reshape(*bits.shape[:-2], 64), axis=-1)
+    return packed.view('>u8')[..., 0].astype(np.uint64)
+
+def hamming_distance(hash_value: int, hashes: np.ndarray) -> np.ndarray:
+    """Hamming distance from one hash to each of an array of uint64 hashes"""
+    diff = np.bitwise_xor(np.asarray(hashes, dtype=np.uint64), np.uint64(hash_value))
+    if hasattr(np, 'bitwise_count'):
+        return np.bitwise_count(diff).astype(np.int64)
+    return _POPCOUNT8[diff.reshape(-1, 1).view(np.uint8)].sum(axis=1, dtype=np.int64).reshape(diff.shape)
+
+def dhash(image: np.ndarray, flat_threshold: float = 2.0, color_order: str = 'bgr') -> int:
+    """Difference hash: sign of the horizontal gradient on a 9x8 thumbnail
+
+    Frames whose thumbnail is flat (standard deviation below flat_threshold
+    gray levels, e.g. a covered lens or a black night frame) have no stable
+    gradient signs and all hash to 0, so they match each other. Fine noise
+    averages out in the thumbnail, so noisy or low-texture frames hash to 0
+    as well; see is_degenerate_hash. color_order is 'bgr' for cv2 decodes
+    or 'rgb' for model input frames.
+    """
+    thumbnail = cv2.resize(_to_gray(image, color_order), (9, 8), interpolation=cv2.INTER_AREA).astype(np.float32)
+    if thumbnail.std() < flat_threshold:
+        return 0
+    return int(pack_bits(thumbnail[:, 1:] > thumbnail[:, :-1]))
+
+def phash(image: np.ndarray, flat_threshold: float = 2.0, color_order: str = 'bgr') -> int:
+    """DCT hash: low-frequency DCT coefficients of a 32x32 thumbnail against their median
+
+    More robust than dhash to gamma and contrast changes, at the cost of a
+    DCT per frame. Flat frames hash to 0 as in dhash.
+    """
+    thumbnail = cv2.resize(_to_gray(image, color_order), (32, 32), interpolation=cv2.INTER_AREA).astype(np.float32)
+    if thumbnail.std() < flat_threshold:
+        return 0
+    low = cv2.dct(thumbnail)[:8, :8]
+    # The DC term only tracks overall brightness; keep it out of the median
+    return int(pack_bits(low > np.median(low.ravel()[1:])))
+
+def is_degenerate_hash(hash_value: int) -> bool:
+    """Whether a hash is all zeros or all ones
+
+    Such hashes carry no information about the scene, so they must not be
+    used to decide that two frames show the same thing.
+    """
+    return hash_value in DEGENERATE_HASHES
+
+def compute_hash(image: np.ndarray, method: str = 'dhash', color_order: str = 'bgr') -> int:
+    """Hash a decoded image with the named method"""
+    if method == 'phash':
+        return phash(image, color_order=color_order)
+    if method == 'dhash':
+        return dhash(image, color_order=color_order)
+    raise ValueError(f"Unknown perceptual hash method: {method}")
+
+def hash_image_file(image_path: str, method: str = 'dhash') -> Optional[int]:
+    """Hash an image file, decoding JPEGs at 1/8 scale since only a thumbnail is needed"""
+    image = cv2.imread(image_path, cv2.IMREAD_REDUCED_GRAYSCALE_8)
+    if image is None:
+        return None
+    return compute_hash(image, method)
+
+class PerceptualHashIndex:
+    """Multi-index hash table over 64-bit hashes
+
+    Each hash is split into max_distance + 1 disjoint bit chunks with one
+    exact-match table per chunk. Two hashes within max_distance bits must
+    agree exactly on at least one chunk, so a query only verifies the
+    entries sharing a chunk with it instead of scanning the whole index.
+    Entries are evicted oldest first once max_entries is reached.
+    """
+
+    def __init__(self, max_distance: int = 4, max_entries: Optional[int] = None):
+        if not 0 <= max_distance < 64:
+            raise ValueError("max_distance must be between 0 and 63")
+
+        self.max_distance = max_distance
+        self.max_entries = max_entries
+        self._chunks = [(int(bits[0]), len(bits)) for bits in np.array_split(np.arange(64), max_distance + 1)]
+        self._tables: List[Dict[int, set]] = [{} for _ in self._chunks]
+        self._entries: 'OrderedDict[Hashable, Tuple[int, Any]]' = OrderedDict()
+        self.total_queries = 0
+        self.total_matches = 0
+        self._lock = threading.Lock()
+
+    def _chunk_values(self, hash_value: int) -> List[int]:
+        """Split a hash into its per-table chunk values"""
+        return [(hash_value >> start) & ((1 << width) - 1) for start, width in self._chunks]
+
+    def add(self, key: Hashable, hash_value: int, payload: Any = None) -> None:
+        """Insert or replace an entry"""
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+
+            self._entries[key] = (hash_value, payload)
+            for table, value in zip(self._tables, self._chunk_values(hash_value)):
+                table.setdefault(value, set()).add(key)
+
+            while self.max_entries and len(self._entries) > self.max_entries:
+                self._remove_locked(next(iter(self._entries)))
+
+    def remove(self, key: Hashable) -> None:
+        """Drop an entry if present"""
+        with self._lock:
+            if key in self._entries:
+                self._remove_locked(key)
+
+    def _remove_locked(self, key: Hashable) -> None:
+        """Drop an entry from every table (lock held)"""
+        hash_value, _ = self._entries.pop(key)
+        for table, value in zip(self._tables, self._chunk_values(hash_value)):
+            keys = table[value]
+            keys.discard(key)
+            if not keys:
+                del table[value]
+
+    def query(self, hash_value: int, max_distance: Optional[int] = None) -> List[Tuple[Hashable, int, Any]]:
+        """Get (key, distance, payload) of entries within max_distance, nearest first"""
+        max_distance = self.max_distance if max_distance is None else max_distance
+
+        with self._lock:
+            self.total_queries += 1
+            if max_distance > self.max_distance:
+                # Beyond the pigeonhole guarantee; verify every entry
+                candidates = list(self._entries)
+            else:
+                candidates = set()
+                for table, value in zip(self._tables, self._chunk_values(hash_value)):
+                    candidates.update(table.get(value, ()))
+                candidates = list(candidates)
+
+            if not candidates:
+                return []
+
+            entries = [self._entries[key] for key in candidates]
+            distances = hamming_distance(hash_value, np.array([entry[0] for entry in entries], dtype=np.uint64))
+
+            matches = [
+                (candidates[i], int(distances[i]), entries[i][1])
+                for i in np.flatnonzero(distances <= max_distance)
+            ]
+            if matches:
+                self.total_matches += 1
+
+        return sorted(matches, key=lambda match: match[1])
+
+    def nearest(self, hash_value: int, max_distance: Optional[int] = None) -> Optional[Tuple[Hashable, int, Any]]:
+        """Get the closest entry within max_distance, or None"""
+        matches = self.query(hash_value, max_distance)
+        return matches[0] if matches else None
+
+    def clear(self) -> None:
+        """Drop all entries"""
+        with self._lock:
+            self._entries.clear()
+            for table in self._tables:
+                table.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get index settings and match counters"""
+        return {
+            'max_distance': self.max_distance,
+            'max_entries': self.max_entries,
+            'entries': len(self._entries),
+            'queries': self.total_queries,
+            'near_duplicates': self.total_matches,
+            'near_duplicate_rate': self.total_matches / self.total_queries if self.total_queries else 0
+        }
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Region of Interest Module
+This module restricts detection to the slope a camera is watching, by
+cropping frames to the ROI bounding box and masking pixels outside it.
+"""
+
+import threading
+from typing import Dict, List, Tuple, Optional, Any
+
+import cv2
+import numpy as np
+
+class RegionOfInterest:
+    """Per-camera region of interest given as polygons or bounding boxes
+
+    Config format::
+
+        {"polygons": [[[x, y], ...], ...]}      # or a single "polygon"
+        {"boxes": [[x0, y0, x1, y1], ...]}
+        {"boxes": [...], "resolution": [2592, 1944]}
+
+    Coordinates are fractions of the frame size, or pixels at 'resolution'
+    when it is given, so the same ROI holds at any decode scale. The
+    detector ignores an ROI with "enabled": false, so one can be kept in
+    config without being applied.
+    """
+
+    def __init__(self, roi_config: Dict[str, Any]):
+        scale_x, scale_y = 1.0, 1.0
+        if roi_config.get('resolution'):
+            width, height = roi_config['resolution']
+            scale_x, scale_y = 1.0 / width, 1.0 / height
+
+        polygons = list(roi_config.get('polygons', []))
+        if roi_config.get('polygon'):
+            polygons.append(roi_config['polygon'])
+        for x0, y0, x1, y1 in roi_config.get('boxes', []):
+            polygons.append([[x0, y0], [x1, y0], [x1, y1], [x0, y1]])
+
+        if not polygons:
+            raise ValueError("ROI needs at least one polygon or box")
+
+        self.polygons: List[np.ndarray] = [
+            np.clip(np.asarray(polygon, dtype=np.float64) * (scale_x, scale_y), 0.0, 1.0)
+            for polygon in polygons
+        ]
+
+        points = np.concatenate(self.polygons)
+        self.bounds: Tuple[float, float, float, float] = (
+            float(points[:, 0].min()), float(points[:, 1].min()),
+            float(points[:, 0].max()), float(points[:, 1].max())
+        )
+        if self.bounds[2] <= self.bounds[0] or self.bounds[3] <= self.bounds[1]:
+            raise ValueError("ROI has zero area")
+
+        self._masks: Dict[Tuple[int, int], Optional[np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def crop_rect(self, width: int, height: int) -> Tuple[int, int, int, int]:
+        """Get the ROI bounding box in pixels of a width x height frame"""
+        x0, y0, x1, y1 = self.bounds
+        # Round off float error first, so pixel ROIs map back onto their own pixels
+        left, top = int(round(x0 * width, 6)), int(round(y0 * height, 6))
+        right = max(left + 1, int(np.ceil(round(x1 * width, 6))))
+        bottom = max(top + 1, int(np.ceil(round(y1 * height, 6))))
+        return left, top, right, bottom
+
+    def crop_size(self, width: int, height: int) -> Tuple[int, int]:
+        """Get the size of the ROI bounding box in a width x height frame"""
+        left, top, right, bottom = self.crop_rect(width, height)
+        return right - left, bottom - top
+
+    def crop(self, image: np.ndarray) -> np.ndarray:
+        """Crop an image to the ROI bounding box (a view, not a copy)"""
+        left, top, right, bottom = self.crop_rect(image.shape[1], image.shape[0])
+        return image[top:bottom, left:right]
+
+    def get_mask(self, width: int, height: int) -> Optional[np.ndarray]:
+        """Get the 0/1 mask for a cropped frame resized to width x height
+
+        Masks are rasterized once per size and reused. None means the ROI
+        fills its bounding box, so there is nothing to mask.
+        """
+        with self._lock:
+            if (width, height) in self._masks:
+                return self._masks[(width, height)]
+
+            x0, y0, x1, y1 = self.bounds
+            mask = np.zeros((height, width), dtype=np.uint8)
+            for polygon in self.polygons:
+                # Map ROI coordinates into the resized crop
+                points = (polygon - (x0, y0)) / (x1 - x0, y1 - y0) * (width, height)
+                cv2.fillPoly(mask, [np.round(points).astype(np.int32)], 1)
+
+            mask = None if mask.all() else mask[..., np.newaxis]
+            self._masks[(width, height)] = mask
+            return mask
+
+    def apply_mask(self, frame: np.ndarray) -> np.ndarray:
+        """Zero pixels outside the ROI in place"""
+        mask = self.get_mask(frame.shape[1], frame.shape[0])
+        if mask is not None:
+            np.multiply(frame, mask, out=frame)
+        return frame
+
+    def to_config(self) -> Dict[str, Any]:
+        """Get the normalized ROI polygons, e.g. for cache keys"""
+        return {'polygons': [np.round(polygon, 6).tolist() for polygon in self.polygons]}
@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""
+Detection Results Store Module
+This module keeps an append-only, indexed history of detection results on
+the node, so history questions are answered by queries instead of
+rescoring images.
+"""
+
+import time
+import atexit
+import sqlite3
+import logging
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Any, Optional, List, Union
+
+from PIL import Image
+
+# Configure logging
+logger = logging.getLogger(__name__)
+
+TimeValue = Union[str, float, int, datetime, None]
+
+EXIF_IFD = 0x8769
+EXIF_DATETIME = 306
+EXIF_DATETIME_ORIGINAL = 36867
+
+def to_epoch(value: TimeValue) -> Optional[float]:
+    """Convert an ISO timestamp, datetime or epoch seconds to epoch seconds"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+def capture_time(image_path: Optional[str]) -> Optional[float]:
+    """Get when an image was captured, from EXIF or else the file modification time
+
+    Returns None for paths that aren't files, such as archive members.
+    """
+    if not image_path:
+        return None
+    try:
+        path = Path(image_path)
+        if not path.is_file():
+            return None
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+
+    try:
+        with Image.open(path) as image:
+            exif = image.getexif()
+            value = exif.get_ifd(EXIF_IFD).get(EXIF_DATETIME_ORIGINAL) or exif.get(EXIF_DATETIME)
+        if value:
+            return datetime.strptime(str(value).strip('\x00 '), '%Y:%m:%d %H:%M:%S').timestamp()
+    except (OSError, ValueError, SyntaxError):
+        # Not an image PIL can read, or a malformed EXIF date
+        pass
+    return mtime
+
+class DetectionResultStore:
+    """Append-only SQLite store of detection results
+
+    Inserts are buffered and written in one transaction per batch, once
+    batch_size results are pending or flush_interval seconds have passed.
+    Queries flush first, so they always see every recorded result. Results
+    are stored at the image's capture time, falling back to the time they
+    were scored when the image file can't be read.
+    """
+
+    COLUMNS = ('timestamp', 'camera', 'image_path', 'prediction', 'confidence', 'landslide_probability',
+               'landslide_detected', 'alert_triggered', 'decision_stage', 'model_version')
+
+    def __init__(self, db_path: str, camera_id: str = 'default',
+                 batch_size: int = 50, flush_interval: float = 10.0):
+        self.db_path = db_path
+        self.camera_id = camera_id
+        self.batch_size = max(1, int(batch_size))
+        self.flush_interval = flush_interval
+        self._pending: List[tuple] = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript('''
+            CREATE TABLE IF NOT EXISTS detection_results (
+                id INTEGER PRIMARY KEY,
+                timestamp REAL NOT NULL,
+                camera TEXT NOT NULL,
+                image_path TEXT,
+                prediction TEXT NOT NULL,
+                confidence REAL NOT NULL,
+                landslide_probability REAL,
+                landslide_detected INTEGER NOT NULL,
+                alert_triggered INTEGER,
+                decision_stage TEXT,
+                model_version TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_results_timestamp ON detection_results (timestamp);
+            CREATE INDEX IF NOT EXISTS idx_results_camera ON detection_results (camera, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_results_prediction ON detection_results (prediction, timestamp);
+            CREATE INDEX IF NOT EXISTS idx_results_confidence ON detection_results (prediction, confidence);
+            CREATE INDEX IF NOT EXISTS idx_results_detections
+                ON detection_results (timestamp, camera, confidence) WHERE landslide_detected = 1;
+            CREATE TRIGGER IF NOT EXISTS detection_results_no_update
+                BEFORE UPDATE ON detection_results
+                BEGIN SELECT RAISE(ABORT, 'detection_results is append-only'); END;
+            CREATE TRIGGER IF NOT EXISTS detection_results_no_delete
+                BEFORE DELETE ON detection_results
+                BEGIN SELECT RAISE(ABORT, 'detection_results is append-only'); END;
+        ''')
+        self._conn.commit()
+
+        # Don't lose queued results when the process exits between flushes
+        atexit.register(self.close)
+
+    def add(self, result: Dict[str, Any], camera: Optional[str] = None) -> None:
+        """Queue one successful detection result for insertion"""
+        if not result.get('success', False):
+            return
+
+        row = (
+            capture_time(result.get('image_path')) or to_epoch(result.get('timestamp')) or time.time(),
+            camera or self.camera_id,
+            result.get('image_path'),
+            result.get('prediction', 'unknown'),
+            float(result.get('confidence', 0.0)),
+            result.get('all_predictions', {}).get('landslide'),
+            int(bool(result.get('landslide_detected', False))),
+            int(result['alert_triggered']) if 'alert_triggered' in result else None,
+            result.get('decision_stage'),
+            result.get('model_version')
+        )
+
+        with self._lock:
+            self._pending.append(row)
+            due = (len(self._pending) >= self.batch_size or
+                   time.monotonic() - self._last_flush >= self.flush_interval)
+            if due:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write all queued results"""
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        """Insert queued results in one transaction (lock held)"""
+        self._last_flush = time.monotonic()
+        if not self._pending:
+            return
+
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    f"INSERT INTO detection_results ({', '.join(self.COLUMNS)}) "
+                    f"VALUES ({', '.join('?' * len(self.COLUMNS))})",
+                    self._pending
+                )
+            self._pending = []
+        except sqlite3.Error as e:
+            # Keep the rows queued and retry with the next flush
+            logger.error(f"Failed to write {len(self._pending)} detection results: {e}")
+
+    def _filters(self, start: TimeValue, end: TimeValue, camera: Optional[str],
+                 prediction: Optional[str] = None) -> tuple:
+        """Build a WHERE clause and parameters for the common filters"""
+        clauses, params = [], []
+        if to_epoch(start) is not None:
+            clauses.append('timestamp >= ?')
+            params.append(to_epoch(start))
+        if to_epoch(end) is not None:
+            clauses.append('timestamp < ?')
+            params.append(to_epoch(end))
+        if camera:
+            clauses.append('camera = ?')
+            params.append(camera)
+        if prediction:
+            clauses.append('prediction = ?')
+            params.append(prediction)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        return where, params
+
+    def _rows(self, sql: str, params: list) -> List[Dict[str, Any]]:
+        """Run a query after flushing queued results"""
+        with self._lock:
+            self._flush_locked()
+            rows = self._conn.execute(sql, params).fetchall()
+
+        results = []
+        for row in rows:
+            record = dict(row)
+            if 'timestamp' in record:
+                record['timestamp'] = datetime.fromtimestamp(record['timestamp']).isoformat()
+            for flag in ('landslide_detected', 'alert_triggered'):
+                if record.get(flag) is not None:
+                    record[flag] = bool(record[flag])
+            results.append(record)
+        return results
+
+    def query(self, start: TimeValue = None, end: TimeValue = None, camera: Optional[str] = None,
+              prediction: Optional[str] = None, landslide_only: bool = False,
+              limit: int = 100, offset: int = 0) -> List[Dict[str, Any]]:
+        """Get results in a time range, newest first"""
+        where, params = self._filters(start, end, camera, prediction)
+        if landslide_only:
+            where = f"{where} AND landslide_detected = 1" if where else 'WHERE landslide_detected = 1'
+        return self._rows(
+            f'SELECT * FROM detection_results {where} ORDER BY timestamp DESC LIMIT ? OFFSET ?',
+            params + [int(limit), int(offset)]
+        )
+
+    def top_confidence(self, n: int = 10, start: TimeValue = None, end: TimeValue = None,
+                       camera: Optional[str] = None, prediction: str = 'landslide') -> List[Dict[str, Any]]:
+        """Get the n most confident results for a prediction class"""
+        where, params = self._filters(start, end, camera, prediction)
+        return self._rows(
+            f'SELECT * FROM detection_results {where} ORDER BY confidence DESC LIMIT ?',
+            params + [int(n)]
+        )
+
+    def detections_per_day(self, start: TimeValue = None, end: TimeValue = None,
+                           camera: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Count landslide detections per local calendar day"""
+        where, params = self._filters(start, end, camera)
+        where = f"{where} AND landslide_detected = 1" if where else 'WHERE landslide_detected = 1'
+        # Detections are rare, so the partial index beats the camera index
+        return self._rows(
+            f"SELECT date(timestamp, 'unixepoch', 'localtime') AS day, COUNT(*) AS detections, "
+            f"MAX(confidence) AS max_confidence FROM detection_results "
+            f"INDEXED BY idx_results_detections {where} GROUP BY day ORDER BY day",
+            params
+        )
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get the number of stored results and the time span they cover"""
+        with self._lock:
+            self._flush_locked()
+            # Rows are never deleted, so the largest id is the row count
+            count, first, last = self._conn.execute(
+                'SELECT (SELECT MAX(id) FROM detection_results), '
+                '(SELECT MIN(timestamp) FROM detection_results), '
+                '(SELECT MAX(timestamp) FROM detection_results)'
+            ).fetchone()
+
+        return {
+            'db_path': self.db_path,
+            'camera_id': self.camera_id,
+            'results': count or 0,
+            'first_result': datetime.fromtimestamp(first).isoformat() if first else None,
+            'last_result': datetime.fromtimestamp(last).isoformat() if last else None,
+            'pending': len(self._pending)
+        }
+
+    def close(self) -> None:
+        """Flush queued results and close the database connection"""
+        atexit.unregister(self.close)
+        with self._lock:
+            self._flush_locked()
+            self._conn.close()
@@ -33,7 +33,11 @@ def setup_web_interface():
     
     # Copy core files to web directory
     print("Copying core monitoring files...")
-    core_files = ["camera_controller.py", "scheduler.py", "config.json"]
+    core_files = ["camera_controller.py", "scheduler.py", "config.json",
+                  "ai_landslide_detector.py", "detection_cache.py", "inference_metrics.py",
+                  "frame_gate.py", "displacement_detector.py",
+                  "region_of_interest.py", "inference_backends.py", "results_store.py",
+                  "perceptual_hash.py", "embedding_index.py"]
     for file in core_files:
         if Path(file).exists():
             shutil.copy2(file, web_dir / file)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Tiny generated TFLite models and synthetic captures for the detector tests
+"""
+
+import cv2
+import numpy as np
+
+try:
+    import tensorflow as tf
+except ImportError:
+    tf = None
+
+INPUT_SIZE = 32
+
+def build_model(path: str, gain: float = 8.0, classes: int = 2) -> str:
+    """Write a classifier whose landslide score follows the red-minus-blue balance of a frame
+
+    The frame is averaged per channel and fed to a fixed fully connected
+    layer, so P(landslide) = sigmoid(2 * gain * (mean red - mean blue)) on
+    [0, 1] pixels. The batch dimension is dynamic, and the fully connected
+    layer gives the detector a penultimate tensor to read embeddings from.
+    """
+    weights = np.zeros((3, classes), dtype=np.float32)
+    weights[0, :2] = (-gain, gain)
+    weights[2, :2] = (gain, -gain)
+
+    @tf.function(input_signature=[tf.TensorSpec([None, INPUT_SIZE, INPUT_SIZE, 3], tf.float32)])
+    @tf.autograph.experimental.do_not_convert
+    def model(images):
+        pooled = tf.reduce_mean(images, axis=[1, 2])
+        return tf.nn.softmax(tf.matmul(pooled, tf.constant(weights)))
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([model.get_concrete_function()], model)
+    with open(path, 'wb') as f:
+        f.write(converter.convert())
+    return path
+
+def landslide_probability(red: float, blue: float, gain: float = 8.0) -> float:
+    """The landslide probability build_model gives a flat frame of these 0-255 levels"""
+    return float(1.0 / (1.0 + np.exp(-2.0 * gain * (red - blue) / 255.0)))
+
+def solid_frame(red: int, blue: int, width: int = 64, height: int = 48, green: int = 128) -> np.ndarray:
+    """A flat BGR frame, ready for cv2.imwrite"""
+    frame = np.empty((height, width, 3), dtype=np.uint8)
+    frame[...] = (blue, green, red)
+    return frame
+
+def scene_frame(width: int = 64, height: int = 48, phase: float = 0.0) -> np.ndarray:
+    """A smooth structured BGR scene whose perceptual hash isn't degenerate"""
+    y, x = np.mgrid[0:height, 0:width]
+    base = 128 + 60 * np.sin(x / (width / 7.0) + phase) * np.cos(y / (height / 7.0))
+    return np.dstack([base * 0.6, base * 0.8, base]).clip(0, 255).astype(np.uint8)
+
+def write_frame(path: str, frame: np.ndarray) -> str:
+    """Write a BGR frame to disk"""
+    cv2.imwrite(path, frame)
+    return path
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the archive scorer
+"""
+
+import io
+import os
+import csv
+import sys
+import shutil
+import tarfile
+import zipfile
+import tempfile
+import unittest
+
+import cv2
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from model_fixtures import tf, build_model, solid_frame
+
+if tf is not None:
+    from archive_scorer import ResultWriter, iter_archive_images, pyarrow, score_archive
+    from ai_landslide_detector import LandslideDetector
+
+def encode(red: int, blue: int) -> bytes:
+    """Encode a flat frame as PNG"""
+    return cv2.imencode('.png', solid_frame(red, blue))[1].tobytes()
+
+MEMBERS = [
+    ('captures/img_000.png', encode(220, 30)),
+    ('captures/img_001.png', encode(30, 220)),
+    ('captures/notes.txt', b'not an image'),
+    ('captures/img_002.jpg', b'truncated capture'),
+    ('captures/img_003.png', encode(250, 0))
+]
+IMAGE_NAMES = ['captures/img_000.png', 'captures/img_001.png', 'captures/img_002.jpg', 'captures/img_003.png']
+
+@unittest.skipIf(tf is None, 'tensorflow is needed to build the test model')
+class ArchiveScorerTest(unittest.TestCase):
+    """Streaming images out of tar and zip archives into result files"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.models_dir = tempfile.mkdtemp()
+        cls.detector = LandslideDetector({
+            'model_path': build_model(os.path.join(cls.models_dir, 'main.tflite')),
+            'auto_tune_enabled': False,
+            'inference_backend': 'tflite_builtin',
+            'batch_size': 2
+        })
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.models_dir, ignore_errors=True)
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.temp_dir.name, name)
+
+    def write_tar(self) -> str:
+        path = self.path('landslide_backup_20240501.tar.gz')
+        with tarfile.open(path, 'w:gz') as archive:
+            for name, data in MEMBERS:
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        return path
+
+    def write_zip(self) -> str:
+        path = self.path('export.zip')
+        with zipfile.ZipFile(path, 'w') as archive:
+            for name, data in MEMBERS:
+                archive.writestr(name, data)
+        return path
+
+    def test_only_image_members_are_read(self):
+        for archive_path in (self.write_tar(), self.write_zip()):
+            members = list(iter_archive_images(archive_path))
+            self.assertEqual([name for name, _ in members], IMAGE_NAMES)
+            self.assertEqual(members[0][1], MEMBERS[0][1])
+
+    def test_scores_archive_to_csv(self):
+        archive_path = self.write_tar()
+        writer = ResultWriter(self.path('results.csv'))
+        summary = score_archive(self.detector, archive_path, writer)
+        writer.close()
+
+        self.assertEqual(summary['images'], 4)
+        self.assertEqual(summary['failed'], 1)
+        self.assertEqual(summary['landslide_detections'], 2)
+        self.assertEqual(writer.rows_written, 4)
+
+        with open(self.path('results.csv'), newline='') as f:
+            rows = list(csv.DictReader(f))
+        self.assertEqual([row['member'] for row in rows], IMAGE_NAMES)
+        self.assertEqual({row['archive'] for row in rows}, {os.path.basename(archive_path)})
+        self.assertEqual([row['success'] for row in rows], ['True', 'True', 'False', 'True'])
+        self.assertEqual([row['prediction'] for row in rows], ['landslide', 'normal', 'unknown', 'landslide'])
+        self.assertTrue(rows[2]['error'])
+
+    @unittest.skipIf(tf is None or pyarrow is None, 'pyarrow is needed for Parquet output')
+    def test_scores_archive_to_parquet_in_row_groups(self):
+        import pyarrow.parquet as parquet
+
+        writer = ResultWriter(self.path('results.parquet'), row_group_size=3)
+        score_archive(self.detector, self.write_zip(), writer)
+        writer.close()
+
+        table = parquet.read_table(self.path('results.parquet'))
+        self.assertEqual(table.column('member').to_pylist(), IMAGE_NAMES)
+        self.assertEqual(table.column('landslide_detected').to_pylist(), [True, False, False, True])
+        self.assertEqual(parquet.ParquetFile(self.path('results.parquet')).num_row_groups, 2)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Unit tests for detector auto-tuning
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from model_fixtures import tf, build_model, solid_frame, write_frame
+
+if tf is not None:
+    from auto_tune import auto_tune, default_thread_counts, find_images
+    from ai_landslide_detector import LandslideDetector
+
+@unittest.skipIf(tf is None, 'tensorflow is needed to build the test model')
+class AutoTuneTest(unittest.TestCase):
+    """Sweeping parameters and applying the saved tuning"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.tuning_path = os.path.join(self.temp_dir.name, 'auto_tune.json')
+        self.config = {
+            'model_path': build_model(os.path.join(self.temp_dir.name, 'main.tflite')),
+            'inference_backend': 'tflite_builtin',
+            'auto_tune_path': self.tuning_path,
+            'decode_threads': 0
+        }
+        image_dir = os.path.join(self.temp_dir.name, 'images')
+        os.makedirs(image_dir)
+        self.image_paths = [
+            write_frame(os.path.join(image_dir, f'img_{i:03d}.jpg'), solid_frame(40 * i, 200, width=256, height=192))
+            for i in range(4)
+        ]
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def sweep(self, budget_ms: float, save: bool = True) -> dict:
+        return auto_tune(self.config, self.image_paths, budget_ms, batch_sizes=[1, 2, 8],
+                         thread_counts=[1], decode_scales=[1, 2], repeats=1, save=save)
+
+    def test_default_thread_counts(self):
+        with mock.patch('auto_tune.os.cpu_count', return_value=6):
+            self.assertEqual(default_thread_counts(), [1, 2, 4, 6])
+        with mock.patch('auto_tune.os.cpu_count', return_value=None):
+            self.assertEqual(default_thread_counts(), [1])
+
+    def test_find_images_keeps_the_newest(self):
+        image_dir = os.path.dirname(self.image_paths[0])
+        self.assertEqual(find_images(image_dir, 2), self.image_paths[-2:])
+
+    def test_fastest_case_within_budget_is_saved_and_applied(self):
+        tuning = self.sweep(budget_ms=1e6)
+
+        self.assertTrue(tuning['within_budget'])
+        # Batch sizes above the number of images are not swept
+        self.assertEqual([case['batch_size'] for case in tuning['cases']], [1, 2])
+        fastest = max(tuning['cases'], key=lambda case: case['images_per_s'])
+        self.assertEqual(tuning['batch_size'], fastest['batch_size'])
+        # Flat frames decode the same at any scale
+        self.assertTrue(tuning['decode_scales']['2']['agrees'])
+        self.assertEqual(tuning['max_decode_scale'], 2)
+
+        detector = LandslideDetector(dict(self.config, batch_size=16))
+        self.assertEqual(detector.tuning['measured_at'], tuning['measured_at'])
+        self.assertEqual(detector.batch_size, tuning['batch_size'])
+        self.assertEqual(detector.max_decode_scale, 2)
+
+        untuned = LandslideDetector(dict(self.config, batch_size=16, auto_tune_enabled=False))
+        self.assertIsNone(untuned.tuning)
+        self.assertEqual(untuned.batch_size, 16)
+
+    def test_lowest_latency_case_when_nothing_fits(self):
+        tuning = self.sweep(budget_ms=0, save=False)
+
+        self.assertFalse(tuning['within_budget'])
+        quickest = min(tuning['cases'], key=lambda case: case['batch_latency_ms']['p95'])
+        self.assertEqual(tuning['batch_size'], quickest['batch_size'])
+        self.assertFalse(os.path.exists(self.tuning_path))
+
+if __name__ == '__main__':
+    unittest.main()
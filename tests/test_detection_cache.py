@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the detection result cache
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from detection_cache import DetectionCache, hash_file
+
+class ModelKeyTest(unittest.TestCase):
+    """Key composition"""
+
+    def test_key_ignores_settings_order(self):
+        first = DetectionCache.make_model_key('abc', {'fast_decode': True, 'confidence_threshold': 0.7})
+        second = DetectionCache.make_model_key('abc', {'confidence_threshold': 0.7, 'fast_decode': True})
+        self.assertEqual(first, second)
+
+    def test_key_changes_with_model_hash(self):
+        settings = {'confidence_threshold': 0.7}
+        self.assertNotEqual(DetectionCache.make_model_key('abc', settings),
+                            DetectionCache.make_model_key('abd', settings))
+
+    def test_key_changes_with_settings(self):
+        self.assertNotEqual(DetectionCache.make_model_key('abc', {'confidence_threshold': 0.7}),
+                            DetectionCache.make_model_key('abc', {'confidence_threshold': 0.8}))
+        self.assertNotEqual(DetectionCache.make_model_key('abc', {}),
+                            DetectionCache.make_model_key('abc', {'roi': [[0, 0, 1, 1]]}))
+
+    def test_file_hash_follows_content(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            paths = [os.path.join(temp_dir, name) for name in ('a.jpg', 'b.jpg', 'c.jpg')]
+            for path, content in zip(paths, (b'frame one', b'frame one', b'frame two')):
+                with open(path, 'wb') as f:
+                    f.write(content)
+
+            self.assertEqual(hash_file(paths[0]), hash_file(paths[1]))
+            self.assertNotEqual(hash_file(paths[0]), hash_file(paths[2]))
+
+class DetectionCacheTest(unittest.TestCase):
+    """Lookups and LRU eviction"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'cache.db')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_round_trip_is_scoped_to_model_key(self):
+        cache = DetectionCache(self.db_path)
+        result = {'success': True, 'prediction': 'normal', 'confidence': 0.9}
+        cache.put_many({'img1': result}, 'model-a')
+
+        self.assertEqual(cache.get_many(['img1', 'img2'], 'model-a'), {'img1': result})
+        self.assertEqual(cache.get_many(['img1'], 'model-b'), {})
+
+        stats = cache.get_stats()
+        self.assertEqual((stats['hits'], stats['misses'], stats['entries']), (1, 2, 1))
+        cache.close()
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = DetectionCache(self.db_path, max_entries=2)
+        result = {'success': True}
+
+        with mock.patch('detection_cache.time.time', side_effect=[1.0, 2.0, 3.0, 4.0]):
+            cache.put_many({'a': result}, 'model')
+            cache.put_many({'b': result}, 'model')
+            # Reading 'a' makes 'b' the least recently used entry
+            cache.get_many(['a'], 'model')
+            cache.put_many({'c': result}, 'model')
+
+        self.assertEqual(set(cache.get_many(['a', 'b', 'c'], 'model')), {'a', 'c'})
+        self.assertEqual(cache.get_stats()['evictions'], 1)
+        cache.close()
+
+    def test_entries_persist_across_instances(self):
+        cache = DetectionCache(self.db_path)
+        cache.put_many({'img1': {'success': True}}, 'model')
+        cache.close()
+
+        reopened = DetectionCache(self.db_path)
+        self.assertIn('img1', reopened.get_many(['img1'], 'model'))
+        reopened.close()
+
+if __name__ == '__main__':
+    unittest.main()
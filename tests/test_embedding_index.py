@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the embedding store and its IVF index
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from embedding_index import EmbeddingStore, normalize_rows
+
+def clustered_vectors(rng: np.random.Generator, rows: int, dim: int, clusters: int) -> np.ndarray:
+    """Random unit vectors grouped around cluster centres, like embeddings of recurring scenes"""
+    centres = normalize_rows(rng.normal(size=(clusters, dim)))
+    return normalize_rows(centres[rng.integers(0, clusters, rows)] + 0.3 * rng.normal(size=(rows, dim)) / np.sqrt(dim))
+
+class EmbeddingStoreTest(unittest.TestCase):
+    """Search, exclusion and indexing"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.directory = self.temp_dir.name
+        # Indexing is triggered explicitly, never in the background
+        self.store = EmbeddingStore(os.path.join(self.directory, 'store'), min_index_rows=10 ** 9)
+        self.rng = np.random.default_rng(0)
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def add_rows(self, vectors: np.ndarray, start: int = 0) -> list:
+        paths = [os.path.join(self.directory, f'frame_{start + i:05d}.jpg') for i in range(len(vectors))]
+        records = [{'image_path': path, 'timestamp': f'2024-05-01T00:00:{i % 60:02d}',
+                    'prediction': 'normal', 'confidence': 0.9} for i, path in enumerate(paths)]
+        self.assertEqual(self.store.add(vectors, records), len(vectors))
+        return paths
+
+    def brute_force(self, vectors: np.ndarray, query: np.ndarray, k: int) -> list:
+        scores = normalize_rows(vectors) @ normalize_rows(query.reshape(1, -1))[0]
+        return list(np.argsort(-scores)[:k])
+
+    def test_exact_search_matches_brute_force(self):
+        vectors = clustered_vectors(self.rng, 500, 32, 10)
+        paths = self.add_rows(vectors)
+        for query in vectors[:10]:
+            results = self.store.search(query, k=5)
+            # float16 storage can swap near-ties, so compare as sets
+            self.assertEqual({result['image_path'] for result in results},
+                             {paths[i] for i in self.brute_force(vectors, query, 5)})
+
+    def test_ivf_recall_against_brute_force(self):
+        vectors = clustered_vectors(self.rng, 5000, 32, 50)
+        paths = self.add_rows(vectors)
+        self.store.build_index(n_lists=64)
+
+        queries = clustered_vectors(self.rng, 50, 32, 50)
+        recalls = []
+        for query in queries:
+            expected = {paths[i] for i in self.brute_force(vectors, query, 10)}
+            found = {result['image_path'] for result in self.store.search(query, k=10, nprobe=8)}
+            recalls.append(len(found & expected) / 10)
+        self.assertGreaterEqual(np.mean(recalls), 0.9)
+
+    def test_rows_added_after_indexing_are_searched(self):
+        vectors = clustered_vectors(self.rng, 2000, 32, 20)
+        self.add_rows(vectors)
+        self.store.build_index(n_lists=32)
+
+        new_vector = normalize_rows(self.rng.normal(size=(1, 32)))
+        new_path = self.add_rows(new_vector, start=len(vectors))[0]
+        results = self.store.search(new_vector[0], k=1, nprobe=1)
+        self.assertEqual(results[0]['image_path'], new_path)
+
+    def test_exclude_drops_the_query_image(self):
+        vectors = clustered_vectors(self.rng, 200, 16, 5)
+        paths = self.add_rows(vectors)
+        vector = self.store.get_vector(paths[7])
+
+        self.assertEqual(self.store.search(vector, k=3)[0]['image_path'], paths[7])
+        # The same file spelled differently is still excluded
+        other_spelling = os.path.join(self.directory, 'subdir', '..', os.path.basename(paths[7]))
+        results = self.store.search(vector, k=3, exclude=other_spelling)
+        self.assertEqual(len(results), 3)
+        self.assertNotIn(paths[7], [result['image_path'] for result in results])
+
+    def test_paths_are_normalized_on_add_and_lookup(self):
+        vectors = clustered_vectors(self.rng, 2, 16, 1)
+        path = os.path.join(self.directory, 'frame.jpg')
+        other_spelling = os.path.join(self.directory, '.', 'frame.jpg')
+        self.assertEqual(self.store.add(vectors[:1], [{'image_path': path}]), 1)
+        self.assertEqual(self.store.add(vectors[1:], [{'image_path': other_spelling}]), 0)
+        self.assertIsNotNone(self.store.get_vector(other_spelling))
+
+    def test_dimension_mismatch_is_rejected(self):
+        self.add_rows(clustered_vectors(self.rng, 3, 16, 1))
+        with self.assertRaises(ValueError):
+            self.store.add(np.ones((1, 8)), [{'image_path': 'other.jpg'}])
+        with self.assertRaises(ValueError):
+            self.store.search(np.ones(8))
+
+    def test_store_reopens_with_its_rows(self):
+        vectors = clustered_vectors(self.rng, 100, 16, 4)
+        paths = self.add_rows(vectors)
+        self.store.close()
+
+        self.store = EmbeddingStore(os.path.join(self.directory, 'store'), min_index_rows=10 ** 9)
+        self.assertEqual(self.store.count, 100)
+        self.assertEqual(self.store.search(vectors[42], k=1)[0]['image_path'], paths[42])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the frame difference gate
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from frame_gate import FrameDifferenceGate
+
+def frame(level: int) -> np.ndarray:
+    """A flat RGB frame at one gray level"""
+    return np.full((120, 160, 3), level, dtype=np.uint8)
+
+class FrameDifferenceGateTest(unittest.TestCase):
+    """Skipping frames that match the last scored one"""
+
+    def setUp(self):
+        self.gate = FrameDifferenceGate(threshold=0.02, size=16, max_skips=3)
+        self.result = {'success': True, 'prediction': 'normal'}
+
+    def test_first_frame_is_always_scored(self):
+        reference, difference, _ = self.gate.check(self.gate.thumbnail(frame(100)))
+        self.assertIsNone(reference)
+        self.assertIsNone(difference)
+
+    def test_similar_frames_reuse_the_reference_result(self):
+        self.gate.update(self.gate.thumbnail(frame(100)), self.result)
+
+        reference, difference, _ = self.gate.check(self.gate.thumbnail(frame(102)))
+        self.assertIs(reference, self.result)
+        self.assertAlmostEqual(difference, 2 / 255)
+
+        reference, difference, _ = self.gate.check(self.gate.thumbnail(frame(110)))
+        self.assertIsNone(reference)
+        self.assertAlmostEqual(difference, 10 / 255)
+
+    def test_drift_is_measured_against_the_last_scored_frame(self):
+        self.gate.update(self.gate.thumbnail(frame(100)), self.result)
+        # Each step is below the threshold, but the total drift is not
+        for level, skipped in ((103, True), (106, False)):
+            reference, _, _ = self.gate.check(self.gate.thumbnail(frame(level)))
+            self.assertEqual(reference is not None, skipped)
+
+    def test_rescores_after_max_skips(self):
+        thumbnail = self.gate.thumbnail(frame(100))
+        self.gate.update(thumbnail, self.result)
+
+        decisions = [self.gate.check(thumbnail)[0] is not None for _ in range(4)]
+        self.assertEqual(decisions, [True, True, True, False])
+
+        self.gate.update(thumbnail, self.result)
+        self.assertIsNotNone(self.gate.check(thumbnail)[0])
+
+        stats = self.gate.get_stats()
+        self.assertEqual((stats['checked'], stats['skipped']), (5, 4))
+
+    def test_reset_forgets_the_reference(self):
+        thumbnail = self.gate.thumbnail(frame(100))
+        self.gate.update(thumbnail, self.result)
+        self.gate.reset()
+        self.assertIsNone(self.gate.check(thumbnail)[0])
+
+if __name__ == '__main__':
+    unittest.main()
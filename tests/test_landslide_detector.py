@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the landslide detector, run against a tiny generated TFLite model
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from model_fixtures import (tf, INPUT_SIZE, build_model, landslide_probability, solid_frame,
+                            scene_frame, write_frame)
+
+if tf is not None:
+    from ai_landslide_detector import LandslideDetector
+
+models_dir = None
+
+def setUpModule():
+    global models_dir
+    if tf is None:
+        return
+    models_dir = tempfile.mkdtemp()
+    build_model(os.path.join(models_dir, 'main.tflite'), gain=8.0)
+    build_model(os.path.join(models_dir, 'fast.tflite'), gain=2.0)
+    build_model(os.path.join(models_dir, 'three_classes.tflite'), classes=3)
+
+def tearDownModule():
+    if models_dir:
+        shutil.rmtree(models_dir, ignore_errors=True)
+
+@unittest.skipIf(tf is None, 'tensorflow is needed to build the test model')
+class DetectorTestCase(unittest.TestCase):
+    """Detector on the tiny model, with captures written to a temporary directory"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.image_dir = self.temp_dir.name
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def make_detector(self, **config) -> 'LandslideDetector':
+        config = dict({
+            'model_path': os.path.join(models_dir, 'main.tflite'),
+            'auto_tune_enabled': False,
+            'inference_backend': 'tflite_builtin',
+            'batch_size': 4,
+            'decode_threads': 0
+        }, **config)
+        detector = LandslideDetector(config)
+        self.assertIsNotNone(detector.interpreter)
+        return detector
+
+    def write(self, name: str, frame: np.ndarray) -> str:
+        return write_frame(os.path.join(self.image_dir, name), frame)
+
+class BatchedInferenceTest(DetectorTestCase):
+    """Batched scoring against one image at a time"""
+
+    def test_batched_results_match_single_image_results(self):
+        detector = self.make_detector()
+        levels = [(200, 40), (40, 200), (128, 128), (150, 100), (90, 160), (255, 0), (0, 255)]
+        paths = [self.write(f'frame_{i}.png', solid_frame(red, blue)) for i, (red, blue) in enumerate(levels)]
+
+        single = [detector.detect_landslide(path) for path in paths]
+        # Seven images over batches of four: one full and one padded batch
+        batched = detector.batch_detect(paths)
+        # Alternating shapes must keep giving the same scores
+        again = [detector.detect_landslide(paths[0])] + detector.batch_detect(paths[1:3])
+
+        for (red, blue), one, batch in zip(levels, single, batched):
+            self.assertTrue(batch['success'])
+            self.assertEqual(batch['prediction'], one['prediction'])
+            self.assertAlmostEqual(batch['confidence'], one['confidence'], places=5)
+            self.assertAlmostEqual(batch['all_predictions']['landslide'],
+                                   landslide_probability(red, blue), places=2)
+        for result, one in zip(again, single):
+            self.assertAlmostEqual(result['confidence'], one['confidence'], places=5)
+
+    def test_failures_are_labelled_with_their_path(self):
+        detector = self.make_detector()
+        good = self.write('good.png', solid_frame(200, 40))
+        corrupt = os.path.join(self.image_dir, 'corrupt.jpg')
+        with open(corrupt, 'wb') as f:
+            f.write(b'not a jpeg')
+        missing = os.path.join(self.image_dir, 'missing.jpg')
+        paths = [good, corrupt, good, missing]
+
+        results = detector.batch_detect(paths)
+
+        self.assertEqual([result['image_path'] for result in results], paths)
+        self.assertEqual([result['success'] for result in results], [True, False, True, False])
+        for result in (results[1], results[3]):
+            self.assertEqual(result['prediction'], 'unknown')
+            self.assertEqual(result['confidence'], 0.0)
+            self.assertIn('error', result)
+
+class IncrementalAnalysisTest(DetectorTestCase):
+    """Watermarked time-series analysis"""
+
+    def test_only_new_images_are_scored(self):
+        detector = self.make_detector(incremental_analysis=True)
+        for i in range(3):
+            self.write(f'img_{i:03d}.jpg', solid_frame(220, 30))
+
+        first = detector.analyze_time_series(self.image_dir)
+        self.assertEqual(first['new_images'], 3)
+        self.assertEqual(first['watermark'], 'img_002.jpg')
+        self.assertEqual(first['landslide_detections'], 3)
+
+        self.write('img_003.jpg', solid_frame(30, 220))
+        second = self.make_detector(incremental_analysis=True).analyze_time_series(self.image_dir)
+        self.assertEqual(second['new_images'], 1)
+        self.assertEqual(second['watermark'], 'img_003.jpg')
+        self.assertEqual(second['total_images'], 4)
+        self.assertEqual(second['successful_analyses'], 4)
+        self.assertEqual(second['landslide_detections'], 3)
+
+    def test_failed_images_are_retried_then_dropped(self):
+        detector = self.make_detector(incremental_analysis=True, analysis_max_retries=2)
+        self.write('img_000.jpg', solid_frame(220, 30))
+        partial = os.path.join(self.image_dir, 'img_001.jpg')
+        with open(partial, 'wb') as f:
+            f.write(b'half written')
+
+        first = detector.analyze_time_series(self.image_dir)
+        self.assertEqual(first['successful_analyses'], 1)
+        self.assertEqual(first['pending_retries'], 1)
+
+        # Rescored on the next run once the capture is complete
+        self.write('img_001.jpg', solid_frame(220, 30))
+        second = detector.analyze_time_series(self.image_dir)
+        self.assertEqual(second['new_images'], 0)
+        self.assertEqual(second['successful_analyses'], 2)
+        self.assertEqual(second['pending_retries'], 0)
+
+        # A file that never becomes readable is given up on
+        with open(os.path.join(self.image_dir, 'img_002.jpg'), 'wb') as f:
+            f.write(b'broken')
+        retries = [detector.analyze_time_series(self.image_dir)['pending_retries'] for _ in range(3)]
+        self.assertEqual(retries, [1, 1, 0])
+
+class TiledDetectionTest(DetectorTestCase):
+    """Tile geometry and the probability heatmap"""
+
+    def test_tile_starts_cover_the_axis(self):
+        np.testing.assert_array_equal(LandslideDetector._tile_starts(100, 32, 30), [0, 30, 60, 68])
+        np.testing.assert_array_equal(LandslideDetector._tile_starts(64, 32, 32), [0, 32])
+        np.testing.assert_array_equal(LandslideDetector._tile_starts(32, 32, 16), [0])
+
+    def test_grid_hotspot_and_heatmap(self):
+        detector = self.make_detector()
+        # Blue slope with a red patch in the top right corner
+        frame = solid_frame(30, 220, width=256, height=192)
+        frame[:64, 192:] = (30, 128, 220)
+        path = self.write('slope.png', frame)
+
+        result = detector.detect_landslide_tiled(path, tile_size=64, overlap=0.5, batch_size=3,
+                                                 return_heatmap=True)
+
+        self.assertTrue(result['success'])
+        tiles = result['tiles']
+        # Scaled by 32/64 to 128x96, with tiles every 16 pixels
+        self.assertEqual(tiles['grid_shape'], [5, 7])
+        self.assertEqual(tiles['hotspot'], {'x': 192, 'y': 0, 'size': 64})
+        self.assertEqual(tiles['landslide_tiles'], 1)
+        self.assertTrue(tiles['landslide_detected'])
+
+        heatmap = np.array(result['heatmap'])
+        self.assertEqual(heatmap.shape, (96, 128))
+        self.assertEqual(result['heatmap_scale'], [INPUT_SIZE / 64, INPUT_SIZE / 64])
+        self.assertGreater(heatmap[:16, -16:].mean(), 0.9)
+        self.assertLess(heatmap[-16:, :16].mean(), 0.01)
+
+    def test_invalid_overlap_is_rejected(self):
+        detector = self.make_detector()
+        path = self.write('slope.png', solid_frame(30, 220, width=128, height=96))
+        self.assertFalse(detector.detect_landslide_tiled(path, overlap=1.0)['success'])
+
+class RegionOfInterestTest(DetectorTestCase):
+    """ROI configuration of the detector"""
+
+    def test_roi_masks_pixels_outside_it(self):
+        # Red on the left half, blue on the right
+        frame = solid_frame(30, 220, width=64, height=48)
+        frame[:, :32] = (30, 128, 220)
+        path = self.write('half.png', frame)
+
+        whole = self.make_detector().detect_landslide(path)
+        left = self.make_detector(roi={'boxes': [[0, 0, 0.5, 1]]}).detect_landslide(path)
+        right = self.make_detector(roi={'boxes': [[0.5, 0, 1, 1]]}).detect_landslide(path)
+
+        self.assertAlmostEqual(whole['all_predictions']['landslide'], 0.5, places=1)
+        self.assertEqual(left['prediction'], 'landslide')
+        self.assertEqual(right['prediction'], 'normal')
+
+    def test_disabled_roi_is_ignored(self):
+        detector = self.make_detector(roi={'enabled': False, 'polygon': [[0.1, 0.3], [0.9, 0.2], [0.9, 0.9]]})
+        self.assertIsNone(detector.roi)
+
+class FrameSkippingTest(DetectorTestCase):
+    """Frame gate and near-duplicate skipping in detect_landslide"""
+
+    def test_unchanged_frames_reuse_the_last_result(self):
+        detector = self.make_detector(frame_gate_enabled=True, frame_gate_max_skips=2)
+        first = self.write('a.png', solid_frame(200, 40))
+        same = self.write('b.png', solid_frame(200, 40))
+        changed = self.write('c.png', solid_frame(40, 200))
+
+        results = [detector.detect_landslide(path) for path in (first, same, same, same, changed)]
+
+        self.assertEqual([result['skipped'] for result in results], [False, True, True, False, False])
+        self.assertEqual(results[1]['reference_image'], first)
+        self.assertEqual(results[1]['image_path'], same)
+        self.assertEqual(results[1]['prediction'], results[0]['prediction'])
+        self.assertEqual(results[4]['prediction'], 'normal')
+
+    def test_near_duplicates_are_skipped(self):
+        detector = self.make_detector(near_duplicate_enabled=True)
+        original = self.write('scene_a.png', scene_frame(phase=0.0))
+        repeat = self.write('scene_b.png', scene_frame(phase=0.0))
+
+        self.assertFalse(detector.detect_landslide(original)['skipped'])
+        result = detector.detect_landslide(repeat)
+        self.assertTrue(result['skipped'])
+        self.assertEqual(result['reference_image'], original)
+        self.assertEqual(result['hash_distance'], 0)
+
+    def test_structureless_frames_are_never_near_duplicates(self):
+        detector = self.make_detector(near_duplicate_enabled=True)
+        rng = np.random.default_rng(0)
+        paths = [self.write('flat.png', solid_frame(128, 128))]
+        paths += [self.write(f'noise_{i}.png', rng.integers(0, 256, (48, 64, 3), dtype=np.uint8))
+                  for i in range(3)]
+
+        results = [detector.detect_landslide(path) for path in paths]
+        self.assertEqual([result['skipped'] for result in results], [False] * len(paths))
+
+class CascadeTest(DetectorTestCase):
+    """Two-stage cascade with a fast first model"""
+
+    def test_only_uncertain_or_positive_frames_reach_the_main_model(self):
+        detector = self.make_detector(cascade_model_path=os.path.join(models_dir, 'fast.tflite'),
+                                      cascade_uncertainty_band=(0.2, 0.8), confidence_threshold=0.7)
+        self.assertIsNotNone(detector.cascade_pool)
+
+        # Fast-stage landslide probabilities: ~0.02, 0.5 and ~0.98
+        paths = [self.write('blue.png', solid_frame(0, 255)),
+                 self.write('grey.png', solid_frame(128, 128)),
+                 self.write('red.png', solid_frame(255, 0))]
+        results = detector.batch_detect(paths)
+
+        self.assertEqual([result['decision_stage'] for result in results], ['fast', 'full', 'full'])
+        self.assertEqual(results[0]['prediction'], 'normal')
+        self.assertEqual(results[0]['model_hash'], detector.cascade_pool.model_hash)
+        self.assertEqual(results[2]['model_hash'], detector.model_hash)
+        self.assertAlmostEqual(results[2]['stage_one_probability'], landslide_probability(255, 0, gain=2.0),
+                               places=2)
+
+        info = detector.get_cascade_info()
+        self.assertEqual((info['decided_fast'], info['escalated']), (1, 2))
+
+        single = detector.detect_landslide(paths[0])
+        self.assertEqual(single['decision_stage'], 'fast')
+
+class ModelSwapTest(DetectorTestCase):
+    """Hot-swapping the active model"""
+
+    def test_swap_switches_model_and_labels_results(self):
+        detector = self.make_detector()
+        path = self.write('frame.png', solid_frame(160, 100))
+        before = detector.detect_landslide(path)
+        old_hash = detector.model_hash
+
+        status = detector.swap_model(os.path.join(models_dir, 'fast.tflite'), model_version='fast-v2', wait=True)
+
+        self.assertTrue(status['success'])
+        self.assertEqual(status['state'], 'active')
+        self.assertNotEqual(detector.model_hash, old_hash)
+        after = detector.detect_landslide(path)
+        self.assertEqual(after['model_version'], 'fast-v2')
+        self.assertEqual(after['model_hash'], detector.model_hash)
+        self.assertAlmostEqual(after['all_predictions']['landslide'],
+                               landslide_probability(160, 100, gain=2.0), places=2)
+        self.assertNotAlmostEqual(after['confidence'], before['confidence'], places=2)
+
+    def test_failed_swap_keeps_the_current_model(self):
+        detector = self.make_detector()
+        old_hash = detector.model_hash
+
+        missing = detector.swap_model(os.path.join(models_dir, 'missing.tflite'))
+        self.assertFalse(missing['success'])
+
+        status = detector.swap_model(os.path.join(models_dir, 'three_classes.tflite'), wait=True)
+        self.assertFalse(status['success'])
+        self.assertEqual(status['state'], 'failed')
+        self.assertEqual(detector.model_hash, old_hash)
+        self.assertTrue(detector.detect_landslide(self.write('frame.png', solid_frame(200, 40)))['success'])
+
+if __name__ == '__main__':
+    unittest.main()
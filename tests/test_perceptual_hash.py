@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Unit tests for perceptual hashing and the multi-index hash table
+"""
+
+import os
+import sys
+import unittest
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from perceptual_hash import PerceptualHashIndex, compute_hash, dhash, hamming_distance, is_degenerate_hash
+
+def flip_bits(hash_value: int, count: int, rng: np.random.Generator) -> int:
+    """Flip count distinct random bits of a 64-bit hash"""
+    for bit in rng.choice(64, count, replace=False):
+        hash_value ^= 1 << int(bit)
+    return hash_value
+
+def brute_force(entries: dict, hash_value: int, max_distance: int) -> dict:
+    """Reference radius query over every entry"""
+    return {key: bin(value ^ hash_value).count('1') for key, value in entries.items()
+            if bin(value ^ hash_value).count('1') <= max_distance}
+
+class HammingDistanceTest(unittest.TestCase):
+    """Distance over arrays of hashes"""
+
+    def test_matches_python_popcount(self):
+        rng = np.random.default_rng(0)
+        hashes = rng.integers(0, 2 ** 64, 100, dtype=np.uint64)
+        query = int(hashes[0]) ^ (1 << 63)
+        expected = [bin(int(value) ^ query).count('1') for value in hashes]
+        self.assertEqual(hamming_distance(query, hashes).tolist(), expected)
+
+class PerceptualHashIndexTest(unittest.TestCase):
+    """Multi-index radius queries against brute force"""
+
+    def setUp(self):
+        rng = np.random.default_rng(1)
+        # Clusters of near duplicates around a few base frames, plus unrelated frames
+        bases = [int(value) for value in rng.integers(0, 2 ** 63, 20, dtype=np.int64)]
+        self.entries = {}
+        for i in range(2000):
+            if i % 4:
+                self.entries[f'frame_{i}'] = flip_bits(bases[i % 20], int(rng.integers(0, 9)), rng)
+            else:
+                self.entries[f'frame_{i}'] = int(rng.integers(0, 2 ** 63, dtype=np.int64))
+        self.queries = [flip_bits(base, int(rng.integers(0, 4)), rng) for base in bases]
+        self.rng = rng
+
+    def build(self, **kwargs) -> PerceptualHashIndex:
+        index = PerceptualHashIndex(**kwargs)
+        for key, value in self.entries.items():
+            index.add(key, value, payload=key.upper())
+        return index
+
+    def test_radius_queries_match_brute_force(self):
+        for max_distance in (0, 2, 4, 6):
+            index = self.build(max_distance=max_distance)
+            for query in self.queries:
+                matches = index.query(query)
+                self.assertEqual({key: distance for key, distance, _ in matches},
+                                 brute_force(self.entries, query, max_distance))
+                distances = [distance for _, distance, _ in matches]
+                self.assertEqual(distances, sorted(distances))
+
+    def test_query_beyond_index_radius_scans_everything(self):
+        index = self.build(max_distance=2)
+        for query in self.queries[:5]:
+            matches = index.query(query, max_distance=10)
+            self.assertEqual({key for key, _, _ in matches}, set(brute_force(self.entries, query, 10)))
+
+    def test_nearest_returns_payload(self):
+        index = self.build(max_distance=4)
+        key, distance, payload = index.nearest(self.entries['frame_1'])
+        self.assertEqual(distance, 0)
+        self.assertEqual(payload, key.upper())
+
+    def test_replace_remove_and_evict(self):
+        index = PerceptualHashIndex(max_distance=2, max_entries=2)
+        index.add('a', 0b1111)
+        index.add('a', 0b1111 << 20)
+        self.assertEqual(index.query(0b1111), [])
+        self.assertEqual(index.nearest(0b1111 << 20)[0], 'a')
+
+        index.add('b', 0)
+        index.add('c', 1)
+        # The oldest entry is evicted once max_entries is reached
+        self.assertIsNone(index.nearest(0b1111 << 20))
+
+        index.remove('b')
+        self.assertEqual([key for key, _, _ in index.query(0)], ['c'])
+        self.assertEqual(index.get_stats()['entries'], 1)
+
+    def test_empty_index_is_truthy(self):
+        # Callers test "if self.duplicate_index" to see whether it is enabled
+        self.assertTrue(PerceptualHashIndex())
+
+class HashFunctionTest(unittest.TestCase):
+    """Frame hashes"""
+
+    def setUp(self):
+        rng = np.random.default_rng(2)
+        # A smooth structured scene: large-scale gradients survive the 9x8 thumbnail
+        y, x = np.mgrid[0:480, 0:640]
+        base = 128 + 60 * np.sin(x / 90.0) * np.cos(y / 70.0)
+        self.scene = np.dstack([base, base * 0.8, base * 0.6]).clip(0, 255).astype(np.uint8)
+        self.noisy = np.clip(self.scene + rng.normal(0, 4, self.scene.shape), 0, 255).astype(np.uint8)
+
+    def test_near_duplicates_hash_close(self):
+        for method in ('dhash', 'phash'):
+            self.assertNotEqual(compute_hash(self.scene, method), 0, method)
+            distance = hamming_distance(compute_hash(self.scene, method),
+                                        np.array([compute_hash(self.noisy, method)], dtype=np.uint64))[0]
+            self.assertLessEqual(distance, 4, method)
+
+    def test_flat_frames_hash_to_zero(self):
+        self.assertEqual(dhash(np.full((480, 640), 3, dtype=np.uint8)), 0)
+        self.assertEqual(compute_hash(np.zeros((480, 640, 3), dtype=np.uint8), 'phash'), 0)
+
+    def test_structureless_frames_hash_degenerate(self):
+        # Fine noise averages out in the dhash thumbnail, like a flat frame
+        noise = np.random.default_rng(0).integers(0, 256, (224, 224, 3), dtype=np.uint8)
+        self.assertTrue(is_degenerate_hash(compute_hash(noise, 'dhash', color_order='rgb')))
+        gradient = np.tile(np.arange(224, dtype=np.uint8), (224, 1))
+        self.assertTrue(is_degenerate_hash(dhash(gradient)))
+        self.assertFalse(is_degenerate_hash(compute_hash(self.scene, 'dhash')))
+
+    def test_color_order_gives_the_same_hash(self):
+        rgb = cv2.cvtColor(self.scene, cv2.COLOR_BGR2RGB)
+        for method in ('dhash', 'phash'):
+            self.assertEqual(compute_hash(self.scene, method), compute_hash(rgb, method, color_order='rgb'))
+
+    def test_unknown_method_is_rejected(self):
+        with self.assertRaises(ValueError):
+            compute_hash(self.scene, 'ahash')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the region of interest
+"""
+
+import os
+import sys
+import unittest
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from region_of_interest import RegionOfInterest
+
+class RegionOfInterestTest(unittest.TestCase):
+    """Cropping and masking frames to the ROI"""
+
+    def test_box_crop_in_pixels_of_any_frame_size(self):
+        roi = RegionOfInterest({'boxes': [[0.25, 0.5, 0.75, 1.0]]})
+        self.assertEqual(roi.crop_rect(200, 100), (50, 50, 150, 100))
+        self.assertEqual(roi.crop_size(400, 300), (200, 150))
+
+        image = np.arange(100 * 200).reshape(100, 200)
+        crop = roi.crop(image)
+        self.assertEqual(crop.shape, (50, 100))
+        self.assertTrue(np.shares_memory(crop, image))
+
+    def test_pixel_coordinates_are_scaled_by_resolution(self):
+        roi = RegionOfInterest({'boxes': [[648, 486, 1944, 1458]], 'resolution': [2592, 1944]})
+        np.testing.assert_allclose(roi.bounds, (0.25, 0.25, 0.75, 0.75))
+        self.assertEqual(roi.crop_rect(2592, 1944), (648, 486, 1944, 1458))
+        self.assertEqual(roi.crop_rect(400, 200), (100, 50, 300, 150))
+
+    def test_boxes_need_no_mask(self):
+        roi = RegionOfInterest({'boxes': [[0.1, 0.1, 0.9, 0.9]]})
+        self.assertIsNone(roi.get_mask(32, 32))
+
+    def test_polygon_mask_zeroes_pixels_outside(self):
+        # Lower-left triangle of the frame
+        roi = RegionOfInterest({'polygon': [[0, 0], [1, 1], [0, 1]]})
+        mask = roi.get_mask(32, 32)
+        self.assertEqual(mask.shape, (32, 32, 1))
+        self.assertEqual(mask[28, 2, 0], 1)
+        self.assertEqual(mask[2, 28, 0], 0)
+        self.assertIs(roi.get_mask(32, 32), mask)
+
+        frame = np.full((32, 32, 3), 200, dtype=np.uint8)
+        self.assertIs(roi.apply_mask(frame), frame)
+        self.assertTrue((frame[28, 2] == 200).all())
+        self.assertTrue((frame[2, 28] == 0).all())
+
+    def test_several_polygons_share_one_bounding_box(self):
+        roi = RegionOfInterest({'polygons': [[[0.1, 0.1], [0.3, 0.1], [0.3, 0.3]]],
+                                'polygon': [[0.6, 0.5], [0.8, 0.5], [0.8, 0.9]]})
+        self.assertEqual(roi.bounds, (0.1, 0.1, 0.8, 0.9))
+        self.assertEqual(len(roi.to_config()['polygons']), 2)
+
+    def test_invalid_rois_are_rejected(self):
+        with self.assertRaises(ValueError):
+            RegionOfInterest({})
+        with self.assertRaises(ValueError):
+            RegionOfInterest({'polygon': [[0.2, 0.2], [0.2, 0.8], [0.2, 0.5]]})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the detection results store
+"""
+
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+from datetime import datetime, timedelta
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'core'))
+
+from results_store import DetectionResultStore, capture_time, to_epoch, EXIF_IFD, EXIF_DATETIME_ORIGINAL
+
+START = datetime(2024, 5, 1, 6, 0)
+
+def make_result(hours: float, prediction: str = 'normal', confidence: float = 0.8,
+                landslide: bool = False) -> dict:
+    """Build a detection result captured hours after START"""
+    return {
+        'success': True,
+        'timestamp': (START + timedelta(hours=hours)).isoformat(),
+        'image_path': f'images/frame_{hours:06.2f}.jpg',
+        'prediction': prediction,
+        'confidence': confidence,
+        'all_predictions': {'landslide': confidence if landslide else 1 - confidence},
+        'landslide_detected': landslide,
+        'model_version': 'v1'
+    }
+
+class ToEpochTest(unittest.TestCase):
+    """Timestamp conversion"""
+
+    def test_accepts_iso_datetime_and_numbers(self):
+        epoch = START.timestamp()
+        self.assertEqual(to_epoch(START.isoformat()), epoch)
+        self.assertEqual(to_epoch(START), epoch)
+        self.assertEqual(to_epoch(str(epoch)), epoch)
+        self.assertEqual(to_epoch(int(epoch)), float(int(epoch)))
+        self.assertIsNone(to_epoch(None))
+        self.assertIsNone(to_epoch(''))
+
+class CaptureTimeTest(unittest.TestCase):
+    """Capture timestamps of image files"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def write_image(self, name: str, taken: datetime = None) -> str:
+        path = os.path.join(self.temp_dir.name, name)
+        exif = Image.Exif()
+        if taken is not None:
+            exif.get_ifd(EXIF_IFD)[EXIF_DATETIME_ORIGINAL] = taken.strftime('%Y:%m:%d %H:%M:%S')
+        Image.new('RGB', (16, 16)).save(path, exif=exif)
+        return path
+
+    def test_prefers_exif_original_time(self):
+        path = self.write_image('exif.jpg', START)
+        self.assertEqual(capture_time(path), START.timestamp())
+
+    def test_falls_back_to_modification_time(self):
+        path = self.write_image('plain.jpg')
+        os.utime(path, (START.timestamp(), START.timestamp()))
+        self.assertEqual(capture_time(path), START.timestamp())
+
+    def test_non_files_have_no_capture_time(self):
+        self.assertIsNone(capture_time(None))
+        self.assertIsNone(capture_time(os.path.join(self.temp_dir.name, 'missing.jpg')))
+        self.assertIsNone(capture_time(f'{self.temp_dir.name}/archive.zip::frame.jpg'))
+
+class DetectionResultStoreTest(unittest.TestCase):
+    """Queries over stored results"""
+
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.store = DetectionResultStore(os.path.join(self.temp_dir.name, 'results.db'),
+                                          camera_id='cam-1', batch_size=1000, flush_interval=3600)
+        # Two days of hourly frames from cam-1, with detections on the second day
+        for hour in range(48):
+            landslide = hour in (30, 31, 40)
+            self.store.add(make_result(hour, 'landslide' if landslide else 'normal',
+                                       confidence=0.7 + hour / 1000, landslide=landslide))
+        self.store.add(make_result(32, 'landslide', confidence=0.99, landslide=True), camera='cam-2')
+
+    def tearDown(self):
+        self.store.close()
+        self.temp_dir.cleanup()
+
+    def test_queued_results_are_visible_to_queries(self):
+        self.assertEqual(self.store.get_stats()['results'], 49)
+
+    def test_query_filters_and_orders_newest_first(self):
+        results = self.store.query(start=START + timedelta(hours=10), end=START + timedelta(hours=20))
+        self.assertEqual(len(results), 10)
+        self.assertEqual(results[0]['timestamp'], (START + timedelta(hours=19)).isoformat())
+        self.assertEqual(results[-1]['timestamp'], (START + timedelta(hours=10)).isoformat())
+
+        self.assertEqual(len(self.store.query(camera='cam-2')), 1)
+        self.assertEqual(len(self.store.query(prediction='landslide', camera='cam-1')), 3)
+
+        detections = self.store.query(landslide_only=True)
+        self.assertEqual(len(detections), 4)
+        self.assertTrue(all(result['landslide_detected'] for result in detections))
+
+    def test_query_pages_with_limit_and_offset(self):
+        first = self.store.query(camera='cam-1', limit=5)
+        second = self.store.query(camera='cam-1', limit=5, offset=5)
+        self.assertEqual(len(first), 5)
+        self.assertEqual(first[-1]['timestamp'], (START + timedelta(hours=43)).isoformat())
+        self.assertEqual(second[0]['timestamp'], (START + timedelta(hours=42)).isoformat())
+
+    def test_top_confidence(self):
+        top = self.store.top_confidence(n=2)
+        self.assertEqual([result['confidence'] for result in top], [0.99, 0.74])
+        self.assertEqual(top[0]['camera'], 'cam-2')
+
+        normal = self.store.top_confidence(n=1, prediction='normal', end=START + timedelta(hours=24))
+        self.assertEqual(normal[0]['timestamp'], (START + timedelta(hours=23)).isoformat())
+
+    def test_detections_per_day(self):
+        days = self.store.detections_per_day()
+        second_day = (START + timedelta(days=1)).date().isoformat()
+        self.assertEqual([(day['day'], day['detections']) for day in days], [(second_day, 4)])
+        self.assertEqual(days[0]['max_confidence'], 0.99)
+
+        cam_days = self.store.detections_per_day(camera='cam-1')
+        self.assertEqual(cam_days[0]['detections'], 3)
+        self.assertEqual(self.store.detections_per_day(end=START + timedelta(hours=24)), [])
+
+    def test_failed_results_are_not_stored(self):
+        self.store.add({'success': False, 'error': 'Failed to preprocess image'})
+        self.assertEqual(self.store.get_stats()['results'], 49)
+
+    def test_results_are_stored_at_capture_time(self):
+        path = os.path.join(self.temp_dir.name, 'capture.jpg')
+        Image.new('RGB', (16, 16)).save(path)
+        captured = START - timedelta(days=3)
+        os.utime(path, (captured.timestamp(), captured.timestamp()))
+
+        # Scored long after capture
+        self.store.add(dict(make_result(100), image_path=path))
+        stored = self.store.query(end=START)
+        self.assertEqual([result['image_path'] for result in stored], [path])
+        self.assertEqual(stored[0]['timestamp'], captured.isoformat())
+
+    def test_close_unregisters_exit_handler(self):
+        store = DetectionResultStore(os.path.join(self.temp_dir.name, 'other.db'))
+        with mock.patch('results_store.atexit.unregister') as unregister:
+            store.close()
+        unregister.assert_called_once_with(store.close)
+
+    def test_rows_are_append_only(self):
+        self.store.flush()
+        connection = sqlite3.connect(self.store.db_path)
+        try:
+            with self.assertRaises(sqlite3.DatabaseError):
+                connection.execute("UPDATE detection_results SET prediction = 'normal'")
+            with self.assertRaises(sqlite3.DatabaseError):
+                connection.execute('DELETE FROM detection_results')
+        finally:
+            connection.close()
+
+if __name__ == '__main__':
+    unittest.main()
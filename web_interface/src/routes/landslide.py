@@ -24,11 +24,25 @@ except ImportError as e:
     LandslideScheduler = None
     create_camera_controller = None
 
+# The detector is copied next to the scheduler on deployment; fall back to core/
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))), 'core'))
+
+try:
+    from ai_landslide_detector import LandslideDetector
+    from inference_metrics import load_published_metrics
+except ImportError as e:
+    print(f"Warning: Could not import landslide detector: {e}")
+    LandslideDetector = None
+    load_published_metrics = None
+
 landslide_bp = Blueprint('landslide', __name__)
 
 # Global scheduler instance
 scheduler_instance = None
 
+# Global detector instance
+detector_instance = None
+
 def get_scheduler():
     """Get or create scheduler instance"""
     global scheduler_instance
@@ -42,6 +56,19 @@ def get_scheduler():
             return None
     return scheduler_instance
 
+def get_detector():
+    """Get or create detector instance"""
+    global detector_instance
+    if detector_instance is None and LandslideDetector is not None:
+        scheduler = get_scheduler()
+        detector_config = scheduler.config.get('detector', {}) if scheduler else {}
+        try:
+            detector_instance = LandslideDetector(detector_config)
+        except Exception as e:
+            print(f"Failed to initialize detector: {e}")
+            return None
+    return detector_instance
+
 @landslide_bp.route('/status', methods=['GET'])
 @cross_origin()
 def get_status():
@@ -510,3 +537,156 @@ def get_upload_queue():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@landslide_bp.route('/detector/metrics', methods=['GET'])
+@cross_origin()
+def get_detector_metrics():
+    """Get throughput and per-stage latency percentiles published by the scoring process"""
+    try:
+        # Read the published snapshot; a detector built here would never score
+        scheduler = get_scheduler()
+        metrics_path = scheduler.config.get('detector', {}).get('metrics_path') if scheduler else None
+        if not metrics_path or load_published_metrics is None:
+            return jsonify({'error': 'Metrics publishing not enabled'}), 404
+        
+        metrics = load_published_metrics(metrics_path)
+        if metrics is None:
+            return jsonify({'error': 'No metrics published yet'}), 404
+        
+        return jsonify(metrics)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@landslide_bp.route('/detector/model', methods=['GET', 'POST'])
+@cross_origin()
+def handle_detector_model():
+    """Get the active model or hot-swap to a new model file"""
+    try:
+        detector = get_detector()
+        if detector is None:
+            return jsonify({'error': 'Detector not available'}), 500
+        
+        if request.method == 'GET':
+            return jsonify(detector.get_model_info())
+        
+        elif request.method == 'POST':
+            data = request.get_json() or {}
+            if not data.get('model_path'):
+                return jsonify({'error': 'model_path is required'}), 400
+            
+            # Only model files inside the models directory may be loaded
+            models_dir = Path(detector.models_directory).resolve()
+            model_path = Path(data['model_path']).resolve()
+            if models_dir not in model_path.parents:
+                return jsonify({'error': f'model_path must be inside {detector.models_directory}'}), 400
+            
+            # Loads in the background; the current model serves until it is ready
+            status = detector.swap_model(
+                str(model_path),
+                model_version=data.get('model_version'),
+                wait=bool(data.get('wait', False))
+            )
+            if not status['success']:
+                return jsonify(status), 400
+            
+            return jsonify(status), 202 if status['state'] == 'loading' else 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+def get_results_store():
+    """Get the detector's results store, or None when it is not enabled"""
+    detector = get_detector()
+    return detector.results_store if detector is not None else None
+
+@landslide_bp.route('/detector/results', methods=['GET'])
+@cross_origin()
+def get_detection_results():
+    """Get stored detection results in a time range, newest first"""
+    try:
+        store = get_results_store()
+        if store is None:
+            return jsonify({'error': 'Results store not enabled'}), 404
+        
+        results = store.query(
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            camera=request.args.get('camera'),
+            prediction=request.args.get('prediction'),
+            landslide_only=request.args.get('landslide_only', 'false').lower() == 'true',
+            limit=min(request.args.get('limit', 100, type=int), 10000),
+            offset=request.args.get('offset', 0, type=int)
+        )
+        return jsonify({'results': results, 'count': len(results)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@landslide_bp.route('/detector/results/top', methods=['GET'])
+@cross_origin()
+def get_top_detection_results():
+    """Get the most confident stored results for a prediction class"""
+    try:
+        store = get_results_store()
+        if store is None:
+            return jsonify({'error': 'Results store not enabled'}), 404
+        
+        results = store.top_confidence(
+            n=min(request.args.get('n', 10, type=int), 1000),
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            camera=request.args.get('camera'),
+            prediction=request.args.get('prediction', 'landslide')
+        )
+        return jsonify({'results': results, 'count': len(results)})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@landslide_bp.route('/detector/results/daily', methods=['GET'])
+@cross_origin()
+def get_daily_detections():
+    """Get landslide detection counts per day"""
+    try:
+        store = get_results_store()
+        if store is None:
+            return jsonify({'error': 'Results store not enabled'}), 404
+        
+        days = store.detections_per_day(
+            start=request.args.get('start'),
+            end=request.args.get('end'),
+            camera=request.args.get('camera')
+        )
+        return jsonify({'days': days, 'stats': store.get_stats()})
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@landslide_bp.route('/detector/similar/<filename>', methods=['GET'])
+@cross_origin()
+def get_similar_images(filename):
+    """Find past frames that look most similar to a captured image"""
+    try:
+        scheduler = get_scheduler()
+        detector = get_detector()
+        if scheduler is None or detector is None:
+            return jsonify({'error': 'Detector not available'}), 500
+        
+        if detector.embedding_store is None:
+            return jsonify({'error': 'Embeddings not enabled'}), 404
+        
+        image_dir = Path(scheduler.config.get('image_directory', './images'))
+        image_path = image_dir / filename
+        if not image_path.exists():
+            return jsonify({'error': 'Image file not found'}), 404
+        
+        k = min(request.args.get('k', 10, type=int), 100)
+        result = detector.find_similar(str(image_path), k)
+        if not result['success']:
+            return jsonify(result), 500
+        
+        return jsonify(result)
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500